@@ -0,0 +1,111 @@
+import numpy as np
+from collections import deque
+
+MAX_RECENT_ACTIONS = 10
+# the repetitions are checked on the windows of 4 actions fully inside the last MAX_RECENT_ACTIONS actions
+NUM_WINDOWS = MAX_RECENT_ACTIONS - 3
+
+
+def get_opposites(actions):
+    """
+    Returns the table opposites[i][j], True if actions[i] followed by actions[j] goes back on one of the axes.
+    """
+    return [[a1[0] == -a2[0] or a1[1] == -a2[1] for a2 in actions] for a1 in actions]
+
+
+class ActionHistory():
+    """
+    Last actions of an agent, stored as indices of the actions list in a bounded deque.
+
+    The repetitive patterns are tracked with counters updated at every new action,
+    so checking them is O(1) instead of rescanning the whole history:
+        - oscillations : back-and-forth windows a1, a2, a1, a2 with a2 going back on a1,
+          counted over the last NUM_WINDOWS windows.
+        - period_run : how many actions in a row are equal to the action 4 steps before,
+          4 means the last 4 actions repeat the previous 4.
+        - same_run : how many times in a row the last action was repeated.
+    """
+    def __init__(self, actions):
+        self.opposites = get_opposites(actions)
+        self.actions = deque(maxlen=MAX_RECENT_ACTIONS)
+        self.oscillation_flags = deque(maxlen=NUM_WINDOWS)
+        self.oscillations = 0
+        self.period_run = 0
+        self.same_run = 0
+        self.repetitive = False
+
+    def __len__(self):
+        return len(self.actions)
+
+    def push(self, action):
+        """
+        Records a new action and updates the pattern counters.
+
+        Args:
+            - action (int) : index of the action in the actions list.
+        """
+        actions = self.actions
+        n = len(actions)
+
+        self.same_run = self.same_run + 1 if n >= 1 and actions[-1] == action else 1
+        self.period_run = self.period_run + 1 if n >= 4 and actions[-4] == action else 0
+
+        if n >= 3:
+            oscillation = actions[-3] == actions[-1] and actions[-2] == action and self.opposites[actions[-3]][actions[-2]]
+            if len(self.oscillation_flags) == NUM_WINDOWS:
+                self.oscillations -= self.oscillation_flags[0]
+            self.oscillation_flags.append(oscillation)
+            self.oscillations += oscillation
+
+        actions.append(action)
+        self.repetitive = self.oscillations > 0 or self.period_run >= 4 or self.same_run >= 4
+
+
+class BatchedActionHistory():
+    """
+    Vectorized ActionHistory for many agents taking an action at every step, all the
+    counters are arrays with the given shape, i.e. (num_pairs, 2) for the batched environment.
+    Only the last 4 actions are kept, in a ring indexed by the number of steps.
+    """
+    def __init__(self, shape, actions):
+        shape = tuple(shape)
+        self.last_actions = np.zeros(shape + (4,), dtype=np.int8)
+        self.oscillation_flags = np.zeros(shape + (NUM_WINDOWS,), dtype=bool)
+        self.oscillations = np.zeros(shape, dtype=np.int64)
+        self.period_run = np.zeros(shape, dtype=np.int64)
+        self.same_run = np.zeros(shape, dtype=np.int64)
+        self.repetitive = np.zeros(shape, dtype=bool)
+        self.steps = 0
+        self.opposites = np.array(get_opposites(actions))
+
+    def push(self, actions):
+        """
+        Records the new actions of all the agents and updates the pattern counters.
+
+        Args:
+            - actions (np.array) : indices of the actions in the actions list.
+        """
+        n = self.steps
+        last = self.last_actions
+
+        if n >= 1:
+            same = last[..., (n - 1) % 4] == actions
+            self.same_run = np.where(same, self.same_run + 1, 1)
+        else:
+            self.same_run[...] = 1
+
+        if n >= 4:
+            # the slot about to be overwritten holds the action 4 steps before
+            repeated = last[..., n % 4] == actions
+            self.period_run = np.where(repeated, self.period_run + 1, 0)
+
+        if n >= 3:
+            a1, a2, a3 = last[..., (n - 3) % 4], last[..., (n - 2) % 4], last[..., (n - 1) % 4]
+            oscillation = (a1 == a3) & (a2 == actions) & self.opposites[a1, a2]
+            slot = (n - 3) % NUM_WINDOWS
+            self.oscillations += oscillation.astype(np.int64) - self.oscillation_flags[..., slot]
+            self.oscillation_flags[..., slot] = oscillation
+
+        last[..., n % 4] = actions
+        self.steps += 1
+        self.repetitive = (self.oscillations > 0) | (self.period_run >= 4) | (self.same_run >= 4)
@@ -1,8 +1,173 @@
-from collections import defaultdict
 import random
-import math
 import pickle
 import os
+import functools
+import glob
+import numpy as np
+from trails import TrailBuffer
+from q_table import DenseQTable, SparseQTable
+from checkpoints import QTableCheckpoints
+from action_history import ActionHistory
+import agents_utils as au
+
+# saved q_tables live next to this file, whatever the working directory
+Q_TABLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "q_tables")
+
+# possible movements of agents
+ACTIONS = [(0, -1), (1, 0), (0, 1), (-1, 0), 
+           (1, -1), (1, 1), (-1, 1), (-1, -1)]
+
+
+def bucket_distance(distance):
+    """
+    Discretizes the distance, more finely for closer distances.
+    """
+    if distance < 5:
+        return int(distance)
+    elif distance < 20:
+        return 5 + int((distance - 5) / 3)
+    else:
+        return 10 + int((distance - 20) / 10)
+
+
+def get_state_shape(grid_size):
+    """
+    Returns the number of possible values of each feature of the state, used to preallocate the Q-table:
+    distance buckets up to the diagonal of the map, 8 directions and 6 bins for each boundary proximity.
+    """
+    max_distance = ((grid_size[0] / 10)**2 + (grid_size[1] / 10)**2)**0.5
+    return (bucket_distance(max_distance) + 1, 8, 6, 6)
+
+
+# rows of the offset table computed at once, bounds the temporary memory of the build
+OFFSET_CHUNK_ROWS = 256
+
+
+class StateEncoder():
+    """
+    Lookup tables turning positions into the states of AgentWalker.get_state.
+
+    The state only depends on the grid offset to the target (distance bucket and direction)
+    and on the grid cell of the agent (boundary proximity), so every possible value is computed
+    once and encoding a state is just a few indexings. The offset table holds one uint16 per offset,
+    distance_bucket * 8 + direction, in a NumPy array: the vectorized versions index it directly
+    and the single agent version reads Python ints from a memoryview of the same buffer, so on a
+    10 times larger map it takes 2 MB. Positions are expected inside the map, from 0 to grid_size included.
+    """
+    def __init__(self, grid_size):
+        self.cells_x = int(grid_size[0] / 10)
+        self.cells_y = int(grid_size[1] / 10)
+        self.state_shape = get_state_shape(grid_size)
+
+        if self.state_shape[0] * 8 > np.iinfo(np.uint16).max + 1:
+            raise ValueError(f"map of {grid_size} is too large for the offset table")
+
+        # offsets from -cells to +cells, stored shifted by cells
+        self.offset_codes = np.empty((2 * self.cells_x + 1, 2 * self.cells_y + 1), dtype=np.uint16)
+        relative_y = np.arange(-self.cells_y, self.cells_y + 1)
+        for start in range(-self.cells_x, self.cells_x + 1, OFFSET_CHUNK_ROWS):
+            relative_x = np.arange(start, min(start + OFFSET_CHUNK_ROWS, self.cells_x + 1))[:, None]
+            distance = np.sqrt(relative_x**2 + relative_y**2)
+            angle_deg = (np.degrees(np.arctan2(relative_y, relative_x)) + 360) % 360
+            direction = ((angle_deg + 22.5) // 45).astype(np.intp) % 8
+            distance_bucket = np.where(distance < 5, np.trunc(distance),
+                              np.where(distance < 20, 5 + np.trunc((distance - 5) / 3),
+                                                      10 + np.trunc((distance - 20) / 10))).astype(np.intp)
+            self.offset_codes[start + self.cells_x:start + self.cells_x + len(relative_x)] = distance_bucket * 8 + direction
+        self.offset_codes_view = memoryview(self.offset_codes)
+
+        cells = np.arange(self.cells_x + 1)
+        self.boundary_x = (np.minimum(cells, self.cells_x - cells) / self.cells_x * 5).astype(np.intp)
+        cells = np.arange(self.cells_y + 1)
+        self.boundary_y = (np.minimum(cells, self.cells_y - cells) / self.cells_y * 5).astype(np.intp)
+
+        # contributions of every table to the id of the state in the Q-table,
+        # the direction is the second feature so the id of an offset is its code times the stride of the direction
+        strides = [int(np.prod(self.state_shape[i + 1:])) for i in range(len(self.state_shape))]
+        self.offset_stride = strides[1]
+        self.boundary_x_ids = self.boundary_x * strides[2]
+        self.boundary_y_ids = self.boundary_y * strides[3]
+
+        self.boundary_x_list = self.boundary_x.tolist()
+        self.boundary_y_list = self.boundary_y.tolist()
+
+    def encode(self, x, y, target_x, target_y):
+        """
+        Returns the state tuple of a single agent.
+        """
+        x_grid = int(x / 10)
+        y_grid = int(y / 10)
+        code = self.offset_codes_view[int(target_x / 10) - x_grid + self.cells_x, int(target_y / 10) - y_grid + self.cells_y]
+        return (code >> 3, code & 7, self.boundary_x_list[x_grid], self.boundary_y_list[y_grid])
+
+    def grid_cells(self, x, y, target_x, target_y):
+        x_grid = (np.asarray(x) // 10).astype(np.intp)
+        y_grid = (np.asarray(y) // 10).astype(np.intp)
+        offset_x = (np.asarray(target_x) // 10).astype(np.intp) - x_grid + self.cells_x
+        offset_y = (np.asarray(target_y) // 10).astype(np.intp) - y_grid + self.cells_y
+        return x_grid, y_grid, offset_x, offset_y
+
+    def offset_code(self, x, y, target_x, target_y):
+        x_grid, y_grid, offset_x, offset_y = self.grid_cells(x, y, target_x, target_y)
+        return x_grid, y_grid, self.offset_codes[offset_x, offset_y].astype(np.intp)
+
+    def encode_batch(self, x, y, target_x, target_y):
+        """
+        Vectorized encode, returns an (..., 4) int array, one state per position.
+        """
+        x_grid, y_grid, code = self.offset_code(x, y, target_x, target_y)
+        return np.stack([code >> 3, code & 7, self.boundary_x[x_grid], self.boundary_y[y_grid]], axis=-1)
+
+    def encode_ids(self, x, y, target_x, target_y):
+        """
+        Vectorized encode returning directly the ids of the states in a DenseQTable of shape state_shape.
+        """
+        x_grid, y_grid, code = self.offset_code(x, y, target_x, target_y)
+        return code * self.offset_stride + self.boundary_x_ids[x_grid] + self.boundary_y_ids[y_grid]
+
+
+def get_checkpoints(name, state_shape, max_states = None):
+    """
+    Returns the QTableCheckpoints of the agent called name, tables of different layouts
+    can't share their checkpoints so the layout is part of the directory.
+    """
+    layout = "x".join(str(n) for n in state_shape)
+    if max_states is not None:
+        layout += f"_sparse{max_states}"
+    return QTableCheckpoints(os.path.join(Q_TABLES_DIR, f"{name.replace(' ', '_')}_{layout}"))
+
+
+def latest_pickle_episode(name):
+    """
+    Returns the last episode of the old pickled Q-tables of the agent called name, None if there is none.
+    """
+    prefix = os.path.join(Q_TABLES_DIR, f"{name}_episode_")
+    episodes = [os.path.basename(path)[len(name) + len("_episode_"):-len(".pkl")]
+                for path in glob.glob(glob.escape(prefix) + "*.pkl")]
+    episodes = [int(episode) for episode in episodes if episode.isdigit()]
+    return max(episodes) if episodes else None
+
+
+@functools.lru_cache(maxsize=None)
+def get_state_encoder(grid_size):
+    """
+    Returns the StateEncoder of the map, shared by all the agents on a map of the same size.
+    """
+    return StateEncoder(grid_size)
+
+
+def get_states(x, y, target_x, target_y, grid_size):
+    """
+    Vectorized AgentWalker.get_state, computes the states of many agents at once.
+
+    Args:
+        - x, y (np.array) : positions of the agents.
+        - target_x, target_y (np.array) : positions of their targets.
+        - grid_size (tuple) : size of the map.
+
+    Returns an (..., 4) int array, one state per position.
+    """
+    return get_state_encoder(tuple(grid_size)).encode_batch(x, y, target_x, target_y)
 
 
 class AgentWalker():
@@ -10,12 +175,12 @@ class AgentWalker():
     AgentWalker class, learns through the use of a Q-table,
     the best next move he could apply.
     """
-    def __init__(self, x, y, color, name, width, height, grid_size, exploration_rate, discount_factor, learning_rate):
+    def __init__(self, x, y, color, name, width, height, grid_size, exploration_rate, discount_factor, learning_rate, trail_length = 100, max_states = None):
         # classic attributes of the agent
         self.x = x
         self.y = y
         self.color = color
-        self.positions = []
+        self.trail = TrailBuffer(trail_length)
         self.name = name
         self.width = width
         self.height = height
@@ -23,14 +188,19 @@ class AgentWalker():
 
         # managing agents Q table
         self.grid_size = grid_size
-        self.q_table = defaultdict(lambda: defaultdict(lambda: 0))
         self.exploration_rate = exploration_rate
         self.discount_factor = discount_factor
         self.learning_rate = learning_rate
 
         # possible movements of agents
-        self.actions = [(0, -1), (1, 0), (0, 1), (-1, 0), 
-                         (1, -1), (1, 1), (-1, 1), (-1, -1)]
+        self.actions = list(ACTIONS)
+        # on large maps the table can be bounded to max_states states, the least visited ones get evicted
+        if max_states is None:
+            self.q_table = DenseQTable(get_state_shape(self.grid_size), self.actions)
+        else:
+            self.q_table = SparseQTable(get_state_shape(self.grid_size), self.actions, max_states)
+        self.state_encoder = get_state_encoder(tuple(self.grid_size))
+        self.checkpoints = get_checkpoints(name, self.q_table.state_shape, max_states)
         
         # rewards history
         self.current_reward = 0
@@ -38,8 +208,7 @@ class AgentWalker():
         self.steps_history = []
 
         # track recent actions
-        self.recent_actions = []
-        self.max_recent_actions = 10 
+        self.action_history = ActionHistory(self.actions)
         self.repetition_threshold = 3
 
     def check_boundaries(self, WIDTH, HEIGHT):
@@ -73,70 +242,32 @@ class AgentWalker():
         # - Relative position to boundaries
         """
 
-        x_grid = int(self.x / 10)
-        y_grid = int(self.y / 10)
-        target_x_grid = int(target_agent.x / 10)
-        target_y_grid = int(target_agent.y / 10)
-        
-        relative_x = target_x_grid - x_grid
-        relative_y = target_y_grid - y_grid
-        
-        # Add boundary proximity information
-        boundary_x = min(x_grid, int(self.grid_size[0]/10) - x_grid) / int(self.grid_size[0]/10)
-        boundary_y = min(y_grid, int(self.grid_size[1]/10) - y_grid) / int(self.grid_size[1]/10)
-        
-        distance = (relative_x**2 + relative_y**2)**0.5
-        
-        angle = math.atan2(relative_y, relative_x)
-        angle_deg = (math.degrees(angle) + 360) % 360
-        direction = int((angle_deg + 22.5) / 45) % 8
-        
-        # Discretize more finely for closer distances
-        if distance < 5:
-            distance_bucket = int(distance)
-        elif distance < 20:
-            distance_bucket = 5 + int((distance - 5) / 3)
-        else:
-            distance_bucket = 10 + int((distance - 20) / 10)
-        
-        return (distance_bucket, direction, int(boundary_x * 5), int(boundary_y * 5))
+        # the states are precomputed for every grid offset and cell, see StateEncoder
+        return self.state_encoder.encode(self.x, self.y, target_agent.x, target_agent.y)
     
+    @property
+    def recent_actions(self):
+        """
+        Returns the last actions taken by the agent, oldest first.
+        """
+        return [self.actions[i] for i in self.action_history.actions]
+
+    def record_action(self, action):
+        """
+        Adds the action to the history of the last actions.
+        """
+        self.action_history.push(self.q_table.action_index[action])
+
     def detect_repetitive_pattern(self):
         """
-        Detect if the agent is stuck in a repetitive pattern of actions.
+        Detect if the agent is stuck in a repetitive pattern of actions:
+            - simple back-and-forth patterns (e.g., up-down-up-down)
+            - last 4 actions repeating the previous 4 (e.g., up-right-down-left repeated)
+            - the same action repeated 4 times
         Returns True if a pattern is detected, False otherwise.
+        The history keeps the patterns updated at every action, so this is O(1).
         """
-        if len(self.recent_actions) < 4:
-            return False
-        
-        # Check for simple back-and-forth patterns (e.g., up-down-up-down)
-        # These would be opposite actions like (0,1) and (0,-1) or (1,0) and (-1,0)
-        for i in range(len(self.recent_actions) - 3):
-            # Simple oscillation between two actions
-            a1, a2 = self.recent_actions[i], self.recent_actions[i+1]
-            a3, a4 = self.recent_actions[i+2], self.recent_actions[i+3]
-            
-            # Check if a1 == a3 and a2 == a4 (repeating pair)
-            if a1 == a3 and a2 == a4:
-                # Check if they're opposites (like up-down)
-                if (a1[0] == -a2[0] and a1[1] == -a2[1]) or (a1[0] == -a2[0] or a1[1] == -a2[1]):
-                    return True
-        
-        # Check for longer patterns (e.g., up-right-down-left repeated)
-        # Simplest approach: check if last 4 actions repeat the previous 4
-        if len(self.recent_actions) >= 8:
-            pattern1 = tuple(self.recent_actions[-8:-4])
-            pattern2 = tuple(self.recent_actions[-4:])
-            if pattern1 == pattern2:
-                return True
-        
-        # Check if agent is just repeating the same action
-        if len(self.recent_actions) >= 4:
-            last_actions = self.recent_actions[-4:]
-            if last_actions.count(last_actions[0]) == len(last_actions):
-                return True
-                
-        return False
+        return self.action_history.repetitive
 
 
     def choose_action(self, state):
@@ -146,18 +277,14 @@ class AgentWalker():
         # EXPLORATION: random movement to update q table
         if random.uniform(0, 1) < self.exploration_rate:
             action = random.choice(self.actions)
-            self.recent_actions.append(action)
-            if len(self.recent_actions) > self.max_recent_actions:
-                self.recent_actions.pop(0)
+            self.record_action(action)
             return random.choice(self.actions)
         
         # EXPLOITATION: choose best option from q table
-        state_actions = self.q_table[state]
-        if not state_actions: # if this state was never reached just return a random movement
+        state_id = self.q_table.state_id(state)
+        if not self.q_table.is_visited(state_id): # if this state was never reached just return a random movement
             action = random.choice(self.actions)
-            self.recent_actions.append(action)
-            if len(self.recent_actions) > self.max_recent_actions:
-                self.recent_actions.pop(0)
+            self.record_action(action)
             return random.choice(self.actions) 
 
         if self.detect_repetitive_pattern() and random.random() < 0.5:  # 50% chance to break pattern
@@ -165,17 +292,11 @@ class AgentWalker():
             action = random.choice(self.actions)
             #print(f"{self.name} breaking out of action loop with random action {action}")
         else:
-            # Choose best action normally
-            best_actions = [
-                action for action, value in state_actions.items() 
-                if value == max(state_actions.values())
-            ]
-            action = random.choice(best_actions) if best_actions else random.choice(self.actions)
+            # Choose best action normally, ties are broken randomly
+            action = self.actions[self.q_table.best_action(state_id)]
         
         # Record this action
-        self.recent_actions.append(action)
-        if len(self.recent_actions) > self.max_recent_actions:
-            self.recent_actions.pop(0)
+        self.record_action(action)
         
         return action
 
@@ -191,9 +312,7 @@ class AgentWalker():
         hit_boundary = self.check_boundaries(self.grid_size[0], self.grid_size[1])
         self.hit_boundary = hit_boundary
 
-        self.positions.append([self.x, self.y])
-        if len(self.positions) > 100:
-            self.positions.pop(0) 
+        self.trail.push(self.x, self.y)
 
 
     def update_q_table(self, state, action, reward, next_state):
@@ -208,13 +327,15 @@ class AgentWalker():
         """
 
         # Q-learning formula
-        current_q = self.q_table[state][action]
-        best_next_q = max(self.q_table[next_state].values()) if self.q_table[next_state] else 0
+        state_id = self.q_table.state_id(state)
+        action_idx = self.q_table.action_index[action]
+        current_q = self.q_table.get(state_id, action_idx)
+        best_next_q = self.q_table.max_value(self.q_table.state_id(next_state))
         
         # Update Q-value
-        self.q_table[state][action] = current_q + self.learning_rate * (
+        self.q_table.set(state_id, action_idx, current_q + self.learning_rate * (
             reward + self.discount_factor * best_next_q - current_q
-        )
+        ))
 
     
     def decay_exploration(self, exploration_decay, no_minimum = False):
@@ -231,6 +352,13 @@ class AgentWalker():
         else:
             self.exploration_rate = max(0.1, self.exploration_rate * exploration_decay)
 
+    @property
+    def positions(self):
+        """
+        Returns the trail of the agent ordered from the oldest to the newest position.
+        """
+        return self.trail.get_trail()
+
     def get_agent_attributes(self):
         """
         Returns position and color of walker, used mainly to draw the walker at each iteration.
@@ -246,51 +374,45 @@ class AgentWalker():
 
     def save_q_table(self, episode_number):
         """
-        Saves the q_table with the respective episode it was saved at.
+        Saves a checkpoint of the q_table with the respective episode it was saved at,
+        only the rows changed since the previous checkpoint are written.
 
         Args:
             - episode_number (int) : number of episode to save the q_table at.
         """
-        # Create a directory for saving if it doesn't exist        
-        filepath = os.path.dirname(os.path.abspath(__file__))
-        os.makedirs(f"{filepath}\\q_tables", exist_ok=True)
-        
-        # Convert defaultdict with lambdas to regular dict
-        q_dict = {}
-        for state, actions in self.q_table.items():
-            q_dict[state] = dict(actions)
-        
-        # Save to file
-        filename = f"{filepath}/q_tables/{self.name}_episode_{episode_number}.pkl"
-        with open(filename, 'wb') as f:
-            pickle.dump(q_dict, f)
-        
-        print(f"Q-table saved for {self.name} at episode {episode_number}")
+        rows = self.checkpoints.save(self.q_table, episode_number, self.exploration_rate, self.current_reward)
+        if au.VERBOSE:
+            print(f"Q-table saved for {self.name} at episode {episode_number}, {rows} rows changed")
 
 
-    def load_q_table(self, episode_number):
+    def load_q_table(self, episode_number = None):
         """
-        Loads previously saved q_tables.
+        Loads previously saved q_tables, falling back to the old pickled dictionaries.
 
         Args:
-            - episode_number (int) : number of episode that we want to retrieve.
+            - episode_number (int) : number of episode that we want to retrieve, the last one if None.
         """
+        if self.checkpoints.load(self.q_table, episode_number):
+            print(f"Q-table loaded for {self.name} from {self.checkpoints.directory}")
+            return True
 
-        filename = f"q_tables/{self.name}_episode_{episode_number}.pkl"
+        if episode_number is None:
+            episode_number = latest_pickle_episode(self.name)
+            if episode_number is None:
+                print(f"No Q-table found for {self.name} in {Q_TABLES_DIR}")
+                return False
+        filename = os.path.join(Q_TABLES_DIR, f"{self.name}_episode_{episode_number}.pkl")
         
         try:
             with open(filename, 'rb') as f:
                 loaded_q = pickle.load(f)
                 
-                # Convert loaded dict back to our defaultdict structure
-                self.q_table = defaultdict(lambda: defaultdict(lambda: 0))
-                for state, actions in loaded_q.items():
-                    for action, value in actions.items():
-                        self.q_table[state][action] = value
+                # Convert loaded dict back to the dense table
+                self.q_table.load_dict(loaded_q)
             print(f"Q-table loaded for {self.name} from {filename}")
             return True
         except FileNotFoundError:
-            print(f"No Q-table found at {filename}")
+            print(f"No Q-table found for {self.name} at episode {episode_number}")
             return False
         
 
@@ -316,10 +438,7 @@ class AgentWalker():
         """
         Reset Q-values that have negative values to zero to encourage re-exploration.
         """
-        for state in self.q_table:
-            for action in self.q_table[state]:
-                if self.q_table[state][action] < 0:
-                    self.q_table[state][action] = 0
+        self.q_table.reset_negative()
 
     def update_exploration_rate(self, exploration_rate):
         """
@@ -3,6 +3,12 @@ import random
 import time
 
 SAVE_EPISODES = 50
+# set to False to silence the per episode logs, i.e. when training headless
+VERBOSE = True
+# set to False to stop saving the q_tables every SAVE_EPISODES episodes, i.e. during a sweep
+SAVE_Q_TABLES = True
+# placements of the agents at the start of an episode, cycled through in this order
+RESET_SCHEDULE = ("corners", "same_side", "far_apart", "random")
 
 def calculate_reward(agent, target_agent):
     """
@@ -43,8 +49,8 @@ def calculate_reward(agent, target_agent):
     
     # Calculate movement reward (reward moving toward target)
     movement_reward = 0
-    if len(agent.positions) > 1:
-        old_pos = agent.positions[-2]
+    if len(agent.trail) > 1:
+        old_pos = agent.trail.last(2)[0]
         old_distance = ((old_pos[0] - target_agent.x)**2 + (old_pos[1] - target_agent.y)**2)**0.5
         # Reward or penalize based on whether agent is moving closer or farther
         distance_delta = old_distance - distance
@@ -61,7 +67,7 @@ def calculate_reward(agent, target_agent):
     total_reward = base_reward + proximity_reward + movement_reward + boundary_penalty + repetition_penalty
     
     # Print detailed reward components occasionally for debugging
-    if random.random() < 0.005:  # Only print 0.5% of the time to avoid flooding console
+    if VERBOSE and random.random() < 0.005:  # Only print 0.5% of the time to avoid flooding console
         print(f"{agent.name} reward components: base={base_reward:.1f}, proximity={proximity_reward}, " 
               f"movement={movement_reward:.1f}, boundary={boundary_penalty}, repetition={repetition_penalty}")
     
@@ -96,10 +102,10 @@ def choose_agent_action_reward(agents):
         # Update Q-table
         agent.update_q_table(current_state, action, reward, next_state)
 
-def reset_episode(distance, agents, agent_one, agent_two, start_time, episode_steps, episode_count, episode_resets, WIDTH, HEIGHT):
+def reset_episode(distance, agents, agent_one, agent_two, start_time, episode_steps, episode_count, episode_resets, WIDTH, HEIGHT, max_steps = None, schedule = RESET_SCHEDULE):
     """
     Checks if the condition for ending the episode is met, which is agents in neighboorhoud cells
-    or timeout (more than 100s passed).
+    or timeout (more than max_steps steps, or more than 100s passed if max_steps is None).
 
     Args:
         - distance (float) : distance between the two agents.
@@ -109,12 +115,14 @@ def reset_episode(distance, agents, agent_one, agent_two, start_time, episode_st
         - start_time (int) : the starting second of the episode.
         - WIDTH (int) : width of the map.
         - HEIGHT (int) : height of the map.
+        - max_steps (int) : maximum number of steps of an episode.
+        - schedule (tuple) : placements cycled through at every new episode.
 
-    If one of the condition is met to end the episode, four things can happen:
-        - agents are placed at opposite corners
-        - agents are placed at the same size but far part
-        - agents are placed randomly with a minimum distance
-        - agents are placed completely random
+    If one of the condition is met to end the episode, the next placement of the schedule is used:
+        - "corners" : agents are placed at opposite corners
+        - "same_side" : agents are placed at the same size but far part
+        - "far_apart" : agents are placed randomly with a minimum distance
+        - "random" : agents are placed completely random
 
     After this, the q_table might get saved to be used in other simulations.
     Finally, counters are incremented or resetted.
@@ -125,19 +133,26 @@ def reset_episode(distance, agents, agent_one, agent_two, start_time, episode_st
         - episode_reset (int) : used to reset the exploration_rate. 
         - start_time (int) : resetted start timer.
     """
-    if distance <= 10 or time.time() - start_time > 100:
-        print(f"End of episode {episode_count}, current exploration rate: {agent_one.exploration_rate}, time elapsed: {time.time() - start_time}")
+    if max_steps is not None:
+        timeout = episode_steps >= max_steps
+    else:
+        timeout = time.time() - start_time > 100
+
+    if distance <= 10 or timeout:
+        if VERBOSE:
+            print(f"End of episode {episode_count}, current exploration rate: {agent_one.exploration_rate}, time elapsed: {time.time() - start_time}")
         # Instead of completely random positions, consider placing them at opposite corners
         # or at specific distances to encourage learning different scenarios
-        if episode_count % 4 == 0:
+        placement = schedule[episode_count % len(schedule)]
+        if placement == "corners":
             # Place at opposite corners
             agent_one.x, agent_one.y = 50, 50
             agent_two.x, agent_two.y = WIDTH-50, HEIGHT-50
-        elif episode_count % 4 == 1:
+        elif placement == "same_side":
             # Place at same side but far apart
             agent_one.x, agent_one.y = 50, 50
             agent_two.x, agent_two.y = WIDTH-50, 50
-        elif episode_count % 4 == 2:
+        elif placement == "far_apart":
             # Random but with minimum distance
             while True:
                 agent_one.x, agent_one.y = random.randint(50, WIDTH-50), random.randint(50, HEIGHT-50)
@@ -149,14 +164,15 @@ def reset_episode(distance, agents, agent_one, agent_two, start_time, episode_st
             agent_one.x, agent_one.y = random.randint(50, WIDTH-50), random.randint(50, HEIGHT-50)
             agent_two.x, agent_two.y = random.randint(50, WIDTH-50), random.randint(50, HEIGHT-50)
 
-        if (episode_count % SAVE_EPISODES) == 0:
+        if SAVE_Q_TABLES and (episode_count % SAVE_EPISODES) == 0:
             for agent in agents:
                 agent.save_q_table(episode_count)
 
         for agent in agents:
             agent.update_reward_history(agent.current_reward, episode_steps)
             avg_reward = agent.current_reward / episode_steps if episode_steps > 0 else 0
-            print(f"{agent.name} AVG REWARD {avg_reward}, EPISODE STEPS: {episode_steps}")
+            if VERBOSE:
+                print(f"{agent.name} AVG REWARD {avg_reward}, EPISODE STEPS: {episode_steps}")
 
         episode_steps = 0
         episode_count += 1
@@ -0,0 +1,336 @@
+import time
+import numpy as np
+import agentWalker
+import agents_utils as au
+from q_table import DenseQTable
+from action_history import BatchedActionHistory
+
+# negative Q-values are reset every this many episodes, like in the single pair training
+PARTIAL_RESET_EPISODES = 15
+
+
+def move_agents(x, y, dx, dy, agent_width, agent_height, width, height):
+    """
+    Vectorized AgentWalker.move, moves the agents in place and clamps them back inside the map.
+
+    Returns the mask of the agents that hit a boundary.
+    """
+    x += dx * agent_width
+    y += dy * agent_height
+
+    out_left = x < 0
+    out_right = x > width
+    out_top = y < 0
+    out_bottom = y > height
+    x[out_left] = 0
+    x[out_right] = width - agent_width
+    y[out_top] = 0
+    y[out_bottom] = height - agent_height
+    return out_left | out_right | out_top | out_bottom
+
+
+class BatchedRendezvousEnv():
+    """
+    Runs many independent pairs of agents at once, all the positions, states, rewards and
+    boundary hits are NumPy arrays with shape (num_pairs, 2), index 0 is the first agent
+    of the pair and index 1 the second one.
+
+    The Q-values live in a single DenseQTable whose states are prefixed by a table index:
+        - shared_q_table = True -> two tables, one for the first agents and one for the second agents
+          of all the pairs, like the two AgentWalker of the single pair training.
+        - shared_q_table = False -> two tables per pair.
+    When several pairs update the same entry of a shared table in the same step, the last write wins.
+    """
+    def __init__(self, num_pairs, width, height, agent_width, agent_height, learning_rate, discount_factor,
+                 exploration_rate, exploration_decay, max_episode_steps, shared_q_table = True, seed = None, telemetry = None,
+                 reset_schedule = au.RESET_SCHEDULE):
+        self.num_pairs = num_pairs
+        self.width = width
+        self.height = height
+        self.agent_width = agent_width
+        self.agent_height = agent_height
+        self.learning_rate = learning_rate
+        self.discount_factor = discount_factor
+        self.initial_exploration_rate = exploration_rate
+        self.exploration_decay = exploration_decay
+        self.max_episode_steps = max_episode_steps
+        self.shared_q_table = shared_q_table
+        self.reset_schedule = reset_schedule
+        self.rng = np.random.default_rng(seed)
+        # optional TelemetrySink receiving the metrics of every episode, agent i of pair p is recorded as agent 2p + i
+        self.telemetry = telemetry
+
+        # possible movements of agents
+        self.actions = list(agentWalker.ACTIONS)
+        self.action_dx = np.array([a[0] for a in self.actions])
+        self.action_dy = np.array([a[1] for a in self.actions])
+
+        # Q-tables
+        self.state_shape = agentWalker.get_state_shape((width, height))
+        if shared_q_table:
+            num_tables = 2
+            self.table_index = np.tile(np.arange(2), (num_pairs, 1))
+        else:
+            num_tables = 2 * num_pairs
+            self.table_index = np.arange(num_tables).reshape(num_pairs, 2)
+        self.q_table = DenseQTable((num_tables,) + self.state_shape, self.actions)
+        self.state_encoder = agentWalker.get_state_encoder((width, height))
+        # id of the first state of the table of every agent
+        self.table_offsets = self.table_index * int(np.prod(self.state_shape))
+
+        # agents
+        self.x = np.zeros((num_pairs, 2))
+        self.y = np.zeros((num_pairs, 2))
+        self.prev_x = np.zeros((num_pairs, 2))
+        self.prev_y = np.zeros((num_pairs, 2))
+        self.hit_boundary = np.zeros((num_pairs, 2), dtype=bool)
+        self.exploration_rate = np.full((num_pairs, 2), float(exploration_rate))
+        self.current_reward = np.zeros((num_pairs, 2))
+        self.action_history = BatchedActionHistory((num_pairs, 2), self.actions)
+
+        # episodes
+        self.episode_count = np.zeros(num_pairs, dtype=np.int64)
+        self.episode_steps = np.zeros(num_pairs, dtype=np.int64)
+        self.episode_resets = np.zeros(num_pairs, dtype=np.int64)
+        self.finished_since_reset = 0
+        self.episode_rewards = np.zeros((num_pairs, 2))
+        self.episode_start = np.full(num_pairs, time.perf_counter())
+        self.decay_timer = 0
+
+        # steps taken by the pairs that ended an episode in the last step
+        self.finished_steps = np.zeros(0, dtype=np.int64)
+
+        self.reset_pairs(np.arange(num_pairs))
+
+    def total_episodes(self):
+        """
+        Returns the number of episodes played by all the pairs.
+        """
+        return int(self.episode_count.sum())
+
+    def reset_pairs(self, pairs):
+        """
+        Places the agents of the given pairs for a new episode, following the same schedule
+        as agents_utils.reset_episode.
+        """
+        placements = np.array(self.reset_schedule)[self.episode_count[pairs] % len(self.reset_schedule)]
+        width, height = self.width, self.height
+
+        # Place at opposite corners
+        corners = pairs[placements == "corners"]
+        self.place(corners, 0, 50, 50)
+        self.place(corners, 1, width - 50, height - 50)
+
+        # Place at same side but far apart
+        same_side = pairs[placements == "same_side"]
+        self.place(same_side, 0, 50, 50)
+        self.place(same_side, 1, width - 50, 50)
+
+        # Random but with minimum distance
+        far_apart = pairs[placements == "far_apart"]
+        while len(far_apart) > 0:
+            self.place_randomly(far_apart)
+            distance = np.sqrt((self.x[far_apart, 0] - self.x[far_apart, 1])**2 + (self.y[far_apart, 0] - self.y[far_apart, 1])**2)
+            far_apart = far_apart[distance <= width / 2]
+
+        # Completely random
+        self.place_randomly(pairs[~np.isin(placements, ("corners", "same_side", "far_apart"))])
+
+    def place(self, pairs, agent, x, y):
+        self.x[pairs, agent] = x
+        self.y[pairs, agent] = y
+
+    def place_randomly(self, pairs):
+        n = len(pairs)
+        self.x[pairs] = self.rng.integers(50, self.width - 50, (n, 2), endpoint=True)
+        self.y[pairs] = self.rng.integers(50, self.height - 50, (n, 2), endpoint=True)
+
+    def get_state_ids(self):
+        """
+        Returns the (num_pairs, 2) ids of the states of all the agents, each agent targets the other one of its pair.
+        """
+        return self.table_offsets + self.state_encoder.encode_ids(self.x, self.y, self.x[:, ::-1], self.y[:, ::-1])
+
+    def choose_actions(self, state_ids):
+        """
+        Chooses the action of every agent between exploration and exploitation.
+
+        Returns the (num_pairs, 2) action indices.
+        """
+        shape = state_ids.shape
+        random_actions = self.rng.integers(0, len(self.actions), shape)
+        best_actions = self.q_table.best_actions(state_ids.ravel(), self.rng).reshape(shape)
+
+        # EXPLORATION, never reached states or 50% chance to break a repetitive pattern
+        explore = self.rng.random(shape) < self.exploration_rate
+        explore |= ~self.q_table.visited[state_ids].any(axis=-1)
+        explore |= self.action_history.repetitive & (self.rng.random(shape) < 0.5)
+
+        return np.where(explore, random_actions, best_actions)
+
+    def move(self, actions):
+        """
+        Moves all the agents and clamps them back inside the map.
+        """
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+        self.hit_boundary = move_agents(self.x, self.y, self.action_dx[actions], self.action_dy[actions],
+                                        self.agent_width, self.agent_height, self.width, self.height)
+
+        self.action_history.push(actions)
+
+    def calculate_rewards(self):
+        """
+        Vectorized agents_utils.calculate_reward, returns the (num_pairs, 2) rewards.
+        """
+        target_x = self.x[:, ::-1]
+        target_y = self.y[:, ::-1]
+        distance = np.sqrt((self.x - target_x)**2 + (self.y - target_y)**2)
+
+        max_reward = 100
+        base_reward = max_reward * np.exp(-distance / 100)
+
+        proximity_reward = np.select([distance <= 20, distance < 30, distance < 50], [50, 30, 15], 0)
+
+        old_distance = np.sqrt((self.prev_x - target_x)**2 + (self.prev_y - target_y)**2)
+        movement_reward = 20 * (old_distance - distance) / (distance + 1)
+
+        boundary_penalty = np.where(self.hit_boundary, -30, 0)
+        repetition_penalty = np.where(self.action_history.repetitive, -20, 0)
+
+        return base_reward + proximity_reward + movement_reward + boundary_penalty + repetition_penalty
+
+    def update_q_table(self, state_ids, actions, rewards, next_state_ids):
+        """
+        Q-learning update of every agent in one batched operation.
+        """
+        state_ids = state_ids.ravel()
+        actions = actions.ravel()
+        current_q = self.q_table.values[state_ids, actions]
+        best_next_q = self.q_table.max_values(next_state_ids.ravel())
+        self.q_table.values[state_ids, actions] = current_q + self.learning_rate * (
+            rewards.ravel() + self.discount_factor * best_next_q - current_q
+        )
+        self.q_table.visited[state_ids, actions] = True
+
+    def decay_exploration(self):
+        """
+        Decays the exploration rate of all the agents, pairs past their 50th episode have no minimum anymore.
+        """
+        decayed = self.exploration_rate * self.exploration_decay
+        no_minimum = (self.episode_count > 50)[:, None]
+        self.exploration_rate = np.where(no_minimum, decayed, np.maximum(0.1, decayed))
+
+    def partial_reset_q_table(self, finished):
+        """
+        Resets the negative Q-values of the tables every PARTIAL_RESET_EPISODES episodes of the pairs using them.
+        """
+        if self.shared_q_table:
+            self.finished_since_reset += len(finished)
+            if self.finished_since_reset >= PARTIAL_RESET_EPISODES * self.num_pairs:
+                self.q_table.reset_negative()
+                self.finished_since_reset = 0
+        else:
+            pairs = finished[self.episode_count[finished] % PARTIAL_RESET_EPISODES == 0]
+            if len(pairs) > 0:
+                values = self.q_table.values.reshape((-1, int(np.prod(self.state_shape)), len(self.actions)))
+                tables = self.table_index[pairs].ravel()
+                values[tables] = np.maximum(values[tables], 0)
+
+    def step(self):
+        """
+        Plays one step of every pair.
+
+        Returns the indices of the pairs which ended their episode in this step.
+        """
+        state_ids = self.get_state_ids()
+        actions = self.choose_actions(state_ids)
+        self.move(actions)
+
+        next_state_ids = self.get_state_ids()
+        rewards = self.calculate_rewards()
+        self.current_reward = rewards
+        self.episode_rewards += rewards
+        self.update_q_table(state_ids, actions, rewards, next_state_ids)
+
+        if self.decay_timer == 50:
+            self.decay_exploration()
+            self.decay_timer = 0
+        self.decay_timer += 1
+        self.episode_steps += 1
+
+        # Check if agents have found each other or ran out of steps
+        distance = np.sqrt((self.x[:, 0] - self.x[:, 1])**2 + (self.y[:, 0] - self.y[:, 1])**2)
+        finished = np.flatnonzero((distance <= 10) | (self.episode_steps >= self.max_episode_steps))
+        self.finished_steps = self.episode_steps[finished].copy()
+
+        if len(finished) > 0:
+            self.end_episodes(finished)
+            self.reset_pairs(finished)
+            self.episode_steps[finished] = 0
+            self.episode_count[finished] += 1
+            self.episode_resets[finished] += 1
+            self.partial_reset_q_table(finished)
+
+        # Go into exploration mode again, only during the first 100 episodes
+        explore_again = (self.episode_resets > 15) & (self.episode_count < 100) & (self.rng.random(self.num_pairs) < 0.005)
+        if explore_again.any():
+            agents = explore_again[:, None] & (self.rng.random((self.num_pairs, 2)) < 0.5)
+            self.exploration_rate[agents] = self.initial_exploration_rate
+            self.episode_resets[explore_again] = 0
+
+        return finished
+
+    def end_episodes(self, finished):
+        """
+        Records the metrics of the pairs that just ended their episode and resets their rewards.
+        """
+        if self.telemetry is not None:
+            now = time.perf_counter()
+            steps = self.episode_steps[finished]
+            steps_per_second = steps / np.maximum(now - self.episode_start[finished], 1e-9)
+            tables = self.table_index[finished]
+            visited = self.q_table.visited.reshape((-1, int(np.prod(self.state_shape)), len(self.actions)))
+            # a shared table is counted only once, whatever the number of pairs using it
+            unique_tables, inverse = np.unique(tables, return_inverse=True)
+            q_table_size = np.count_nonzero(visited[unique_tables].any(axis=-1), axis=-1)[inverse].reshape(tables.shape)
+            agents = 2 * finished[:, None] + np.arange(2)
+            self.telemetry.record_batch(self.episode_count[finished, None], agents, steps[:, None], self.episode_rewards[finished],
+                                        self.exploration_rate[finished], q_table_size, steps_per_second[:, None])
+            self.episode_start[finished] = now
+        self.episode_rewards[finished] = 0
+
+    def get_q_table(self, table):
+        """
+        Returns a copy of one of the tables as a DenseQTable with the states of a single AgentWalker.
+        """
+        table_size = int(np.prod(self.state_shape))
+        rows = slice(table * table_size, (table + 1) * table_size)
+        q_table = DenseQTable(self.state_shape, self.actions)
+        q_table.values[:] = self.q_table.values[rows]
+        q_table.visited[:] = self.q_table.visited[rows]
+        return q_table
+
+    def save_q_tables(self, episode):
+        """
+        Saves a checkpoint of every table in the same directories as AgentWalker.save_q_table:
+        shared tables are saved as "Agent 1" and "Agent 2", so they can be loaded by the agents
+        of the single pair simulation, per pair tables as "Agent 1 pair <p>" and "Agent 2 pair <p>".
+
+        Args:
+            - episode (int) : episode of the checkpoint, i.e. the episodes played by all the pairs.
+
+        Returns the number of rows written.
+        """
+        rows = 0
+        for table in range(int(self.table_index.max()) + 1):
+            pair, agent = divmod(table, 2)
+            name = f"Agent {agent + 1}" if self.shared_q_table else f"Agent {agent + 1} pair {pair}"
+            # the index stores the exploration rate and reward of the agents using the table
+            using = self.table_index == table
+            checkpoints = agentWalker.get_checkpoints(name, self.state_shape)
+            rows += checkpoints.save(self.get_q_table(table), episode, float(self.exploration_rate[using].mean()),
+                                     float(self.current_reward[using].mean()))
+        if au.VERBOSE:
+            print(f"Q-tables saved at episode {episode}, {rows} rows changed")
+        return rows
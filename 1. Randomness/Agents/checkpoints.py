@@ -0,0 +1,171 @@
+import csv
+import io
+import os
+import numpy as np
+
+INDEX_COLUMNS = ["episode", "exploration_rate", "reward", "rows", "file"]
+# rows compared at once when looking for the changed rows, bounds the temporary memory
+CHUNK_ROWS = 1 << 16
+
+
+def fsync_path(path):
+    """
+    Forces the content of a file to the disk.
+    """
+    with open(path, "r+b") as f:
+        os.fsync(f.fileno())
+
+
+class QTableCheckpoints():
+    """
+    Incremental checkpoints of a Q-table, stored in a directory as:
+        - values.npy, visited.npy (and the other checkpoint_arrays of the table) : the table at the
+          last checkpoint, updated in place and loaded back as a memory map, without reading the whole file.
+        - episode_<n>.npz : only the rows changed since the previous checkpoint, so that
+          any checkpointed episode can be rebuilt.
+        - index.csv : episode, exploration rate, reward and number of changed rows of every checkpoint.
+
+    The arrays are on the disk before their row is appended to the index, and a partial last row
+    left by a crash during the append is ignored, then overwritten by the next checkpoint.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.csv")
+
+    def array_path(self, name):
+        return os.path.join(self.directory, f"{name}.npy")
+
+    def complete_index(self):
+        """
+        Returns the content of the index up to its last complete line, without a partial last row.
+        """
+        if not os.path.exists(self.index_path):
+            return b""
+        with open(self.index_path, "rb") as f:
+            content = f.read()
+        return content[:content.rfind(b"\n") + 1]
+
+    def index(self):
+        """
+        Returns the rows of the index, oldest checkpoint first.
+        """
+        content = io.StringIO(self.complete_index().decode(), newline="")
+        return [{"episode": int(row["episode"]), "exploration_rate": float(row["exploration_rate"]),
+                 "reward": float(row["reward"]), "rows": int(row["rows"]), "file": row["file"]}
+                for row in csv.DictReader(content)]
+
+    def latest_episode(self):
+        """
+        Returns the episode of the last checkpoint, None if there is none.
+        """
+        index = self.index()
+        return index[-1]["episode"] if index else None
+
+    def open_latest(self, q_table):
+        """
+        Opens the arrays of the last checkpoint for writing, creating empty ones the first time.
+        """
+        arrays = q_table.checkpoint_arrays()
+        latest = {}
+        for name, array in arrays.items():
+            path = self.array_path(name)
+            if not os.path.exists(path):
+                os.makedirs(self.directory, exist_ok=True)
+                np.lib.format.open_memmap(path, mode="w+", dtype=array.dtype, shape=array.shape).flush()
+            latest[name] = np.load(path, mmap_mode="r+")
+        self.check_shapes(latest, arrays)
+        return latest
+
+    @staticmethod
+    def check_shapes(saved, arrays):
+        for name, array in arrays.items():
+            if saved[name].shape != array.shape:
+                raise ValueError(f"checkpoint {name} has shape {saved[name].shape}, expected {array.shape}")
+
+    def save(self, q_table, episode, exploration_rate = 0.0, reward = 0.0):
+        """
+        Saves the rows of the table changed since the last checkpoint.
+
+        Args:
+            - q_table (QTable) : table to save.
+            - episode (int) : episode of the checkpoint.
+            - exploration_rate (float) : exploration rate of the agent, stored in the index.
+            - reward (float) : reward of the agent, stored in the index.
+
+        Returns the number of rows written.
+        """
+        arrays = q_table.checkpoint_arrays()
+        latest = self.open_latest(q_table)
+
+        changed = []
+        num_rows = len(arrays["values"])
+        for start in range(0, num_rows, CHUNK_ROWS):
+            rows = slice(start, start + CHUNK_ROWS)
+            different = np.zeros(len(arrays["values"][rows]), dtype=bool)
+            for name, array in arrays.items():
+                difference = array[rows] != latest[name][rows]
+                different |= difference.reshape(len(difference), -1).any(axis=1)
+            changed.append(np.flatnonzero(different) + start)
+        changed = np.concatenate(changed)
+
+        filename = f"episode_{episode}.npz"
+        with open(os.path.join(self.directory, filename), "wb") as f:
+            np.savez(f, rows=changed, **{name: array[changed] for name, array in arrays.items()})
+            f.flush()
+            os.fsync(f.fileno())
+
+        for name, array in arrays.items():
+            latest[name][changed] = array[changed]
+            latest[name].flush()
+        for name in arrays:
+            fsync_path(self.array_path(name))
+
+        # the index is written last, a checkpoint exists only once its row is complete
+        complete = self.complete_index()
+        with open(self.index_path, "a", newline="") as f:
+            # drops the partial row of an interrupted checkpoint
+            f.truncate(len(complete))
+            writer = csv.DictWriter(f, fieldnames=INDEX_COLUMNS)
+            if not complete:
+                writer.writeheader()
+            writer.writerow({"episode": episode, "exploration_rate": exploration_rate, "reward": reward,
+                             "rows": len(changed), "file": filename})
+            f.flush()
+            os.fsync(f.fileno())
+        return len(changed)
+
+    def load(self, q_table, episode = None):
+        """
+        Loads a checkpoint into the table.
+
+        Args:
+            - q_table (QTable) : table to fill.
+            - episode (int) : episode to load, the last checkpoint if None.
+
+        The last checkpoint is memory mapped copy-on-write, so only the rows that are read are loaded
+        and the updates of the training never touch the files. Older episodes are rebuilt by
+        applying the changed rows of every checkpoint up to the requested one.
+
+        Returns True if the checkpoint was found.
+        """
+        index = self.index()
+        if not index:
+            return False
+
+        if episode is None or episode == index[-1]["episode"]:
+            arrays = {name: np.load(self.array_path(name), mmap_mode="c") for name in q_table.checkpoint_arrays()}
+            self.check_shapes(arrays, q_table.checkpoint_arrays())
+            q_table.load_checkpoint_arrays(arrays)
+            return True
+
+        episodes = [row["episode"] for row in index]
+        if episode not in episodes:
+            return False
+
+        arrays = {name: np.zeros_like(array) for name, array in q_table.checkpoint_arrays().items()}
+        for row in index[:episodes.index(episode) + 1]:
+            with np.load(os.path.join(self.directory, row["file"])) as delta:
+                for name, array in arrays.items():
+                    array[delta["rows"]] = delta[name]
+        q_table.load_checkpoint_arrays(arrays)
+        return True
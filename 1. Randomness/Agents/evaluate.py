@@ -0,0 +1,204 @@
+import argparse
+import os
+import time
+import numpy as np
+import pygame
+from multiprocessing import Pool
+import agentWalker
+import agentsWalk
+import trainer
+from action_history import BatchedActionHistory
+from batched_env import move_agents
+
+# side of the cells of the heatmap, in pixels
+HEATMAP_CELL = 20
+EVALUATION_DIR = "evaluation"
+CHUNK_PAIRS = 512
+
+# tables of the worker processes, set once by init_worker
+tables = None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Greedy evaluation of saved Q-tables over many start positions.")
+    parser.add_argument("--episode", type=int, default=None, help="episode of the checkpoint to evaluate, the last one by default")
+    parser.add_argument("--partners", type=int, default=8, help="number of random starts of the second agent for every cell of the first one")
+    parser.add_argument("--max-steps", type=int, default=agentsWalk.MAX_EPISODE_STEPS, help="maximum number of steps of a rollout")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of processes, defaults to all the cores")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the start positions and of the rollouts")
+    parser.add_argument("--out", default=EVALUATION_DIR, help="directory of the heatmap array and image")
+    return parser.parse_args()
+
+
+def load_tables(episode):
+    """
+    Loads the Q-tables of both agents.
+
+    Args:
+        - episode (int) : episode of the checkpoint, the last one if None.
+
+    Returns:
+        - masked (np.array) : (2, num_states, num_actions) values, -inf for the actions never visited.
+        - known (np.array) : (2, num_states) True for the states reached during the training.
+    """
+    masked = []
+    known = []
+    for name, color in [("Agent 1", trainer.AGENT_ONE_COLOR), ("Agent 2", trainer.AGENT_TWO_COLOR)]:
+        agent = agentWalker.AgentWalker(0, 0, color, name, agentsWalk.AGENT_WIDTH, agentsWalk.AGENT_HEIGHT,
+                                        (agentsWalk.WIDTH, agentsWalk.HEIGHT), 0, agentsWalk.DISCOUNT_FACTOR, agentsWalk.LEARNING_RATE)
+        if not agent.load_q_table(episode):
+            if episode is None:
+                raise FileNotFoundError(f"no Q-table saved for {name} in {agentWalker.Q_TABLES_DIR}, train the agents or pass --episode")
+            raise FileNotFoundError(f"no Q-table saved for {name} at episode {episode}")
+        state_ids = np.arange(agent.q_table.num_states)
+        masked.append(agent.q_table.masked_values(state_ids))
+        known.append(~np.isneginf(masked[-1]).all(axis=1))
+    return np.stack(masked), np.stack(known)
+
+
+def init_worker(worker_tables):
+    global tables
+    tables = worker_tables
+
+
+def rollout(starts, seed, max_steps):
+    """
+    Plays greedy rollouts of the agents, without exploration and without learning, like AgentWalker.choose_action
+    with an exploration rate of 0: states never reached and 50% of the repetitive patterns get a random action.
+
+    Args:
+        - starts (np.array) : (N, 4) start positions x1, y1, x2, y2.
+        - seed (int) : seed of the random actions.
+        - max_steps (int) : maximum number of steps of a rollout.
+
+    Returns the number of steps needed to meet, -1 if the agents didn't meet.
+    """
+    masked, known = tables
+    rng = np.random.default_rng(seed)
+    num_pairs = len(starts)
+    encoder = agentWalker.get_state_encoder((agentsWalk.WIDTH, agentsWalk.HEIGHT))
+    actions_dx = np.array([a[0] for a in agentWalker.ACTIONS])
+    actions_dy = np.array([a[1] for a in agentWalker.ACTIONS])
+    history = BatchedActionHistory((num_pairs, 2), agentWalker.ACTIONS)
+    agent_tables = np.arange(2)
+
+    x = starts[:, [0, 2]].astype(float)
+    y = starts[:, [1, 3]].astype(float)
+    steps_to_meet = np.full(num_pairs, -1)
+    active = np.ones(num_pairs, dtype=bool)
+
+    for step in range(1, max_steps + 1):
+        state_ids = encoder.encode_ids(x, y, x[:, ::-1], y[:, ::-1])
+        values = masked[agent_tables, state_ids]
+        is_best = values == values.max(axis=-1, keepdims=True)
+        best_actions = np.argmax(rng.random(values.shape) * is_best, axis=-1)
+
+        random_actions = rng.integers(0, len(agentWalker.ACTIONS), (num_pairs, 2))
+        use_random = ~known[agent_tables, state_ids] | (history.repetitive & (rng.random((num_pairs, 2)) < 0.5))
+        actions = np.where(use_random, random_actions, best_actions)
+
+        # the pairs which already met don't move anymore
+        moving = active[:, None]
+        move_agents(x, y, actions_dx[actions] * moving, actions_dy[actions] * moving,
+                    agentsWalk.AGENT_WIDTH, agentsWalk.AGENT_HEIGHT, agentsWalk.WIDTH, agentsWalk.HEIGHT)
+        history.push(actions)
+
+        distance = np.sqrt((x[:, 0] - x[:, 1])**2 + (y[:, 0] - y[:, 1])**2)
+        met = active & (distance <= 10)
+        steps_to_meet[met] = step
+        active &= ~met
+        if not active.any():
+            break
+
+    return steps_to_meet
+
+
+def rollout_star(arguments):
+    return rollout(*arguments)
+
+
+def start_positions(partners, seed):
+    """
+    Returns the start positions: the first agent starts in every cell of the heatmap, each time
+    with partners random positions of the second agent, and the cell of every start.
+    """
+    rng = np.random.default_rng(seed)
+    cells_x = agentsWalk.WIDTH // HEATMAP_CELL
+    cells_y = agentsWalk.HEIGHT // HEATMAP_CELL
+    cell_x, cell_y = np.meshgrid(np.arange(cells_x), np.arange(cells_y), indexing="ij")
+    cell_x = np.repeat(cell_x.ravel(), partners)
+    cell_y = np.repeat(cell_y.ravel(), partners)
+
+    num_pairs = len(cell_x)
+    starts = np.stack([cell_x * HEATMAP_CELL + rng.integers(0, HEATMAP_CELL, num_pairs),
+                       cell_y * HEATMAP_CELL + rng.integers(0, HEATMAP_CELL, num_pairs),
+                       rng.integers(0, agentsWalk.WIDTH, num_pairs),
+                       rng.integers(0, agentsWalk.HEIGHT, num_pairs)], axis=1)
+    return starts, cell_x, cell_y
+
+
+def evaluate(episode = None, partners = 8, max_steps = agentsWalk.MAX_EPISODE_STEPS, workers = 1, seed = 0):
+    """
+    Evaluates the saved Q-tables with greedy rollouts spread over a pool of processes.
+
+    Args:
+        - episode (int) : episode of the checkpoint, the last one if None.
+        - partners (int) : random starts of the second agent for every cell of the first one.
+        - max_steps (int) : maximum number of steps of a rollout.
+        - workers (int) : number of processes.
+        - seed (int) : seed of the start positions and of the rollouts.
+
+    Returns:
+        - success_rate (np.array) : rate of rollouts where the agents met, for every start cell of the first agent.
+        - mean_steps (np.array) : mean steps to meet of the successful rollouts, nan if none.
+    """
+    # loaded once here, so that a missing checkpoint fails before starting the workers
+    worker_tables = load_tables(episode)
+    starts, cell_x, cell_y = start_positions(partners, seed)
+    chunks = [(starts[i:i + CHUNK_PAIRS], seed + i, max_steps) for i in range(0, len(starts), CHUNK_PAIRS)]
+    with Pool(workers, initializer=init_worker, initargs=(worker_tables,)) as pool:
+        steps_to_meet = np.concatenate(pool.map(rollout_star, chunks))
+
+    shape = (agentsWalk.WIDTH // HEATMAP_CELL, agentsWalk.HEIGHT // HEATMAP_CELL)
+    success = steps_to_meet >= 0
+    attempts = np.zeros(shape)
+    successes = np.zeros(shape)
+    total_steps = np.zeros(shape)
+    np.add.at(attempts, (cell_x, cell_y), 1)
+    np.add.at(successes, (cell_x, cell_y), success)
+    np.add.at(total_steps, (cell_x, cell_y), np.where(success, steps_to_meet, 0))
+
+    success_rate = successes / attempts
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_steps = np.where(successes > 0, total_steps / successes, np.nan)
+    return success_rate, mean_steps
+
+
+def save_heatmap(success_rate, mean_steps, out_dir):
+    """
+    Saves the heatmaps as an .npz array and as an image of the size of the board,
+    from red (never met) to green (always met).
+
+    Returns the paths of the array and of the image.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    array_path = os.path.join(out_dir, "heatmap.npz")
+    np.savez(array_path, success_rate=success_rate, mean_steps=mean_steps, cell_size=HEATMAP_CELL)
+
+    colors = np.zeros(success_rate.shape + (3,), dtype=np.uint8)
+    colors[..., 0] = (255 * (1 - success_rate)).astype(np.uint8)
+    colors[..., 1] = (255 * success_rate).astype(np.uint8)
+    surface = pygame.transform.scale(pygame.surfarray.make_surface(colors), (agentsWalk.WIDTH, agentsWalk.HEIGHT))
+    image_path = os.path.join(out_dir, "heatmap.png")
+    pygame.image.save(surface, image_path)
+    return array_path, image_path
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    start_time = time.time()
+    success_rate, mean_steps = evaluate(args.episode, args.partners, args.max_steps, args.workers, args.seed)
+    array_path, image_path = save_heatmap(success_rate, mean_steps, args.out)
+    print(f"{success_rate.size * args.partners} rollouts in {time.time() - start_time:.1f}s, "
+          f"success rate {success_rate.mean():.1%}, mean steps to meet {np.nanmean(mean_steps):.0f}")
+    print(f"Heatmap written to {array_path} and {image_path}")
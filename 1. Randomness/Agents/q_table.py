@@ -0,0 +1,293 @@
+import random
+import numpy as np
+
+# fraction of the states evicted at once when a SparseQTable is full, so that evicting is amortized O(1)
+EVICTION_FRACTION = 0.1
+# rough memory of an entry of the state id -> slot dictionary
+SLOT_INDEX_BYTES = 100
+
+
+class QTable():
+    """
+    Common part of the Q-tables, a state tuple is turned into an integer id like np.ravel_multi_index,
+    and actions are stored by their index in the actions list.
+
+    A visited mask keeps the semantics of the old dictionary table: only the actions that were updated
+    at least once are taken into account when looking for the best action.
+    The subclasses store the rows and define masked_values, is_visited, get, set and the checkpoint arrays.
+    """
+    def __init__(self, state_shape, actions):
+        self.state_shape = tuple(state_shape)
+        self.actions = list(actions)
+        self.action_index = {action: i for i, action in enumerate(self.actions)}
+
+        # strides used to turn a state tuple into its id, like np.ravel_multi_index
+        self.strides = np.array([int(np.prod(self.state_shape[i + 1:])) for i in range(len(self.state_shape))])
+        self.num_states = int(np.prod(self.state_shape))
+
+    def state_id(self, state):
+        """
+        Returns the id of a single state tuple.
+        """
+        state_id = 0
+        for value, stride in zip(state, self.strides):
+            state_id += int(value) * int(stride)
+        return state_id
+
+    def state_ids(self, states):
+        """
+        Returns the ids of an (N, len(state_shape)) array of states.
+        """
+        return np.ravel_multi_index(np.asarray(states, dtype=np.intp).T, self.state_shape)
+
+    def max_value(self, state_id):
+        """
+        Returns the best value of the state, 0 if the state was never visited.
+        """
+        if not self.is_visited(state_id):
+            return 0
+        return self.masked_values(state_id).max()
+
+    def max_values(self, state_ids):
+        """
+        Vectorized max_value.
+        """
+        best = self.masked_values(state_ids).max(axis=1)
+        return np.where(np.isneginf(best), 0, best)
+
+    def best_action(self, state_id):
+        """
+        Returns the index of the best action of the state, ties are broken randomly.
+        """
+        masked = self.masked_values(state_id)
+        best_actions = np.flatnonzero(masked == masked.max())
+        return int(random.choice(best_actions))
+
+    def best_actions(self, state_ids, rng):
+        """
+        Vectorized best_action, ties are broken randomly with the given np.random.Generator.
+        States never visited get a random action.
+        """
+        masked = self.masked_values(state_ids)
+        is_best = masked == masked.max(axis=1, keepdims=True)
+        # the random key is only non zero for the best actions, so argmax picks one of them at random
+        return np.argmax(rng.random(masked.shape) * is_best, axis=1)
+
+    def reset_negative(self):
+        """
+        Sets all the negative values to zero.
+        """
+        np.maximum(self.values, 0, out=self.values)
+
+    def load_dict(self, q_dict):
+        """
+        Fills the table from the {state: {action: value}} format of the saved pickles.
+        """
+        self.clear()
+        for state, actions in q_dict.items():
+            state_id = self.state_id(state)
+            for action, value in actions.items():
+                self.set(state_id, self.action_index[tuple(action)], value)
+
+
+class DenseQTable(QTable):
+    """
+    Q-table stored in a preallocated NumPy array, indexed by an integer state id and an action index.
+
+    The states returned by AgentWalker.get_state are bounded tuples, so every state can be mapped to
+    a row of the table.
+    """
+    def __init__(self, state_shape, actions):
+        super().__init__(state_shape, actions)
+        self.values = np.zeros((self.num_states, len(self.actions)))
+        self.visited = np.zeros((self.num_states, len(self.actions)), dtype=bool)
+
+    def __len__(self):
+        """
+        Returns the number of states with at least one visited action.
+        """
+        return int(np.count_nonzero(self.visited.any(axis=1)))
+
+    def clear(self):
+        self.values[:] = 0
+        self.visited[:] = False
+
+    def is_visited(self, state_id):
+        """
+        Returns True if at least one action of the state was updated.
+        """
+        return self.visited[state_id].any()
+
+    def get(self, state_id, action_idx):
+        return self.values[state_id, action_idx]
+
+    def set(self, state_id, action_idx, value):
+        self.values[state_id, action_idx] = value
+        self.visited[state_id, action_idx] = True
+
+    def masked_values(self, state_ids):
+        """
+        Returns the values of the given states with -inf for the actions never visited.
+        """
+        return np.where(self.visited[state_ids], self.values[state_ids], -np.inf)
+
+    def to_dict(self):
+        """
+        Converts the table to the {state: {action: value}} format of the saved pickles.
+        """
+        q_dict = {}
+        for state_id in np.flatnonzero(self.visited.any(axis=1)):
+            state = tuple(int(v) for v in np.unravel_index(state_id, self.state_shape))
+            q_dict[state] = {self.actions[a]: float(self.values[state_id, a]) for a in np.flatnonzero(self.visited[state_id])}
+        return q_dict
+
+    def checkpoint_arrays(self):
+        """
+        Returns the arrays saved by QTableCheckpoints, all indexed by row.
+        """
+        return {"values": self.values, "visited": self.visited}
+
+    def load_checkpoint_arrays(self, arrays):
+        self.values = arrays["values"]
+        self.visited = arrays["visited"]
+
+
+class SparseQTable(QTable):
+    """
+    Q-table holding at most max_states states, for state spaces too large to be preallocated.
+
+    The states get a slot (a row of the arrays) the first time one of their actions is updated,
+    and the number of updates of every slot is counted. When there is no free slot left, the
+    EVICTION_FRACTION least visited states are evicted at once and all the visit counts are halved,
+    so that states visited a lot a long time ago can be evicted too.
+    Bulk operations, like reset_negative, work on the arrays of the slots.
+    """
+    def __init__(self, state_shape, actions, max_states = None, memory_budget = None):
+        super().__init__(state_shape, actions)
+        if max_states is None:
+            if memory_budget is None:
+                raise ValueError("either max_states or memory_budget is expected")
+            max_states = int(memory_budget // self.bytes_per_state(len(self.actions)))
+        if max_states <= 0:
+            raise ValueError("the table must hold at least one state")
+
+        self.max_states = max_states
+        self.values = np.zeros((max_states, len(self.actions)))
+        self.visited = np.zeros((max_states, len(self.actions)), dtype=bool)
+        self.visits = np.zeros(max_states, dtype=np.int64)
+        self.states = np.full(max_states, -1, dtype=np.int64)
+
+        self.slots = {}
+        self.free_slots = list(range(max_states - 1, -1, -1))
+        self.evicted = 0
+
+    @staticmethod
+    def bytes_per_state(num_actions):
+        """
+        Returns the memory used by a state, to turn a memory budget into a number of states.
+        """
+        return num_actions * 9 + 16 + SLOT_INDEX_BYTES
+
+    def __len__(self):
+        """
+        Returns the number of states held by the table.
+        """
+        return len(self.slots)
+
+    def clear(self):
+        self.values[:] = 0
+        self.visited[:] = False
+        self.visits[:] = 0
+        self.states[:] = -1
+        self.slots = {}
+        self.free_slots = list(range(self.max_states - 1, -1, -1))
+
+    def slot(self, state_id):
+        """
+        Returns the slot of the state, allocating one and evicting if needed.
+        """
+        slot = self.slots.get(state_id)
+        if slot is None:
+            if not self.free_slots:
+                self.evict()
+            slot = self.free_slots.pop()
+            self.slots[state_id] = slot
+            self.states[slot] = state_id
+        return slot
+
+    def evict(self):
+        """
+        Frees the slots of the least visited states.
+        """
+        count = max(1, int(self.max_states * EVICTION_FRACTION))
+        evicted = np.argpartition(self.visits, count - 1)[:count]
+        for slot in evicted.tolist():
+            del self.slots[int(self.states[slot])]
+        self.values[evicted] = 0
+        self.visited[evicted] = False
+        self.visits[evicted] = 0
+        self.states[evicted] = -1
+        self.free_slots.extend(evicted.tolist())
+        self.visits //= 2
+        self.evicted += count
+
+    def rows(self, state_ids):
+        """
+        Returns the slots of the given states, -1 for the states not in the table.
+        """
+        if np.ndim(state_ids) == 0:
+            return self.slots.get(int(state_ids), -1)
+        get = self.slots.get
+        return np.array([get(state_id, -1) for state_id in np.asarray(state_ids).tolist()], dtype=np.intp)
+
+    def is_visited(self, state_id):
+        """
+        Returns True if at least one action of the state was updated.
+        """
+        return state_id in self.slots
+
+    def get(self, state_id, action_idx):
+        slot = self.slots.get(state_id)
+        return 0 if slot is None else self.values[slot, action_idx]
+
+    def set(self, state_id, action_idx, value):
+        slot = self.slot(state_id)
+        self.values[slot, action_idx] = value
+        self.visited[slot, action_idx] = True
+        self.visits[slot] += 1
+
+    def masked_values(self, state_ids):
+        """
+        Returns the values of the given states with -inf for the actions never visited
+        and for the states not in the table.
+        """
+        rows = self.rows(state_ids)
+        masked = np.where(self.visited[rows], self.values[rows], -np.inf)
+        masked[np.asarray(rows) < 0] = -np.inf
+        return masked
+
+    def to_dict(self):
+        """
+        Converts the table to the {state: {action: value}} format of the saved pickles.
+        """
+        q_dict = {}
+        for state_id, slot in self.slots.items():
+            state = tuple(int(v) for v in np.unravel_index(state_id, self.state_shape))
+            q_dict[state] = {self.actions[a]: float(self.values[slot, a]) for a in np.flatnonzero(self.visited[slot])}
+        return q_dict
+
+    def checkpoint_arrays(self):
+        """
+        Returns the arrays saved by QTableCheckpoints, all indexed by slot.
+        """
+        return {"values": self.values, "visited": self.visited, "visits": self.visits, "states": self.states}
+
+    def load_checkpoint_arrays(self, arrays):
+        self.values = arrays["values"]
+        self.visited = arrays["visited"]
+        self.visits = arrays["visits"]
+        self.states = arrays["states"]
+        # only the slots with a visited action hold a state
+        used = self.visited.any(axis=1)
+        self.slots = {int(self.states[slot]): int(slot) for slot in np.flatnonzero(used)}
+        self.free_slots = np.flatnonzero(~used)[::-1].tolist()
@@ -0,0 +1,206 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+import numpy as np
+from multiprocessing import Pool
+import agents_utils as au
+import agentsWalk
+import trainer
+
+RESULTS_DIR = "sweep_results"
+# an agent pair has converged once the mean length of its last CONVERGENCE_WINDOW episodes is at most CONVERGENCE_STEPS
+CONVERGENCE_WINDOW = 20
+CONVERGENCE_STEPS = 100
+PARAMETERS = ["learning_rate", "discount_factor", "exploration_rate", "exploration_decay"]
+COLUMNS = ["run", "seed", "schedule"] + PARAMETERS + ["episodes", "max_steps", "episodes_to_convergence",
+                                                     "mean_steps", "final_mean_steps", "final_mean_reward", "total_steps", "seconds"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep of the rendezvous agents, every run is trained headless in its own process.")
+    parser.add_argument("--learning-rates", type=float, nargs="+", default=[agentsWalk.LEARNING_RATE])
+    parser.add_argument("--discount-factors", type=float, nargs="+", default=[agentsWalk.DISCOUNT_FACTOR])
+    parser.add_argument("--exploration-rates", type=float, nargs="+", default=[agentsWalk.EXPLORATION_RATE])
+    parser.add_argument("--exploration-decays", type=float, nargs="+", default=[agentsWalk.EXPLORATION_DECAY])
+    parser.add_argument("--schedules", nargs="+", default=[",".join(au.RESET_SCHEDULE)],
+                        help="reset schedules, comma separated placements among " + ", ".join(au.RESET_SCHEDULE))
+    parser.add_argument("--samples", type=int, default=0,
+                        help="if > 0, sample this many configurations uniformly between the min and max of every parameter instead of the full grid")
+    parser.add_argument("--seeds", type=int, default=1, help="number of runs of every configuration, with seeds 0 to N-1")
+    parser.add_argument("--episodes", type=int, default=300, help="number of episodes of every run")
+    parser.add_argument("--max-steps", type=int, default=agentsWalk.MAX_EPISODE_STEPS, help="maximum number of steps of an episode")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of processes, defaults to all the cores")
+    parser.add_argument("--out", default=RESULTS_DIR, help="directory of the results, runs already in it are skipped")
+    return parser.parse_args()
+
+
+def build_configs(args):
+    """
+    Returns the list of configurations to run, either the full grid of the given values or random samples.
+    """
+    values = [args.learning_rates, args.discount_factors, args.exploration_rates, args.exploration_decays]
+    for schedule in args.schedules:
+        for placement in schedule.split(","):
+            if placement not in au.RESET_SCHEDULE:
+                raise ValueError(f"unknown placement {placement}, expected one of {au.RESET_SCHEDULE}")
+
+    if args.samples > 0:
+        # the samples only depend on the number of samples, so an interrupted sweep resumes the same runs
+        rng = np.random.default_rng(args.samples)
+        combinations = []
+        for _ in range(args.samples):
+            sample = [round(float(rng.uniform(min(v), max(v))), 4) for v in values]
+            combinations.append(sample + [args.schedules[rng.integers(len(args.schedules))]])
+    else:
+        combinations = [list(c) for c in itertools.product(*values, args.schedules)]
+
+    configs = []
+    for combination in combinations:
+        for seed in range(args.seeds):
+            config = dict(zip(PARAMETERS + ["schedule"], combination))
+            config.update(seed=seed, episodes=args.episodes, max_steps=args.max_steps)
+            config["run"] = run_name(config)
+            configs.append(config)
+    return configs
+
+
+def run_name(config):
+    """
+    Returns a short stable name of the configuration, used for the files of the run.
+    """
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def episodes_to_convergence(steps):
+    """
+    Returns the number of episodes needed to converge, None if the run never converged.
+    """
+    if len(steps) < CONVERGENCE_WINDOW:
+        return None
+    rolling_mean = np.convolve(steps, np.ones(CONVERGENCE_WINDOW) / CONVERGENCE_WINDOW, mode="valid")
+    converged = np.flatnonzero(rolling_mean <= CONVERGENCE_STEPS)
+    return int(converged[0]) + CONVERGENCE_WINDOW if len(converged) > 0 else None
+
+
+def run_config(config, out_dir):
+    """
+    Trains a pair of agents with the given configuration and saves the steps and reward curves.
+
+    Returns the summary of the run, a row of the results table.
+    """
+    au.VERBOSE = False
+    au.SAVE_Q_TABLES = False
+    random.seed(config["seed"])
+    np.random.seed(config["seed"])
+
+    agents_trainer = trainer.AgentsTrainer(agentsWalk.WIDTH, agentsWalk.HEIGHT, agentsWalk.AGENT_WIDTH, agentsWalk.AGENT_HEIGHT,
+                                           config["learning_rate"], config["discount_factor"], config["exploration_rate"],
+                                           config["exploration_decay"], config["max_steps"], config["episodes"],
+                                           tuple(config["schedule"].split(",")))
+    agent_one, agent_two = agents_trainer.agents
+
+    start_time = time.time()
+    steps = []
+    rewards = []
+    episode_reward = 0
+    while not agents_trainer.is_done():
+        episode_ended = agents_trainer.step()
+        episode_reward += agent_one.current_reward + agent_two.current_reward
+        if episode_ended:
+            episode_steps = agent_one.steps_history[-1]
+            steps.append(episode_steps)
+            # mean reward of one agent in one step of the episode
+            rewards.append(episode_reward / (2 * max(episode_steps, 1)))
+            episode_reward = 0
+
+    steps = np.array(steps)
+    rewards = np.array(rewards)
+    final = max(1, len(steps) // 10)
+    convergence = episodes_to_convergence(steps)
+    summary = dict(config)
+    summary.update(episodes_to_convergence=convergence if convergence is not None else "",
+                   mean_steps=round(float(steps.mean()), 2),
+                   final_mean_steps=round(float(steps[-final:].mean()), 2),
+                   final_mean_reward=round(float(rewards[-final:].mean()), 3),
+                   total_steps=int(steps.sum()),
+                   seconds=round(time.time() - start_time, 1))
+
+    # the summary is written last, a run is complete only once it exists
+    curves_path = os.path.join(out_dir, "runs", f"{config['run']}.npz")
+    np.savez_compressed(curves_path, steps=steps, rewards=rewards)
+    summary_path = os.path.join(out_dir, "runs", f"{config['run']}.json")
+    with open(summary_path + ".tmp", "w") as f:
+        json.dump(summary, f)
+    os.replace(summary_path + ".tmp", summary_path)
+    return summary
+
+
+def run_config_star(arguments):
+    return run_config(*arguments)
+
+
+def load_results(configs, out_dir):
+    """
+    Returns the summaries of the runs of the configurations already done.
+    """
+    results = {}
+    for config in configs:
+        summary_path = os.path.join(out_dir, "runs", f"{config['run']}.json")
+        if os.path.exists(summary_path):
+            with open(summary_path) as f:
+                results[config["run"]] = json.load(f)
+    return results
+
+
+def write_table(results, out_dir):
+    """
+    Writes the results table, sorted from the fastest converging run.
+    """
+    rows = sorted(results.values(), key=lambda r: (r["episodes_to_convergence"] == "", r["episodes_to_convergence"] or 0, r["final_mean_steps"]))
+    table_path = os.path.join(out_dir, "results.csv")
+    with open(table_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({column: row[column] for column in COLUMNS})
+    return table_path
+
+
+def sweep(configs, out_dir, workers):
+    """
+    Runs all the configurations not done yet over a pool of processes.
+
+    Args:
+        - configs (list) : configurations built by build_configs.
+        - out_dir (str) : directory of the results.
+        - workers (int) : number of processes.
+
+    Returns the path of the results table.
+    """
+    os.makedirs(os.path.join(out_dir, "runs"), exist_ok=True)
+    results = load_results(configs, out_dir)
+    pending = [config for config in configs if config["run"] not in results]
+    print(f"{len(configs)} runs, {len(results)} already done, {len(pending)} to do with {workers} processes")
+
+    start_time = time.time()
+    try:
+        with Pool(workers) as pool:
+            for done, summary in enumerate(pool.imap_unordered(run_config_star, [(config, out_dir) for config in pending]), 1):
+                results[summary["run"]] = summary
+                print(f"[{done}/{len(pending)}] {summary['run']}: converged after {summary['episodes_to_convergence'] or 'never'} episodes, "
+                      f"final mean steps {summary['final_mean_steps']} ({time.time() - start_time:.0f}s)")
+    finally:
+        # even if interrupted, the table holds every finished run
+        table_path = write_table(results, out_dir)
+    return table_path
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    table_path = sweep(build_configs(args), args.out, args.workers)
+    print(f"Results written to {table_path}")
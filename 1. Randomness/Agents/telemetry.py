@@ -0,0 +1,83 @@
+import json
+import os
+import numpy as np
+
+FIELDS = ("episode", "agent", "steps", "total_reward", "avg_reward", "exploration_rate", "q_table_size", "steps_per_second")
+INT_FIELDS = {"episode", "agent", "steps", "q_table_size"}
+BUFFER_EPISODES = 1024
+
+
+class TelemetrySink():
+    """
+    Records one row of metrics per agent per episode and writes them to a CSV or JSONL file.
+
+    The rows are stored in a preallocated array, recording one is a single array assignment,
+    and the file is only written when the buffer is full or when the sink is flushed/closed.
+    The format is chosen from the extension of the path, .jsonl or .csv.
+    """
+    def __init__(self, path, buffer_size = BUFFER_EPISODES):
+        self.path = path
+        self.format = "jsonl" if path.endswith(".jsonl") else "csv"
+        self.buffer = np.zeros((buffer_size, len(FIELDS)))
+        self.size = 0
+        self.int_columns = [i for i, field in enumerate(FIELDS) if field in INT_FIELDS]
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # start a new file, so that the runs are not mixed
+        with open(path, "w") as f:
+            if self.format == "csv":
+                f.write(",".join(FIELDS) + "\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, episode, agent, steps, total_reward, exploration_rate, q_table_size, steps_per_second):
+        """
+        Records the metrics of an agent at the end of an episode, the average reward is computed from the total.
+        """
+        if self.size == len(self.buffer):
+            self.flush()
+        self.buffer[self.size] = (episode, agent, steps, total_reward, total_reward / max(steps, 1),
+                                  exploration_rate, q_table_size, steps_per_second)
+        self.size += 1
+
+    def record_batch(self, episode, agent, steps, total_reward, exploration_rate, q_table_size, steps_per_second):
+        """
+        Vectorized record, every argument is an array (or a scalar shared by all the rows),
+        they are broadcast together and flattened into rows.
+        """
+        columns = [np.ravel(c) for c in np.broadcast_arrays(episode, agent, steps, total_reward, exploration_rate, q_table_size, steps_per_second)]
+        rows = np.stack([columns[0], columns[1], columns[2], columns[3], columns[3] / np.maximum(columns[2], 1),
+                         columns[4], columns[5], columns[6]], axis=1)
+        for start in range(0, len(rows), len(self.buffer)):
+            chunk = rows[start:start + len(self.buffer)]
+            if self.size + len(chunk) > len(self.buffer):
+                self.flush()
+            self.buffer[self.size:self.size + len(chunk)] = chunk
+            self.size += len(chunk)
+
+    def flush(self):
+        """
+        Appends the buffered rows to the file and empties the buffer.
+        """
+        if self.size == 0:
+            return
+        rows = self.buffer[:self.size].tolist()
+        for row in rows:
+            for i in self.int_columns:
+                row[i] = int(row[i])
+
+        with open(self.path, "a") as f:
+            if self.format == "jsonl":
+                f.writelines(json.dumps(dict(zip(FIELDS, row))) + "\n" for row in rows)
+            else:
+                f.writelines(",".join(str(value) for value in row) + "\n" for row in rows)
+        self.size = 0
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,155 @@
+import argparse
+import pygame
+import random
+import time
+import numpy as np
+import agents_utils as au
+import agentsWalk
+from batched_env import BatchedRendezvousEnv
+from telemetry import TelemetrySink
+
+RENDER_FPS = 30
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Headless training of the rendezvous agents.")
+    parser.add_argument("--episodes", type=int, default=agentsWalk.MAX_EPISODES, help="number of episodes to train for")
+    parser.add_argument("--max-steps", type=int, default=agentsWalk.MAX_EPISODE_STEPS, help="maximum number of steps of an episode")
+    parser.add_argument("--render-every", type=int, default=0, help="render one episode every N episodes, 0 never renders")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the random generators")
+    parser.add_argument("--verbose", action="store_true", help="print the logs of every episode")
+    parser.add_argument("--pairs", type=int, default=1, help="number of agent pairs trained at once, more than 1 uses the batched environment")
+    parser.add_argument("--telemetry", default=None, help="write the metrics of every episode to this .csv or .jsonl file")
+    parser.add_argument("--per-pair-tables", action="store_true", help="with --pairs, every pair learns its own Q-tables instead of sharing them")
+    parser.add_argument("--map-scale", type=int, default=1, help="multiply the size of the map, can't be rendered when > 1")
+    parser.add_argument("--max-states", type=int, default=None, help="bound the Q-tables to this many states, the least visited ones are evicted")
+    args = parser.parse_args()
+    if args.map_scale > 1 and args.render_every > 0:
+        parser.error("a scaled map can't be rendered")
+    return args
+
+
+def train(episodes, max_steps, render_every = 0, seed = None, telemetry = None, map_scale = 1, max_states = None):
+    """
+    Trains the agents without a window and without a frame cap.
+
+    Args:
+        - episodes (int) : number of episodes to train for.
+        - max_steps (int) : maximum number of steps of an episode.
+        - render_every (int) : if > 0, every render_every episodes one episode is shown in a window.
+        - seed (int) : seed of the random generators, for reproducible runs.
+        - telemetry (TelemetrySink) : if given, receives the metrics of every episode.
+        - map_scale (int) : the map is map_scale times wider and higher than the rendered one.
+        - max_states (int) : if given, the Q-tables hold at most this many states.
+
+    Returns the trainer, with the trained agents.
+    """
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
+    agents_trainer = agentsWalk.create_trainer(agentsWalk.WIDTH * map_scale, agentsWalk.HEIGHT * map_scale, max_states)
+    agents_trainer.max_episodes = episodes
+    agents_trainer.max_episode_steps = max_steps
+    agents_trainer.telemetry = telemetry
+
+    screen = None
+    total_steps = 0
+    start_time = time.time()
+
+    while not agents_trainer.is_done():
+        rendering = render_every > 0 and agents_trainer.episode_count % render_every == 0
+        if rendering and screen is None:
+            screen, clock, loading_circle, fade_surface = agentsWalk.init_screen()
+
+        episode_ended = agents_trainer.step()
+        total_steps += 1
+
+        if rendering and screen is not None:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    # closing the window stops the rendering, not the training
+                    pygame.quit()
+                    screen = None
+                    render_every = 0
+                    break
+            else:
+                screen.blit(fade_surface, (0, 0))
+                agentsWalk.update_screen(screen, agents_trainer.agents, agents_trainer.episode_count, loading_circle)
+                pygame.display.update()
+                clock.tick(RENDER_FPS)
+
+        if episode_ended and agents_trainer.episode_count % 100 == 0:
+            elapsed = time.time() - start_time
+            print(f"Episode {agents_trainer.episode_count}/{episodes}, {total_steps} steps, "
+                  f"{total_steps / elapsed:.0f} steps/s, exploration rate: {agents_trainer.agent_one.exploration_rate:.3f}")
+
+    elapsed = time.time() - start_time
+    print(f"Trained {agents_trainer.episode_count} episodes ({total_steps} steps) in {elapsed:.1f}s")
+    return agents_trainer
+
+
+def train_batched(pairs, episodes, max_steps, shared_q_table = True, seed = None, telemetry = None):
+    """
+    Trains many pairs of agents at once with the vectorized environment, nothing is rendered.
+
+    Args:
+        - pairs (int) : number of agent pairs stepped together.
+        - episodes (int) : number of episodes to train for, summed over all the pairs.
+        - max_steps (int) : maximum number of steps of an episode.
+        - shared_q_table (bool) : if True all the pairs update the same two Q-tables, otherwise every pair has its own.
+        - seed (int) : seed of the random generator, for reproducible runs.
+        - telemetry (TelemetrySink) : if given, receives the metrics of every episode.
+
+    The Q-tables are checkpointed during the run and at the end, see BatchedRendezvousEnv.save_q_tables.
+
+    Returns the environment, with the trained Q-tables.
+    """
+    env = BatchedRendezvousEnv(pairs, agentsWalk.WIDTH, agentsWalk.HEIGHT, agentsWalk.AGENT_WIDTH, agentsWalk.AGENT_HEIGHT,
+                               agentsWalk.LEARNING_RATE, agentsWalk.DISCOUNT_FACTOR, agentsWalk.EXPLORATION_RATE,
+                               agentsWalk.EXPLORATION_DECAY, max_steps, shared_q_table, seed, telemetry)
+
+    total_steps = 0
+    next_log = 100
+    # about every SAVE_EPISODES episodes of each pair, like the single pair training
+    save_every = au.SAVE_EPISODES * pairs
+    next_save = save_every
+    saved_episode = None
+    start_time = time.time()
+
+    while env.total_episodes() < episodes:
+        env.step()
+        total_steps += pairs
+
+        if au.SAVE_Q_TABLES and env.total_episodes() >= next_save:
+            saved_episode = env.total_episodes()
+            env.save_q_tables(saved_episode)
+            next_save += save_every
+
+        if env.total_episodes() >= next_log:
+            next_log += 100 * max(1, pairs // 100)
+            elapsed = time.time() - start_time
+            print(f"Episode {env.total_episodes()}/{episodes}, {total_steps} agent pair steps, "
+                  f"{total_steps / elapsed:.0f} steps/s, mean exploration rate: {env.exploration_rate.mean():.3f}")
+
+    elapsed = time.time() - start_time
+    print(f"Trained {env.total_episodes()} episodes ({total_steps} steps) with {pairs} pairs in {elapsed:.1f}s")
+    if au.SAVE_Q_TABLES and saved_episode != env.total_episodes():
+        env.save_q_tables(env.total_episodes())
+    return env
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    au.VERBOSE = args.verbose
+    telemetry = TelemetrySink(args.telemetry) if args.telemetry else None
+    try:
+        if args.pairs > 1:
+            train_batched(args.pairs, args.episodes, args.max_steps, not args.per_pair_tables, args.seed, telemetry)
+        else:
+            train(args.episodes, args.max_steps, args.render_every, args.seed, telemetry, args.map_scale, args.max_states)
+    finally:
+        # even if interrupted, the buffered rows of the last episodes are written
+        if telemetry is not None:
+            telemetry.close()
+    pygame.quit()
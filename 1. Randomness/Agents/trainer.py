@@ -0,0 +1,114 @@
+import random
+import time
+import numpy as np
+import agentWalker
+import agents_utils as au
+
+AGENT_ONE_COLOR = (0, 255, 0)  # Green
+AGENT_TWO_COLOR = (255, 0, 0)  # Red
+
+# an episode lasts at most this many steps, i.e. the old 100 seconds at 10 steps per second
+MAX_EPISODE_STEPS = 1000
+
+
+class AgentsTrainer():
+    """
+    Runs the Q-learning of the two agents one step at a time, without knowing anything
+    about the rendering, so that the same training can be watched in a window or run headless.
+
+    Episodes are limited in steps and not in seconds, so the results don't depend on
+    how fast the machine is.
+    """
+    def __init__(self, width, height, agent_width, agent_height, learning_rate, discount_factor,
+                 exploration_rate, exploration_decay, max_episode_steps = MAX_EPISODE_STEPS, max_episodes = 1000,
+                 reset_schedule = au.RESET_SCHEDULE, telemetry = None, max_states = None):
+        self.width = width
+        self.height = height
+        self.exploration_rate = exploration_rate
+        self.exploration_decay = exploration_decay
+        self.max_episode_steps = max_episode_steps
+        self.max_episodes = max_episodes
+        self.reset_schedule = reset_schedule
+        # optional TelemetrySink receiving the metrics of every episode
+        self.telemetry = telemetry
+
+        self.agent_one = agentWalker.AgentWalker(50, 50, AGENT_ONE_COLOR, "Agent 1", agent_width, agent_height, (width, height), exploration_rate, discount_factor, learning_rate, max_states=max_states)
+        self.agent_two = agentWalker.AgentWalker(width - 50, height - 50, AGENT_TWO_COLOR, "Agent 2", agent_width, agent_height, (width, height), exploration_rate, discount_factor, learning_rate, max_states=max_states)
+        self.agents = [self.agent_one, self.agent_two]
+
+        self.episode_count = 0
+        self.episode_resets = 0
+        self.episode_steps = 0
+        self.decay_timer = 0
+        self.start_time = time.time()
+        self.episode_rewards = [0.0, 0.0]
+        self.episode_start = time.perf_counter()
+
+    def is_done(self):
+        """
+        Returns True once all the episodes have been played.
+        """
+        return self.episode_count >= self.max_episodes
+
+    def step(self):
+        """
+        Plays a single step of the current episode.
+
+        Returns True if the step ended the episode, False otherwise.
+        """
+        agents = self.agents
+
+        # For each agent, choose action and update
+        au.choose_agent_action_reward(agents)
+        self.episode_rewards[0] += self.agent_one.current_reward
+        self.episode_rewards[1] += self.agent_two.current_reward
+
+        if self.decay_timer == 50:
+            # Decay exploration rate
+            for agent in agents:
+                if self.episode_count <= 50:
+                    agent.decay_exploration(self.exploration_decay)
+                else:
+                    agent.decay_exploration(self.exploration_decay, no_minimum = True)
+            self.decay_timer = 0
+
+        if self.episode_count % 15 == 0 and self.episode_count > 0:
+            for agent in agents:
+                agent.partial_reset_q_table()
+
+        self.decay_timer += 1
+        self.episode_steps += 1
+        # Check if agents have found each other
+        distance = np.sqrt((self.agent_one.x - self.agent_two.x)**2 + (self.agent_one.y - self.agent_two.y)**2)
+        # simplifying the problem, agents found each other when they are in neighbourhood cells not in the same one
+        previous_episode = self.episode_count
+        played_steps = self.episode_steps
+        self.episode_steps, self.episode_count, self.episode_resets, self.start_time = au.reset_episode(
+            distance, agents, self.agent_one, self.agent_two, self.start_time, self.episode_steps,
+            self.episode_count, self.episode_resets, self.width, self.height, self.max_episode_steps, self.reset_schedule)
+
+        if self.episode_count != previous_episode:
+            self.end_episode(previous_episode, played_steps)
+
+        # AFTER 100 EPISODES STOP GOING INTO EXPLORATION MODE
+        if self.episode_resets > 15 and random.random() < 0.005 and self.episode_count < 100:
+            if au.VERBOSE:
+                print(f"GOING INTO EXPLORATION MODE AGAIN, EXPLORATION RATE: {self.exploration_rate}")
+            for agent in agents:
+                if random.random() < 0.5:
+                    agent.update_exploration_rate(self.exploration_rate)
+            self.episode_resets = 0
+
+        return self.episode_count != previous_episode
+
+    def end_episode(self, episode, steps):
+        """
+        Records the metrics of the episode that just ended and resets the episode counters.
+        """
+        if self.telemetry is not None:
+            steps_per_second = steps / max(time.perf_counter() - self.episode_start, 1e-9)
+            for i, agent in enumerate(self.agents):
+                self.telemetry.record(episode, i, steps, self.episode_rewards[i], agent.exploration_rate,
+                                      len(agent.q_table), steps_per_second)
+        self.episode_rewards = [0.0, 0.0]
+        self.episode_start = time.perf_counter()
@@ -0,0 +1,66 @@
+import pygame
+import numpy as np
+import trails
+
+# colours of the palette from empty pixels to the most crowded ones
+PALETTE_STOPS = [
+    (0.0, (0, 0, 0)),
+    (0.25, (40, 0, 120)),
+    (0.5, (200, 30, 100)),
+    (0.75, (255, 160, 0)),
+    (1.0, (255, 255, 210))
+]
+# number of walkers on a pixel giving the brightest colour
+DENSITY_SATURATION = 32
+
+
+class DensityRenderer():
+    """
+    Draws the walkers as a density map instead of one point per trail step.
+
+    Every frame the positions are binned into a histogram of the size of the screen with
+    np.bincount, the counts are mapped through a logarithmic palette and written directly
+    into the pixels of the screen, so apart from the binning the cost only depends on the
+    size of the screen and not on the number of walkers.
+    """
+    def __init__(self, saturation = DENSITY_SATURATION, stops = PALETTE_STOPS):
+        self.saturation = saturation
+
+        # one colour per count, from 0 to saturation walkers on a pixel
+        levels = np.log1p(np.arange(saturation + 1)) / np.log1p(saturation)
+        positions = [stop[0] for stop in stops]
+        self.colors = np.stack([np.interp(levels, positions, [stop[1][c] for stop in stops]) for c in range(3)], axis=1).astype(np.uint8)
+
+        # colours converted to the pixel format of the screen, computed on the first draw
+        self.mapped_colors = None
+        self.mapped_format = None
+
+    def histogram(self, x, y, width, height):
+        """
+        Returns the number of walkers on every pixel, flattened in the (width, height) order of surfarray.
+        """
+        ix = np.clip(x.astype(np.intp), 0, width - 1)
+        iy = np.clip(y.astype(np.intp), 0, height - 1)
+        return np.bincount(ix * height + iy, minlength=width * height)
+
+    def draw(self, screen, x, y):
+        """
+        Draws the density of the given positions over the whole screen.
+
+        Args:
+            - screen -> surface to draw on, has to be a 32 bit surface.
+            - x, y (np.array) -> positions of the walkers.
+        """
+        width, height = screen.get_size()
+        pixel_format = (screen.get_shifts(), screen.get_masks())
+        if self.mapped_format != pixel_format:
+            self.mapped_colors = trails.map_colors(screen, self.colors)
+            self.mapped_format = pixel_format
+
+        counts = self.histogram(x, y, width, height)
+        np.minimum(counts, self.saturation, out=counts)
+
+        pixels = pygame.surfarray.pixels2d(screen)
+        pixels[...] = self.mapped_colors[counts].reshape(width, height)
+        # release the lock on the screen
+        del pixels
@@ -0,0 +1,157 @@
+import numpy as np
+
+TABLE_SIZE = 256
+
+
+class GradientNoise():
+    """
+    Perlin style gradient noise evaluated on whole NumPy arrays at once.
+
+    The permutation and gradient tables are precomputed when the generator is created,
+    so a call is just a handful of table lookups and array operations, whatever the
+    number of points. It mimics the perlin_noise.PerlinNoise interface:
+        - noise(0.5) -> 1D noise of a single point
+        - noise([x, y]) -> 2D noise, x and y can be scalars or arrays
+        - noise([x, y, z]) -> 3D noise
+    The noise repeats every 256 units (divided by the octaves).
+    """
+    def __init__(self, octaves = 1, seed = None):
+        if octaves <= 0:
+            raise ValueError("octaves expected to be positive number")
+
+        self.octaves = octaves
+        rng = np.random.default_rng(seed)
+
+        # doubled permutation table, so that perm[perm[x] + y] never goes out of range
+        perm = rng.permutation(TABLE_SIZE)
+        self.perm = np.concatenate([perm, perm])
+
+        # random unit gradients, in 1D they are either -1 or 1
+        self.gradients_1d = rng.choice([-1.0, 1.0], TABLE_SIZE)
+        angles = rng.uniform(0, 2 * np.pi, TABLE_SIZE)
+        self.gradients_2d = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+        directions = rng.normal(size=(TABLE_SIZE, 3))
+        self.gradients_3d = directions / np.linalg.norm(directions, axis=1, keepdims=True)
+
+    def __call__(self, coordinates):
+        """
+        Returns the noise value of the given coordinates, a float for scalar
+        coordinates or an array for array coordinates.
+        """
+        if isinstance(coordinates, (list, tuple)):
+            if len(coordinates) == 1:
+                return self.noise1d(coordinates[0])
+            if len(coordinates) == 2:
+                return self.noise2d(*coordinates)
+            if len(coordinates) == 3:
+                return self.noise3d(*coordinates)
+            raise ValueError("only 1, 2 or 3 dimensional noise is supported")
+        return self.noise1d(coordinates)
+
+    @staticmethod
+    def fade(t):
+        """
+        Quintic interpolation curve 6t^5 - 15t^4 + 10t^3.
+        """
+        return t * t * t * (t * (t * 6 - 15) + 10)
+
+    @staticmethod
+    def split(coordinate):
+        """
+        Splits the coordinates into the lattice cell (wrapped on the tables) and the offset inside it.
+        """
+        cell = np.floor(coordinate)
+        return cell.astype(np.int64) & (TABLE_SIZE - 1), coordinate - cell
+
+    def result(self, value, *coordinates):
+        """
+        Returns a float if every coordinate was a scalar.
+        """
+        if all(np.ndim(c) == 0 for c in coordinates):
+            return float(value)
+        return value
+
+    def noise1d(self, x):
+        """
+        1D noise, values are between -0.5 and 0.5.
+        """
+        xi, xf = self.split(np.asarray(x, dtype=float) * self.octaves)
+
+        g0 = self.gradients_1d[self.perm[xi]]
+        g1 = self.gradients_1d[self.perm[xi + 1]]
+        n0 = g0 * xf
+        n1 = g1 * (xf - 1)
+
+        return self.result(n0 + self.fade(xf) * (n1 - n0), x)
+
+    def noise2d(self, x, y):
+        """
+        2D noise, values are roughly between -0.7 and 0.7.
+        """
+        xi, xf = self.split(np.asarray(x, dtype=float) * self.octaves)
+        yi, yf = self.split(np.asarray(y, dtype=float) * self.octaves)
+        xi, yi = np.broadcast_arrays(xi, yi)
+        xf, yf = np.broadcast_arrays(xf, yf)
+
+        perm = self.perm
+        a = perm[xi]
+        b = perm[xi + 1]
+
+        def corner(h, dx, dy):
+            g = self.gradients_2d[h]
+            return g[..., 0] * dx + g[..., 1] * dy
+
+        n00 = corner(perm[a + yi], xf, yf)
+        n10 = corner(perm[b + yi], xf - 1, yf)
+        n01 = corner(perm[a + yi + 1], xf, yf - 1)
+        n11 = corner(perm[b + yi + 1], xf - 1, yf - 1)
+
+        u = self.fade(xf)
+        v = self.fade(yf)
+        nx0 = n00 + u * (n10 - n00)
+        nx1 = n01 + u * (n11 - n01)
+
+        return self.result(nx0 + v * (nx1 - nx0), x, y)
+
+    def noise3d(self, x, y, z):
+        """
+        3D noise, values are roughly between -0.9 and 0.9.
+        """
+        xi, xf = self.split(np.asarray(x, dtype=float) * self.octaves)
+        yi, yf = self.split(np.asarray(y, dtype=float) * self.octaves)
+        zi, zf = self.split(np.asarray(z, dtype=float) * self.octaves)
+        xi, yi, zi = np.broadcast_arrays(xi, yi, zi)
+        xf, yf, zf = np.broadcast_arrays(xf, yf, zf)
+
+        perm = self.perm
+        a = perm[xi]
+        b = perm[xi + 1]
+        aa = perm[a + yi]
+        ab = perm[a + yi + 1]
+        ba = perm[b + yi]
+        bb = perm[b + yi + 1]
+
+        def corner(h, dx, dy, dz):
+            g = self.gradients_3d[h]
+            return g[..., 0] * dx + g[..., 1] * dy + g[..., 2] * dz
+
+        n000 = corner(perm[aa + zi], xf, yf, zf)
+        n100 = corner(perm[ba + zi], xf - 1, yf, zf)
+        n010 = corner(perm[ab + zi], xf, yf - 1, zf)
+        n110 = corner(perm[bb + zi], xf - 1, yf - 1, zf)
+        n001 = corner(perm[aa + zi + 1], xf, yf, zf - 1)
+        n101 = corner(perm[ba + zi + 1], xf - 1, yf, zf - 1)
+        n011 = corner(perm[ab + zi + 1], xf, yf - 1, zf - 1)
+        n111 = corner(perm[bb + zi + 1], xf - 1, yf - 1, zf - 1)
+
+        u = self.fade(xf)
+        v = self.fade(yf)
+        w = self.fade(zf)
+        nx00 = n000 + u * (n100 - n000)
+        nx10 = n010 + u * (n110 - n010)
+        nx01 = n001 + u * (n101 - n001)
+        nx11 = n011 + u * (n111 - n011)
+        nxy0 = nx00 + v * (nx10 - nx00)
+        nxy1 = nx01 + v * (nx11 - nx01)
+
+        return self.result(nxy0 + w * (nxy1 - nxy0), x, y, z)
@@ -1,6 +1,10 @@
 import pygame
 import graphical_components as gc
 
+RENDER_MODES = ["trails", "density"]
+# the walkers slider value is multiplied by one of these, to reach very large populations
+WALKERS_MULTIPLIERS = [1, 10, 100, 1000]
+
 # Options Menu Class
 class OptionsMenu:
     def __init__(self, width, height):
@@ -19,6 +23,24 @@ class OptionsMenu:
             30                 # initial value
         )
         
+        # Create render mode and walkers multiplier buttons
+        self.render_mode = 0
+        self.render_button = gc.Button(
+            width // 2 - 210,
+            height // 2 + 60,
+            200, 40,
+            self.render_text(),
+            font_size=24
+        )
+        self.multiplier = 0
+        self.multiplier_button = gc.Button(
+            width // 2 + 10,
+            height // 2 + 60,
+            200, 40,
+            self.multiplier_text(),
+            font_size=24
+        )
+
         # Create back button
         self.back_button = gc.Button(
             width // 2 - 100, 
@@ -49,16 +71,46 @@ class OptionsMenu:
         
         # Draw slider
         self.walkers_slider.draw(screen)
+
+        # Draw render mode and multiplier buttons
+        self.render_button.draw(screen)
+        self.multiplier_button.draw(screen)
         
         # Draw back button
         self.back_button.draw(screen)
     
+    def render_text(self):
+        return f"Render: {RENDER_MODES[self.render_mode].capitalize()}"
+
+    def multiplier_text(self):
+        return f"Walkers x{WALKERS_MULTIPLIERS[self.multiplier]}"
+
+    def get_render_mode(self):
+        """
+        Returns the selected render mode, either "trails" or "density".
+        """
+        return RENDER_MODES[self.render_mode]
+
+    def get_num_walkers(self):
+        """
+        Returns the number of walkers, the slider value times the selected multiplier.
+        """
+        return int(self.walkers_slider.current_val) * WALKERS_MULTIPLIERS[self.multiplier]
+
     def handle_event(self, event):
         self.back_button.handle_event(event)
+        self.render_button.handle_event(event)
+        self.multiplier_button.handle_event(event)
         
         if event.type == pygame.MOUSEBUTTONDOWN:
             if self.back_button.is_hovered(event.pos):
                 return "BACK"
+            if self.render_button.is_hovered(event.pos):
+                self.render_mode = (self.render_mode + 1) % len(RENDER_MODES)
+                self.render_button.text = self.render_text()
+            if self.multiplier_button.is_hovered(event.pos):
+                self.multiplier = (self.multiplier + 1) % len(WALKERS_MULTIPLIERS)
+                self.multiplier_button.text = self.multiplier_text()
         
         # Handle slider events
         self.walkers_slider.handle_event(event)
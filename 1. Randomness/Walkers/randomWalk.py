@@ -3,13 +3,17 @@ import random
 import graphical_components as gc
 import options as opt
 import walker
+import trails
+import density
 import time
+import numpy as np
 
 WIDTH = 640
 HEIGHT = 420
 WALKER_WIDTH = 2
 WALKER_HEIGHT = 2
 MAX_WALKERS = 50
+TRAIL_LENGTH = 100
 
 mode_map = {
     0: 'random',
@@ -56,7 +60,7 @@ def main_menu():
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if start_button.is_hovered(event.pos):
                         # Start the simulation with current max walkers setting from slider
-                        main(int(options_menu.walkers_slider.current_val))
+                        main(options_menu.get_num_walkers(), options_menu.get_render_mode())
                     
                     if options_button.is_hovered(event.pos):
                         show_options = True
@@ -76,23 +80,28 @@ def main_menu():
         pygame.display.update()
         clock.tick(60)
 
-def update_screen(screen, walkers):
+def update_screen(screen, swarm, render_mode = "trails", density_renderer = None):
     """
-    Updates the screen with all the walkers next step
+    Updates the screen with all the walkers next step, the trails of every
+    walker are drawn in a single pass.
 
     Args:
-        - walkers(Walker) -> objects to draw.
+        - swarm(WalkerSwarm) -> walkers to draw.
+        - render_mode(str) -> "trails" or "density", the density map of the current positions.
+        - density_renderer(DensityRenderer) -> renderer used by the density mode.
     """
-    for walker in walkers:
-        positions, color, w_width, w_height = walker.get_walker_attributes()
-        for x, y in positions:
-            rect = pygame.Rect(x, y, w_width, w_height)
-            pygame.draw.rect(screen, color, rect)
+    if render_mode == "density":
+        density_renderer.draw(screen, swarm.x[:swarm.count], swarm.y[:swarm.count])
+    else:
+        trails.draw_trails(screen, swarm.trail, swarm.color, swarm.count, (WALKER_WIDTH, WALKER_HEIGHT))
 
-def create_new_walker():
+def create_new_walker(swarm = None):
     """
     Creates a new walker with random attributes.
 
+    Args:
+        - swarm(WalkerSwarm) -> swarm the walker is added to.
+
     Returns:
         The walker object.
     """
@@ -104,54 +113,73 @@ def create_new_walker():
         starting_noise_x1 = random.uniform(0, 100)
         starting_noise_y1 = random.uniform(0, 100)
         starting_jump = 0.01
-        temp_walker = walker.PerlinWalker(walker_x, walker_y, rand_color, mode, WALKER_WIDTH, WALKER_HEIGHT, starting_noise_x1, starting_noise_y1, starting_jump)
+        temp_walker = walker.PerlinWalker(walker_x, walker_y, rand_color, mode, WALKER_WIDTH, WALKER_HEIGHT, starting_noise_x1, starting_noise_y1, starting_jump, swarm)
     elif mode == 'random':
-        temp_walker = walker.RandomWalker(walker_x, walker_y, rand_color, mode, WALKER_WIDTH, WALKER_HEIGHT)
+        temp_walker = walker.RandomWalker(walker_x, walker_y, rand_color, mode, WALKER_WIDTH, WALKER_HEIGHT, swarm)
     else:
-        temp_walker = walker.GaussianWalker(walker_x, walker_y, rand_color, mode, WALKER_WIDTH, WALKER_HEIGHT)
+        temp_walker = walker.GaussianWalker(walker_x, walker_y, rand_color, mode, WALKER_WIDTH, WALKER_HEIGHT, swarm)
 
     return temp_walker
 
+def create_walkers(swarm, num_walkers):
+    """
+    Creates many walkers with random attributes at once, like create_new_walker.
 
+    Args:
+        - swarm(WalkerSwarm) -> swarm the walkers are added to.
+        - num_walkers(int) -> number of walkers.
 
-def main(num_walkers):
+    Returns:
+        The modes of the new walkers, as mode_map keys.
+    """
+    rng = swarm.rng
+    colors = rng.integers(0, 256, (num_walkers, 3))
+    walkers_x = rng.integers(0, WIDTH + 1, num_walkers)
+    walkers_y = rng.integers(0, HEIGHT + 1, num_walkers)
+    modes = rng.integers(0, len(mode_map), num_walkers)
+    # noise offsets and step are only used by the perlin walkers
+    starting_noise_x = rng.uniform(0, 100, num_walkers)
+    starting_noise_y = rng.uniform(0, 100, num_walkers)
+    starting_jump = 0.01
+    mode_ids = np.array([walker.MODE_IDS[mode_map[m]] for m in range(len(mode_map))])
+    swarm.add_walkers(walkers_x, walkers_y, colors, mode_ids[modes],
+                      WALKER_WIDTH, WALKER_HEIGHT, starting_noise_x, starting_noise_y, starting_jump)
+    return modes
+
+
+
+def main(num_walkers, render_mode = "trails"):
     pygame.init()
     clock = pygame.Clock()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
 
     #Creating walkers
     print(f"Created {num_walkers} walkers!")
-    walkers = []
-    num_perlin = 0
-    num_random = 0
-    num_gaussian = 0
-
-    for _ in range(num_walkers):
-        temp_walker = create_new_walker()
-        if temp_walker.get_walker_mode() == 'random':
-            num_random += 1
-        elif temp_walker.get_walker_mode() == 'perlin':
-            num_perlin += 1
-        else:
-            num_gaussian += 1
-        walkers.append(temp_walker)
+    # the density mode only draws the current positions, so the trails are not needed
+    trail_length = 1 if render_mode == "density" else TRAIL_LENGTH
+    swarm = walker.WalkerSwarm(num_walkers, trail_length=trail_length)
+    density_renderer = density.DensityRenderer()
+
+    modes = create_walkers(swarm, num_walkers)
+    num_random, num_perlin, num_gaussian = np.bincount(modes, minlength=len(mode_map))
 
     background_color = (0, 0, 0)  # Black
     
     print(f"We have {num_random} Random walkers!")
     print(f"We have {num_perlin} Perlin walkers!")
-    print(f"We have {num_random} Gaussian walkers!")  
+    print(f"We have {num_gaussian} Gaussian walkers!")  
 
     screen.fill(background_color)
 
     update_step = 0
 
-    update_screen(screen, walkers)
+    update_screen(screen, swarm, render_mode, density_renderer)
 
     loading_circle = gc.LoadingCircle(10, 10)  # Top-left corner
     
     # Font for instructions
     esc_pressed = False
+    density_pressed = False
     running = True
 
     pygame.display.set_caption("Random Walk Simulation")
@@ -174,27 +202,39 @@ def main(num_walkers):
             loading_circle.stop_loading()
             esc_pressed = False
 
-        for walker in walkers:
-            walker.randomWalk(WIDTH, HEIGHT)
-            if walker.get_walker_mode() == 'perlin' and update_step > 100:
-                walker.update_step(0.01)
+        # D switches between the trails and the density map
+        if keys[pygame.K_d]:
+            if not density_pressed:
+                render_mode = "trails" if render_mode == "density" else "density"
+                # the density mode only keeps the last step, the trails are reallocated when they are shown again
+                swarm.set_trail_length(1 if render_mode == "density" else TRAIL_LENGTH)
+                print(f"Render mode: {render_mode}")
+                density_pressed = True
+        else:
+            density_pressed = False
+
+        # all the walkers are advanced in a single batched step
+        swarm.step(WIDTH, HEIGHT)
+        if update_step > 100:
+            perlin_idx = swarm.get_mode_indices('perlin')
+            if len(perlin_idx) > 0:
+                swarm.update_step(0.01, perlin_idx[:1])
                 update_step = 0
   
         update_step += 1
         screen.fill(background_color)
-        update_screen(screen, walkers)
+        update_screen(screen, swarm, render_mode, density_renderer)
         loading_circle.draw(screen)
 
         if loading_circle.is_loading and time.time() - loading_circle.start_time >= loading_circle.duration:
             running = False
         
-        if len(walkers) < MAX_WALKERS:
+        if swarm.count < MAX_WALKERS:
             walker_generator_chance = random.randint(0,1000)
             # 1 in 1000 chance to generate a new random walker at each step
             if walker_generator_chance > 999:
-                temp_walker = create_new_walker()
-                walkers.append(temp_walker)
-                print(f"A new {walkers[-1].get_walker_mode()} walker appeared!")
+                temp_walker = create_new_walker(swarm)
+                print(f"A new {temp_walker.get_walker_mode()} walker appeared!")
 
         # Update display
         pygame.display.update()
@@ -0,0 +1,115 @@
+import pygame
+import numpy as np
+
+
+class TrailBuffer():
+    """
+    Fixed-capacity ring buffer holding the last `length` positions of `capacity` objects.
+
+    Pushing a new step overwrites the oldest row, so storing a trail costs the same
+    whatever its length.
+    """
+    def __init__(self, length, capacity = 1):
+        self.length = max(1, length)
+        self.points = np.zeros((self.length, capacity, 2))
+        self.head = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def capacity(self):
+        return self.points.shape[1]
+
+    def resize(self, capacity):
+        """
+        Changes the number of objects the buffer can hold, keeping the stored trails.
+        """
+        new_points = np.zeros((self.length, capacity, 2))
+        keep = min(capacity, self.capacity)
+        new_points[:, :keep] = self.points[:, :keep]
+        self.points = new_points
+
+    def fill(self, i, x, y):
+        """
+        Fills the whole trail of the i-th object with the same point, used when a new object
+        is added so that it doesn't inherit stale points.
+        """
+        self.points[:, i, 0] = x
+        self.points[:, i, 1] = y
+
+    def push(self, x, y):
+        """
+        Stores a new step, x and y are either scalars or arrays with one value per object.
+        """
+        row = self.points[self.head]
+        n = np.size(x)
+        row[:n, 0] = x
+        row[:n, 1] = y
+        self.head = (self.head + 1) % self.length
+        self.size = min(self.size + 1, self.length)
+
+    def last(self, k = 1):
+        """
+        Returns the k-th most recent step of all the objects, k = 1 is the newest one.
+        """
+        return self.points[(self.head - k) % self.length]
+
+    def get_trail(self, i = 0):
+        """
+        Returns the trail of the i-th object ordered from the oldest to the newest point.
+        """
+        if self.size < self.length:
+            return self.points[:self.size, i]
+        return np.roll(self.points[:, i], -self.head, axis=0)
+
+    def valid_points(self, count):
+        """
+        Returns all the stored points of the first count objects, unordered.
+        """
+        return self.points[:self.size, :count]
+
+
+def map_colors(surface, colors):
+    """
+    Converts (N, 3) RGB colors into the pixel values of the given surface.
+    """
+    shifts = surface.get_shifts()
+    masks = surface.get_masks()
+    colors = colors.astype(np.uint32)
+    mapped = (colors[:, 0] << shifts[0]) | (colors[:, 1] << shifts[1]) | (colors[:, 2] << shifts[2])
+    return mapped | np.uint32(masks[3])
+
+
+def draw_trails(screen, trail, colors, count, point_size = (2, 2)):
+    """
+    Draws every point of every trail in a single pass, writing directly into the pixels
+    of the screen instead of drawing one rect per point.
+
+    Args:
+        - screen -> surface to draw on, has to be a 32 bit surface.
+        - trail (TrailBuffer) -> trails to draw.
+        - colors (np.array) -> (N, 3) colors, one per object.
+        - count (int) -> number of objects to draw.
+        - point_size (tuple) -> width and height of each trail point.
+    """
+    if count == 0 or len(trail) == 0:
+        return
+
+    points = trail.valid_points(count)
+    xs = points[..., 0].astype(np.intp).ravel()
+    ys = points[..., 1].astype(np.intp).ravel()
+    mapped = map_colors(screen, colors[:count])
+    point_colors = np.broadcast_to(mapped, points.shape[:2]).ravel()
+
+    width, height = screen.get_size()
+    pixels = pygame.surfarray.pixels2d(screen)
+    for dx in range(point_size[0]):
+        for dy in range(point_size[1]):
+            px = xs + dx
+            py = ys + dy
+            inside = (px < width) & (py < height) & (px >= 0) & (py >= 0)
+            pixels[px[inside], py[inside]] = point_colors[inside]
+    # release the lock on the screen
+    del pixels
@@ -0,0 +1,162 @@
+import argparse
+import csv
+import os
+import time
+import numpy as np
+import randomWalk
+import walker
+
+STATS_DIR = "walk_stats"
+# side of the cells of the coverage grid, in pixels
+COVERAGE_CELL = 4
+# default target of the first passage times: a square in the middle of the board
+TARGET_SIZE = 40
+COLUMNS = ["mode", "walkers", "steps", "final_msd", "coverage", "hit_fraction",
+           "mean_first_passage", "median_first_passage", "steps_per_second"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Headless random walks, records the mean squared displacement, the coverage and the first passage times of every mode.")
+    parser.add_argument("--walkers", type=int, default=10000, help="number of walkers of every mode")
+    parser.add_argument("--steps", type=int, default=1000, help="number of steps of every walker")
+    parser.add_argument("--modes", nargs="+", default=list(walker.MODE_IDS), choices=list(walker.MODE_IDS))
+    parser.add_argument("--record-every", type=int, default=10, help="steps between two records of the msd and of the coverage")
+    parser.add_argument("--target", type=float, nargs=4, metavar=("X", "Y", "W", "H"),
+                        default=[(randomWalk.WIDTH - TARGET_SIZE) / 2, (randomWalk.HEIGHT - TARGET_SIZE) / 2, TARGET_SIZE, TARGET_SIZE],
+                        help="rectangle of the first passage times, the middle of the board by default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=STATS_DIR, help="directory of the .npy arrays and of summary.csv")
+    return parser.parse_args()
+
+
+class WalkStatistics():
+    """
+    Statistics of a group of walkers, updated at every step without keeping the trajectories:
+        - the mean squared displacement from the start positions, recorded every record_every steps.
+        - the fraction of the board visited by at least one walker, on a grid of COVERAGE_CELL pixels.
+        - the first step at which every walker entered the target rectangle, -1 if it never did.
+    """
+    def __init__(self, x0, y0, width, height, target, record_every = 10, cell = COVERAGE_CELL):
+        self.x0 = np.array(x0, dtype=float)
+        self.y0 = np.array(y0, dtype=float)
+        self.width = width
+        self.height = height
+        self.target = target
+        self.record_every = record_every
+        self.cell = cell
+
+        # the walkers are clamped to [0, WIDTH] x [0, HEIGHT], so the last cell is included
+        self.visited = np.zeros((int(width // cell) + 1, int(height // cell) + 1), dtype=bool)
+        self.first_passage = np.full(len(self.x0), -1, dtype=np.int64)
+
+        self.record_steps = []
+        self.msd = []
+        self.coverage = []
+
+        # number of steps taken, the start positions are step 0
+        self.steps = -1
+        self.update(self.x0, self.y0)
+
+    def update(self, x, y):
+        """
+        Takes the positions of the walkers after a step.
+        """
+        self.steps += 1
+        self.visited[(x // self.cell).astype(np.intp), (y // self.cell).astype(np.intp)] = True
+
+        tx, ty, tw, th = self.target
+        inside = (x >= tx) & (x < tx + tw) & (y >= ty) & (y < ty + th)
+        self.first_passage[inside & (self.first_passage < 0)] = self.steps
+
+        if self.steps % self.record_every == 0:
+            self.record(x, y)
+
+    def record(self, x, y):
+        """
+        Records the msd and the coverage of the last update.
+        """
+        self.record_steps.append(self.steps)
+        self.msd.append(np.mean((x - self.x0)**2 + (y - self.y0)**2))
+        self.coverage.append(np.count_nonzero(self.visited) / self.visited.size)
+
+    def summary(self):
+        """
+        Returns the final statistics, first passage times only count the walkers which reached the target.
+        """
+        hits = self.first_passage[self.first_passage >= 0]
+        return {
+            "walkers": len(self.first_passage),
+            "steps": self.steps,
+            "final_msd": self.msd[-1],
+            "coverage": np.count_nonzero(self.visited) / self.visited.size,
+            "hit_fraction": len(hits) / len(self.first_passage),
+            "mean_first_passage": hits.mean() if len(hits) else np.nan,
+            "median_first_passage": np.median(hits) if len(hits) else np.nan
+        }
+
+
+def run_mode(mode, num_walkers, steps, target, record_every = 10, seed = 0):
+    """
+    Advances num_walkers walkers of the given mode with the step rules of WalkerSwarm.
+
+    Args:
+        - mode (str) : 'random', 'perlin' or 'gaussian'.
+        - num_walkers (int) : number of walkers.
+        - steps (int) : number of steps of every walker.
+        - target (tuple) : x, y, width, height of the first passage rectangle.
+        - record_every (int) : steps between two records of the msd and of the coverage.
+        - seed (int) : seed of the start positions and of the steps.
+
+    Returns the WalkStatistics of the walkers.
+    """
+    width, height = randomWalk.WIDTH, randomWalk.HEIGHT
+    # only the current positions are needed, so the trails are as short as possible
+    swarm = walker.WalkerSwarm(num_walkers, seed=seed, trail_length=1)
+    rng = swarm.rng
+    # same start positions and perlin parameters as randomWalk.create_walkers
+    swarm.add_walkers(rng.integers(0, width + 1, num_walkers), rng.integers(0, height + 1, num_walkers),
+                      rng.integers(0, 256, (num_walkers, 3)), np.full(num_walkers, walker.MODE_IDS[mode]),
+                      randomWalk.WALKER_WIDTH, randomWalk.WALKER_HEIGHT,
+                      rng.uniform(0, 100, num_walkers), rng.uniform(0, 100, num_walkers), 0.01)
+
+    stats = WalkStatistics(swarm.x[:num_walkers], swarm.y[:num_walkers], width, height, target, record_every)
+    for _ in range(steps):
+        swarm.step(width, height)
+        stats.update(swarm.x[:num_walkers], swarm.y[:num_walkers])
+    # the last step is always recorded
+    if stats.record_steps[-1] != stats.steps:
+        stats.record(swarm.x[:num_walkers], swarm.y[:num_walkers])
+    return stats
+
+
+def save_stats(mode, stats, out_dir):
+    """
+    Saves the time series of a mode as <mode>_msd.npy and <mode>_coverage.npy, two columns step and value,
+    and the first passage times of every walker as <mode>_first_passage.npy.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, f"{mode}_msd.npy"), np.column_stack([stats.record_steps, stats.msd]))
+    np.save(os.path.join(out_dir, f"{mode}_coverage.npy"), np.column_stack([stats.record_steps, stats.coverage]))
+    np.save(os.path.join(out_dir, f"{mode}_first_passage.npy"), stats.first_passage)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    rows = []
+    for mode in args.modes:
+        start_time = time.time()
+        stats = run_mode(mode, args.walkers, args.steps, args.target, args.record_every, args.seed)
+        elapsed = time.time() - start_time
+        save_stats(mode, stats, args.out)
+
+        row = {"mode": mode, **stats.summary(), "steps_per_second": round(args.walkers * args.steps / elapsed)}
+        rows.append(row)
+        print(f"{mode}: {args.walkers * args.steps} walker steps in {elapsed:.1f}s, msd {row['final_msd']:.0f}, "
+              f"coverage {row['coverage']:.1%}, {row['hit_fraction']:.1%} reached the target")
+
+    summary_path = os.path.join(args.out, "summary.csv")
+    with open(summary_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Statistics written to {args.out}")
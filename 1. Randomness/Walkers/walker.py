@@ -1,32 +1,313 @@
-import random
-from perlin_noise import PerlinNoise
 import numpy as np
+from trails import TrailBuffer
+from gradient_noise import GradientNoise
+
+TRAIL_LENGTH = 100
+
+MODE_IDS = {
+    'random': 0,
+    'perlin': 1,
+    'gaussian': 2
+}
+
+
+class WalkerSwarm():
+    """
+    Struct-of-arrays container for all the walkers of the simulation.
+
+    Positions, modes, sizes, colors and perlin parameters are kept in NumPy arrays
+    so that every walker, whatever its mode, is advanced in a single batched step.
+    The Walker classes below are thin views over one slot of the swarm.
+    """
+    def __init__(self, capacity = 1024, seed = None, trail_length = TRAIL_LENGTH):
+        self.count = 0
+        self.capacity = max(1, capacity)
+        self.rng = np.random.default_rng(seed)
+
+        self.x = np.zeros(self.capacity)
+        self.y = np.zeros(self.capacity)
+        self.mode = np.zeros(self.capacity, dtype=np.int8)
+        self.color = np.zeros((self.capacity, 3), dtype=np.uint8)
+        self.size = np.zeros((self.capacity, 2))
+
+        # perlin walkers only
+        self.noise_x = np.zeros(self.capacity)
+        self.noise_y = np.zeros(self.capacity)
+        self.step_size = np.zeros(self.capacity)
+
+        # shared noise generator, each perlin walker has its own offsets in noise space
+        self.noise_generator = GradientNoise(seed=int(self.rng.integers(2**31)))
+
+        # ring buffer with the last trail_length positions of every walker
+        self.trail = TrailBuffer(trail_length, self.capacity)
+
+        # indices of the walkers of each mode, recomputed only when a walker is added
+        self.mode_indices = None
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        """
+        Doubles the capacity of every array of the swarm.
+        """
+        self.capacity *= 2
+        for name in ('x', 'y', 'mode', 'color', 'size', 'noise_x', 'noise_y', 'step_size'):
+            old = getattr(self, name)
+            new = np.zeros((self.capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.trail.resize(self.capacity)
+
+    def set_trail_length(self, trail_length):
+        """
+        Replaces the trail buffer with one of trail_length steps, the trails restart
+        from the current positions of the walkers.
+        """
+        self.trail = TrailBuffer(trail_length, self.capacity)
+        idx = np.arange(self.count)
+        self.trail.fill(idx, self.x[idx], self.y[idx])
+
+    def add_walker(self, x, y, color, mode, width, height, starting_noise_x = 0, starting_noise_y = 0, step = 0):
+        """
+        Adds a new walker to the swarm.
+
+        Returns the index of the walker inside the swarm arrays.
+        """
+        if self.count == self.capacity:
+            self.grow()
+
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.mode[i] = MODE_IDS[mode]
+        self.color[i] = color
+        self.size[i] = (width, height)
+        self.noise_x[i] = starting_noise_x
+        self.noise_y[i] = starting_noise_y
+        self.step_size[i] = step
+        self.trail.fill(i, x, y)
+
+        self.count += 1
+        self.mode_indices = None
+        return i
+
+    def add_walkers(self, x, y, colors, modes, width, height, starting_noise_x = 0, starting_noise_y = 0, step = 0):
+        """
+        Adds many walkers at once, every argument is either an array with one value
+        per walker or a value shared by all of them.
+
+        Args:
+            - x, y (np.array) -> positions of the walkers.
+            - colors (np.array) -> (N, 3) colors.
+            - modes (np.array) -> modes of the walkers, as names or MODE_IDS values.
+
+        Returns the indices of the walkers inside the swarm arrays.
+        """
+        n = len(x)
+        while self.count + n > self.capacity:
+            self.grow()
+
+        modes = np.asarray(modes)
+        if modes.dtype.kind in "US":
+            modes = np.vectorize(MODE_IDS.get, otypes=[np.int8])(modes)
+
+        idx = np.arange(self.count, self.count + n)
+        self.x[idx] = x
+        self.y[idx] = y
+        self.mode[idx] = modes
+        self.color[idx] = colors
+        self.size[idx] = (width, height)
+        self.noise_x[idx] = starting_noise_x
+        self.noise_y[idx] = starting_noise_y
+        self.step_size[idx] = step
+        self.trail.fill(idx, self.x[idx], self.y[idx])
+
+        self.count += n
+        self.mode_indices = None
+        return idx
+
+    def get_mode_indices(self, mode):
+        """
+        Returns the indices of all the walkers with the given mode.
+        """
+        if self.mode_indices is None:
+            modes = self.mode[:self.count]
+            self.mode_indices = {name: np.flatnonzero(modes == mode_id) for name, mode_id in MODE_IDS.items()}
+        return self.mode_indices[mode]
+
+    def update_step(self, step_update, idx = None):
+        """
+        For Perlin walkers only, updates the step size.
+        """
+        if idx is None:
+            idx = self.get_mode_indices('perlin')
+        self.step_size[idx] += step_update
+
+    def step(self, WIDTH, HEIGHT, idx = None):
+        """
+        Advances the walkers, all of them by default or only the ones in idx,
+        following the step rule of their mode.
+
+        The trails all share the head of the ring buffer, so only a step of all the walkers
+        records them. When the walkers are stepped in subsets, record_trails has to be called
+        once per frame after the last subset.
+        """
+        if idx is None:
+            random_idx = self.get_mode_indices('random')
+            perlin_idx = self.get_mode_indices('perlin')
+            gaussian_idx = self.get_mode_indices('gaussian')
+        else:
+            idx = np.atleast_1d(np.asarray(idx, dtype=np.intp))
+            modes = self.mode[idx]
+            random_idx = idx[modes == MODE_IDS['random']]
+            perlin_idx = idx[modes == MODE_IDS['perlin']]
+            gaussian_idx = idx[modes == MODE_IDS['gaussian']]
+
+        self.random_step(random_idx)
+        self.perlin_step(perlin_idx)
+        self.gaussian_step(gaussian_idx)
+
+        self.check_boundaries(WIDTH, HEIGHT, idx)
+
+        if idx is None:
+            self.record_trails()
+
+    def record_trails(self):
+        """
+        Adds the current positions of all the walkers to their trails.
+        """
+        self.trail.push(self.x[:self.count], self.y[:self.count])
+
+    def random_step(self, idx):
+        """
+        Random step between -2 and 2 on both axis.
+        """
+        n = len(idx)
+        self.x[idx] += self.rng.uniform(-2, 2, n)
+        self.y[idx] += self.rng.uniform(-2, 2, n)
+
+    def perlin_step(self, idx):
+        """
+        Step given by the noise, with an occasional random "kick" and a second noise to
+        create more variation.
+        """
+        n = len(idx)
+        if n == 0:
+            return
+
+        # Add scale to make movements more pronounced
+        noise_scale = 5.0
+        noise_x = self.noise_x[idx]
+        noise_y = self.noise_y[idx]
+        noise_x_value = self.noise_generator(noise_x) * noise_scale
+        noise_y_value = self.noise_generator(noise_y) * noise_scale
+
+        # Occasionally add a random "kick" to break patterns
+        kick = self.rng.random(n) < 0.05
+        num_kicks = np.count_nonzero(kick)
+        noise_x_value[kick] += self.rng.uniform(-2, 2, num_kicks)
+        noise_y_value[kick] += self.rng.uniform(-2, 2, num_kicks)
+
+        # Add a second noise to create more variation
+        second_scale = 2.0
+        noise_x_value += self.noise_generator(noise_x * 2.5) * second_scale
+        noise_y_value += self.noise_generator(noise_y * 2.5) * second_scale
+
+        self.x[idx] += noise_x_value
+        self.y[idx] += noise_y_value
+
+        step = self.step_size[idx]
+        self.noise_x[idx] = noise_x + step
+        self.noise_y[idx] = noise_y + step
+
+        # Occasionally change direction in noise space
+        flip = self.rng.random(n) < 0.01
+        self.step_size[idx] = np.where(flip, -step, step)
+
+    def gaussian_step(self, idx):
+        """
+        Step sampled from a gaussian with a new random mean and standard deviation at each step.
+        """
+        n = len(idx)
+        mu = self.rng.uniform(-5, 5, n)
+        sigma = self.rng.uniform(0, 2, n)
+        normal = self.rng.standard_normal((2, n))
+        self.x[idx] += mu + sigma * normal[0]
+        self.y[idx] += mu + sigma * normal[1]
+
+    def check_boundaries(self, WIDTH, HEIGHT, idx = None):
+        """
+        Clamps the walkers back inside the canvas.
+        """
+        if idx is None:
+            idx = slice(0, self.count)
+        x = self.x[idx]
+        y = self.y[idx]
+        np.maximum(x, 0, out=x)
+        np.maximum(y, 0, out=y)
+        out_x = x > WIDTH
+        out_y = y > HEIGHT
+        if out_x.any():
+            x[out_x] = WIDTH - self.size[idx][out_x, 0]
+        if out_y.any():
+            y[out_y] = HEIGHT - self.size[idx][out_y, 1]
+        self.x[idx] = x
+        self.y[idx] = y
+
+    def get_positions(self, i):
+        """
+        Returns the trail of the i-th walker as an array of [x, y] points.
+        """
+        return self.trail.get_trail(i)
+
 
 class Walker():
     """
     Walker class, performs either:
     - random walk, choosing a random step from -1 to 1.
     - random walk with perlin noise, with a given starting noise and step.
+
+    Walkers are views over a slot of a WalkerSwarm, if no swarm is given
+    a private one is created for the walker.
     """
-    def __init__(self, x, y, color, mode, width, height):
-        self.x = x
-        self.y = y
+    def __init__(self, x, y, color, mode, width, height, swarm = None, starting_noise_x = 0, starting_noise_y = 0, step = 0):
+        self.swarm = swarm if swarm is not None else WalkerSwarm(capacity=1)
+        self.index = self.swarm.add_walker(x, y, color, mode, width, height, starting_noise_x, starting_noise_y, step)
         self.color = color
         self.mode = mode
-        self.positions = []
         self.width = width
         self.height = height
 
+    @property
+    def x(self):
+        return self.swarm.x[self.index]
+
+    @x.setter
+    def x(self, value):
+        self.swarm.x[self.index] = value
+
+    @property
+    def y(self):
+        return self.swarm.y[self.index]
+
+    @y.setter
+    def y(self, value):
+        self.swarm.y[self.index] = value
+
+    @property
+    def positions(self):
+        return self.swarm.get_positions(self.index)
 
     def check_boundaries(self, WIDTH, HEIGHT):
-        if self.x < 0:
-            self.x = 0
-        if self.x > WIDTH:
-            self.x = WIDTH - self.width
-        if self.y < 0:
-            self.y = 0
-        if self.y > HEIGHT:
-            self.y = HEIGHT - self.height
+        self.swarm.check_boundaries(WIDTH, HEIGHT, [self.index])
+
+    def randomWalk(self, WIDTH, HEIGHT):
+        """
+        Updates the position of the walker following the chosen mode.
+        The trail is not recorded, see WalkerSwarm.step.
+        """
+        self.swarm.step(WIDTH, HEIGHT, self.index)
 
     def get_walker_mode(self):
         """
@@ -44,96 +325,36 @@ class Walker():
 
 class RandomWalker(Walker):
 
-    def __init__(self, x, y, color, mode, width, height):
-        super().__init__(x, y, color, mode, width, height)
+    def __init__(self, x, y, color, mode, width, height, swarm = None):
+        super().__init__(x, y, color, mode, width, height, swarm)
 
-    def randomWalk(self, WIDTH, HEIGHT):
-        """
-        Updates the position of the walker following the chosen mode.
-        """
 
 
-        walk_x = random.uniform(-2, 2)
-        walk_y = random.uniform(-2, 2)
-        self.x += walk_x
-        self.y += walk_y
-        
-        # Keep walker in bounds
-        self.check_boundaries(WIDTH, HEIGHT)
+class PerlinWalker(Walker):
 
-        self.positions.append([self.x, self.y])
-        if len(self.positions) > 100:
-            self.positions.pop(0)  
+    def __init__(self, x, y, color, mode, width, height, starting_noise_x, starting_noise_y , step, swarm = None):
+        super().__init__(x, y, color, mode, width, height, swarm, starting_noise_x, starting_noise_y, step)
 
+    @property
+    def step(self):
+        return self.swarm.step_size[self.index]
 
-    
-class PerlinWalker(Walker):
+    @property
+    def noise_x(self):
+        return self.swarm.noise_x[self.index]
 
-    def __init__(self, x, y, color, mode, width, height, starting_noise_x, starting_noise_y , step):
-        super().__init__(x, y, color, mode, width, height)
-        self.noise_x = starting_noise_x
-        self.noise_y = starting_noise_y
-        self.step = step
-        self.noise_generator = PerlinNoise()
+    @property
+    def noise_y(self):
+        return self.swarm.noise_y[self.index]
 
     def update_step(self, step_update):
         """
         For Perlin walkers only, updates the step size.
         """
-        self.step += step_update
-
-    def randomWalk(self, WIDTH, HEIGHT):
-        # Add scale to make movements more pronounced
-        noise_scale = 5.0
-        
-        noise_x_value = self.noise_generator(self.noise_x) * noise_scale
-        noise_y_value = self.noise_generator(self.noise_y) * noise_scale
-        
-        # Occasionally add a random "kick" to break patterns
-        if random.random() < 0.05:  # 5% chance of a random kick
-            noise_x_value += random.uniform(-2, 2)
-            noise_y_value += random.uniform(-2, 2)
-        
-        # Add a second noise to create more variation
-        # This variations were introduced because the perlin walkers, seemed pretty "still" in the movement
-        second_scale = 2.0
-        noise_x_value += self.noise_generator(self.noise_x * 2.5) * second_scale
-        noise_y_value += self.noise_generator(self.noise_y * 2.5) * second_scale
-        
-        self.x += noise_x_value
-        self.y += noise_y_value
-        
-        self.noise_x += self.step
-        self.noise_y += self.step
-    
-        # Occasionally change direction in noise space
-        if random.random() < 0.01:
-            self.step = -self.step
-
-
-        # Keep walker in bounds
-        self.check_boundaries(WIDTH, HEIGHT)
-
-        self.positions.append([self.x, self.y])
-        if len(self.positions) > 100:
-            self.positions.pop(0)  
+        self.swarm.update_step(step_update, self.index)
 
 
 class GaussianWalker(Walker):
-    
-    def __init__(self, x, y, color, mode, width, height):
-        super().__init__(x, y, color, mode, width, height)
-        self.mu = random.uniform(-5, 5)
-        self.sigma = random.uniform(0, 2)
-
-    def randomWalk(self, WIDTH, HEIGHT):
-        self.mu = random.uniform(-5, 5)
-        self.sigma = random.uniform(0, 2)
-        self.x += np.random.normal(self.mu, self.sigma)
-        self.y += np.random.normal(self.mu, self.sigma)
-
-        self.check_boundaries(WIDTH, HEIGHT)
 
-        self.positions.append([self.x, self.y])
-        if len(self.positions) > 100:
-            self.positions.pop(0)  
+    def __init__(self, x, y, color, mode, width, height, swarm = None):
+        super().__init__(x, y, color, mode, width, height, swarm)
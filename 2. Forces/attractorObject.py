@@ -56,26 +56,32 @@ class Attractor():
         return [self.radius, self.position, self.color]
     
 
-    def death_of_attractor(self):
+    def death_of_attractor(self, now = None):
         """
         Start the death timer.
 
         This will invoke a constant update which shrinks the attractor until it dies.
         Also if the attractor was spawning (i.e. growing), it will stop that routine
         and start the death routine instead.
+
+        Args:
+            - now -> current time of the SimulationClock, the wall clock if None.
         """
-        self.start_time_of_death = time.time()
-        self.start_time_alive = -1
+        self.start_time_of_death = time.time() if now is None else now
+        self.start_time_spawn = -1
 
-    def check_death_update(self):
+    def check_death_update(self, now = None):
         """
         Updates the dimensions of the attractor untile the death timer is met.
         The attractor will shrink until it is no more.
 
+        Args:
+            - now -> current time of the SimulationClock, the wall clock if None.
+
         Returns a boolean, True -> the attractor died, False -> it's still shrinking
         """
         if self.start_time_of_death != -1:
-            passed_time = time.time() - self.start_time_of_death
+            passed_time = (time.time() if now is None else now) - self.start_time_of_death
 
             if passed_time > self.death_timer:
                 return True
@@ -88,25 +94,31 @@ class Attractor():
 
         return False
     
-    def birth_of_attractor(self):
+    def birth_of_attractor(self, now = None):
         """
         Starts the spawning of the attractor.
 
         This will invoke a constant update which enlarges the attractor
         until it reaches it's full dimension.
+
+        Args:
+            - now -> current time of the SimulationClock, the wall clock if None.
         """
-        self.start_time_spawn = time.time()
+        self.start_time_spawn = time.time() if now is None else now
     
-    def check_spawn_update(self):
+    def check_spawn_update(self, now = None):
         """
         It's the exact opposite of the check_death_update function, it updates the dimensions
         of the attractor until it reaches it's full capacity. While the attractor is growing it's
         still possible to kill it.
 
+        Args:
+            - now -> current time of the SimulationClock, the wall clock if None.
+
         Returns a boolean, True -> the attractor reached it's max dimension, False -> it's still getting bigger
         """
         if self.start_time_spawn != -1:
-            passed_time = time.time() - self.start_time_spawn
+            passed_time = (time.time() if now is None else now) - self.start_time_spawn
             
             if passed_time > self.spawn_timer:
                 return True
@@ -0,0 +1,228 @@
+import numpy as np
+from gravity_kernel import clamped_accelerations
+
+# the cells of the deepest level of the quadtree are 2**MAX_DEPTH times smaller than the root
+MAX_DEPTH = 16
+# cells with at most LEAF_SIZE bodies are not opened, their bodies attract one by one
+LEAF_SIZE = 8
+# groups of bodies walking down the tree at once, bounds the memory of the interaction lists
+CHUNK_GROUPS = 1024
+THETA = 0.5
+
+
+def part_by_one(v):
+    """
+    Spreads the 16 lower bits of v so that there is a zero bit between every two bits.
+    """
+    v = v & 0xFFFF
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+def morton_codes(ix, iy):
+    """
+    Interleaves the bits of the cell coordinates, so that sorting the codes sorts the bodies
+    cell by cell at every level of the quadtree.
+    """
+    return part_by_one(ix) | (part_by_one(iy) << 1)
+
+
+def ragged_ranges(starts, counts):
+    """
+    Returns the concatenation of arange(start, start + count) for every start and count.
+    """
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + np.arange(int(counts.sum())) - offsets
+
+
+class QuadTree():
+    """
+    Quadtree over the bodies, stored as sorted arrays instead of linked nodes.
+
+    The bodies are sorted by their Morton code, so every cell of every level is a contiguous
+    range of the sorted bodies: a level is just the array of the first body of each of its
+    non empty cells. Masses and centers of mass of the cells come from prefix sums, so the tree
+    is built in O(N log N) with a few NumPy calls per level.
+    """
+    def __init__(self, x, y, mass, max_depth = MAX_DEPTH, leaf_size = LEAF_SIZE):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.mass = np.asarray(mass, dtype=float)
+        self.max_depth = max_depth
+        self.leaf_size = leaf_size
+        self.count = len(self.x)
+
+        # square root cell around all the bodies
+        self.x0 = self.x.min()
+        self.y0 = self.y.min()
+        self.size = max(self.x.max() - self.x0, self.y.max() - self.y0, 1e-9)
+        cells = 1 << max_depth
+        ix = np.minimum(((self.x - self.x0) * (cells / self.size)).astype(np.int64), cells - 1)
+        iy = np.minimum(((self.y - self.y0) * (cells / self.size)).astype(np.int64), cells - 1)
+        codes = morton_codes(ix, iy)
+
+        self.order = np.argsort(codes, kind="stable")
+        codes = codes[self.order]
+        # position of every body in the sorted order
+        self.rank = np.empty(self.count, dtype=np.intp)
+        self.rank[self.order] = np.arange(self.count)
+
+        sorted_mass = self.mass[self.order]
+        cum_mass = np.concatenate([[0], np.cumsum(sorted_mass)])
+        cum_mx = np.concatenate([[0], np.cumsum(sorted_mass * self.x[self.order])])
+        cum_my = np.concatenate([[0], np.cumsum(sorted_mass * self.y[self.order])])
+
+        self.starts = []
+        self.ends = []
+        self.cell_mass = []
+        self.com_x = []
+        self.com_y = []
+        for level in range(max_depth + 1):
+            keys = codes >> (2 * (max_depth - level))
+            starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+            ends = np.append(starts[1:], self.count)
+            cell_mass = cum_mass[ends] - cum_mass[starts]
+            self.starts.append(starts)
+            self.ends.append(ends)
+            self.cell_mass.append(cell_mass)
+            self.com_x.append(np.divide(cum_mx[ends] - cum_mx[starts], cell_mass, out=np.zeros(len(starts)), where=cell_mass > 0))
+            self.com_y.append(np.divide(cum_my[ends] - cum_my[starts], cell_mass, out=np.zeros(len(starts)), where=cell_mass > 0))
+
+    def groups(self):
+        """
+        Splits the sorted bodies into groups, the largest cells holding at most leaf_size bodies.
+
+        Returns the ranges starts, ends of the groups in the sorted order.
+        """
+        group_starts = []
+        group_ends = []
+        for level in range(self.max_depth + 1):
+            starts = self.starts[level]
+            ends = self.ends[level]
+            small = (ends - starts <= self.leaf_size) | (level == self.max_depth)
+            # cells inside a group of an upper level
+            if level == 0:
+                covered = np.zeros(len(starts), dtype=bool)
+            else:
+                covered = parent_covered[np.searchsorted(self.starts[level - 1], starts, side="right") - 1]
+            new = small & ~covered
+            group_starts.append(starts[new])
+            group_ends.append(ends[new])
+            parent_covered = small | covered
+            if parent_covered.all():
+                break
+        group_starts = np.concatenate(group_starts)
+        group_ends = np.concatenate(group_ends)
+        order = np.argsort(group_starts)
+        return group_starts[order], group_ends[order]
+
+    def accelerations(self, theta = THETA, G = 1, chunk_groups = CHUNK_GROUPS):
+        """
+        Computes the gravitational acceleration of every body.
+
+        The tree is walked by groups of close bodies rather than body by body. A cell is seen as a
+        single mass at its center of mass when its size is smaller than theta times its distance to
+        the bounding box of the group, so the criterion holds for every body of the group, and never
+        when it overlaps the group. Otherwise it is opened, or its bodies attract one by one if it
+        holds at most leaf_size bodies. With theta = 0 the result is the exact sum over all the pairs.
+
+        Args:
+            - theta (float) : opening angle, the higher the faster and the less accurate.
+            - G (float) : gravitational constant.
+            - chunk_groups (int) : groups walking down the tree at once, bounds the memory.
+
+        Returns the arrays ax, ay.
+        """
+        xs = self.x[self.order]
+        ys = self.y[self.order]
+        ms = self.mass[self.order]
+        group_starts, group_ends = self.groups()
+        box_min_x = np.minimum.reduceat(xs, group_starts)
+        box_max_x = np.maximum.reduceat(xs, group_starts)
+        box_min_y = np.minimum.reduceat(ys, group_starts)
+        box_max_y = np.maximum.reduceat(ys, group_starts)
+
+        # accelerations in the sorted order
+        ax = np.zeros(self.count)
+        ay = np.zeros(self.count)
+        for first in range(0, len(group_starts), chunk_groups):
+            # pairs (group, cell) still to be visited, starting from the root
+            groups = np.arange(first, min(first + chunk_groups, len(group_starts)))
+            nodes = np.zeros(len(groups), dtype=np.intp)
+
+            for level in range(self.max_depth + 1):
+                if len(groups) == 0:
+                    break
+                starts = self.starts[level][nodes]
+                ends = self.ends[level][nodes]
+                g_starts = group_starts[groups]
+                g_ends = group_ends[groups]
+                com_x = self.com_x[level][nodes]
+                com_y = self.com_y[level][nodes]
+
+                # distance between the center of mass and the bounding box of the group
+                dx = np.maximum(np.maximum(box_min_x[groups] - com_x, com_x - box_max_x[groups]), 0)
+                dy = np.maximum(np.maximum(box_min_y[groups] - com_y, com_y - box_max_y[groups]), 0)
+                overlap = (starts < g_ends) & (g_starts < ends)
+                cell_size = self.size / (1 << level)
+                far = ~overlap & (cell_size * cell_size < theta * theta * (dx * dx + dy * dy))
+
+                # every body of the group is pulled by the center of mass of the far cells
+                counts = g_ends[far] - g_starts[far]
+                targets = ragged_ranges(g_starts[far], counts)
+                far_nodes = np.repeat(nodes[far], counts)
+                self.add_pull(targets, self.com_x[level][far_nodes], self.com_y[level][far_nodes],
+                              self.cell_mass[level][far_nodes], xs, ys, G, ax, ay)
+
+                near = ~far
+                leaf = near & ((ends - starts <= self.leaf_size) | (level == self.max_depth))
+                # bodies of the group times bodies of the cell
+                group_counts = g_ends[leaf] - g_starts[leaf]
+                targets = ragged_ranges(g_starts[leaf], group_counts)
+                cell_counts = np.repeat(ends[leaf] - starts[leaf], group_counts)
+                sources = ragged_ranges(np.repeat(starts[leaf], group_counts), cell_counts)
+                targets = np.repeat(targets, cell_counts)
+                other = sources != targets
+                sources = sources[other]
+                self.add_pull(targets[other], xs[sources], ys[sources], ms[sources], xs, ys, G, ax, ay)
+
+                # open the other cells, their children are the cells of the next level inside their range
+                opened = near & ~leaf
+                if level < self.max_depth:
+                    child_first = np.searchsorted(self.starts[level + 1], starts[opened])
+                    child_last = np.searchsorted(self.starts[level + 1], ends[opened])
+                    counts = child_last - child_first
+                    groups = np.repeat(groups[opened], counts)
+                    nodes = ragged_ranges(child_first, counts)
+
+        # back to the order of the bodies
+        return ax[self.rank], ay[self.rank]
+
+    def add_pull(self, targets, source_x, source_y, source_mass, xs, ys, G, ax, ay):
+        """
+        Adds the pull of the sources on the targets, all indexed in the sorted order.
+        """
+        fx, fy = clamped_accelerations(source_x - xs[targets], source_y - ys[targets], source_mass, G)
+        ax += np.bincount(targets, weights=fx, minlength=self.count)
+        ay += np.bincount(targets, weights=fy, minlength=self.count)
+
+
+def gravity_accelerations(x, y, mass, theta = THETA, G = 1):
+    """
+    Barnes-Hut approximation of the pull of all the bodies on each other, with the
+    distance clamp of Body.attract.
+
+    Args:
+        - x, y (np.array) : positions of the bodies.
+        - mass (np.array) : masses of the bodies.
+        - theta (float) : opening angle, 0 gives the exact pairwise sum.
+        - G (float) : gravitational constant.
+
+    Returns the arrays ax, ay of the accelerations, i.e. the forces divided by the mass of each body.
+    """
+    if len(x) == 0:
+        return np.zeros(0), np.zeros(0)
+    return QuadTree(x, y, mass).accelerations(theta, G)
@@ -0,0 +1,90 @@
+import argparse
+import time
+import tracemalloc
+import pygame
+from moverObject import Mover
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Cost of the physics step and memory of the movers, before and after the slotted Kinematics base.")
+    parser.add_argument("--objects", type=int, default=10000, help="number of movers")
+    parser.add_argument("--steps", type=int, default=100, help="steps timed per repeat")
+    parser.add_argument("--repeats", type=int, default=5, help="repeats per measure, the fastest is kept")
+    return parser.parse_args()
+
+
+class ReferenceMover():
+    """
+    The mover before Kinematics: attributes in a __dict__, a copy of every force and a new rect at every update.
+    """
+    def __init__(self, x, y, color, radius, mass = 1):
+        self.color = color
+        self.radius = radius
+        self.__mass = mass
+        self.rect = pygame.Rect(x - radius, y - radius, radius*2, radius*2)
+        self.friction_coef = 0.7
+        self.original_coef = 0.7
+        self.__elastiticy = -0.9
+        self.__position = pygame.Vector2(x, y)
+        self.__velocity = pygame.Vector2(0, 0)
+        self.__acceleration = pygame.Vector2(0, 0)
+
+    @property
+    def velocity(self):
+        return self.__velocity
+
+    @property
+    def acceleration(self):
+        return self.__acceleration
+
+    def apply_force(self, force):
+        force_copy = force.copy()
+        f = force_copy / self.__mass
+        self.__acceleration += f
+
+    def update_position(self, dt = 1):
+        self.__velocity += self.acceleration * dt
+        self.__position += self.velocity * dt
+        self.__acceleration *= 0
+        self.rect = pygame.Rect(self.__position.x - self.radius, self.__position.y - self.radius, self.radius*2, self.radius*2)
+
+
+def create(mover_class, num_objects):
+    return [mover_class(i % 640, i % 480, (255, 255, 255), 5, 1 + i % 3) for i in range(num_objects)]
+
+
+def memory_per_object(mover_class, num_objects):
+    """
+    Returns the bytes allocated per mover, vectors and rect included.
+    """
+    tracemalloc.start()
+    movers = create(mover_class, num_objects)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del movers
+    return size / num_objects
+
+
+def step_time(movers, steps, repeats):
+    """
+    Returns the fastest time of a step (a force and an update) per mover, in microseconds.
+    """
+    gravity = pygame.Vector2(0, 0.1)
+    best = float("inf")
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        for _ in range(steps):
+            for mover in movers:
+                mover.apply_force(gravity)
+                mover.update_position()
+        best = min(best, time.perf_counter() - start_time)
+    return best / steps / len(movers) * 1e6
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"{'class':>15} {'bytes/object':>12} {'us/step':>8}")
+    for mover_class in (ReferenceMover, Mover):
+        memory = memory_per_object(mover_class, args.objects)
+        seconds = step_time(create(mover_class, args.objects), args.steps, args.repeats)
+        print(f"{mover_class.__name__:>15} {memory:>12.0f} {seconds:>8.2f}")
@@ -0,0 +1,76 @@
+import argparse
+import csv
+import os
+import time
+import numpy as np
+import gravity_kernel
+import parallel_gravity
+import compare_gravity
+
+COLUMNS = ["bodies", "workers", "seconds", "speedup", "efficiency", "max_difference"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scaling of the shared memory parallel gravity with the number of worker processes.")
+    parser.add_argument("--bodies", type=int, nargs="+", default=[20000, 50000], help="numbers of bodies to benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="numbers of worker processes to compare")
+    parser.add_argument("--repeats", type=int, default=3, help="steps timed per configuration, the fastest is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="optional CSV file of the results")
+    return parser.parse_args()
+
+
+def fastest_step(solver, x, y, mass, repeats):
+    """
+    Returns the accelerations of the last step and the fastest time of repeats steps.
+    """
+    best = np.inf
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        ax, ay = solver(x, y, mass)
+        best = min(best, time.perf_counter() - start_time)
+    return (ax, ay), best
+
+
+def benchmark(num_bodies, workers_counts, repeats = 3, seed = 0):
+    """
+    Times a step of the single process kernel and of ParallelGravity with every number of workers.
+    The speedup is relative to the single process kernel, the efficiency is the speedup per worker
+    and max_difference the largest difference with the single process accelerations.
+
+    Returns the rows of the benchmark.
+    """
+    x, y, mass = compare_gravity.random_bodies(num_bodies, seed)
+    (exact_ax, exact_ay), serial_time = fastest_step(gravity_kernel.gravity_accelerations, x, y, mass, repeats)
+    rows = [{"bodies": num_bodies, "workers": 0, "seconds": serial_time, "speedup": 1.0, "efficiency": 1.0, "max_difference": 0.0}]
+
+    for workers in workers_counts:
+        solver = parallel_gravity.ParallelGravity(workers, capacity=num_bodies)
+        try:
+            (ax, ay), seconds = fastest_step(solver, x, y, mass, repeats)
+        finally:
+            solver.close()
+        rows.append({"bodies": num_bodies, "workers": workers, "seconds": seconds,
+                     "speedup": serial_time / seconds, "efficiency": serial_time / seconds / workers,
+                     "max_difference": max(np.abs(ax - exact_ax).max(), np.abs(ay - exact_ay).max())})
+    return rows
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"{os.cpu_count()} cores available, workers 0 is the single process kernel")
+    rows = []
+    for num_bodies in args.bodies:
+        rows += benchmark(num_bodies, args.workers, args.repeats, args.seed)
+
+    print(f"{'bodies':>7} {'workers':>7} {'seconds':>9} {'speedup':>8} {'efficiency':>10} {'max diff':>9}")
+    for row in rows:
+        print(f"{row['bodies']:>7} {row['workers']:>7} {row['seconds']:>9.3f} {row['speedup']:>8.2f} "
+              f"{row['efficiency']:>10.0%} {row['max_difference']:>9.1e}")
+
+    if args.out is not None:
+        with open(args.out, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Benchmark written to {args.out}")
@@ -1,24 +1,20 @@
 import pygame
 import time
+from kinematics import Kinematics
+
+class Body(Kinematics):
+    __slots__ = ("G", "color", "total_radius", "start_time_spawn", "spawn_timer")
 
-class Body():
     def __init__(self, x: int, y: int, color: tuple, radius: int, mass = 1, velocity = None, acceleration = None):
         """
         A fusion between both mover and attractor, it exerts a gravitational force but
-        can also be attracted by it.
+        can also be attracted by it. The physics step comes from Kinematics.
         """
+        super().__init__(x, y, radius, mass, velocity, acceleration)
 
         self.G = 1
-        self.mass = mass        
         self.color = color
 
-        self.rect = pygame.Rect(x - radius, y - radius, radius*2, radius*2)
-        self.radius = radius 
-
-        self.position = pygame.Vector2(x, y)
-        self.velocity = velocity if velocity is not None else pygame.Vector2(0, 0)
-        self.acceleration = acceleration if acceleration is not None else pygame.Vector2(0, 0)
-
         self.total_radius = radius
 
         self.start_time_spawn = -1   
@@ -58,45 +54,31 @@ class Body():
         """
         return [self.radius, self.position, self.rect, self.color]
     
-    def apply_force(self, force: pygame.Vector2):
-        """
-        Applies a force on the Body object (i.e. gravity), follows Newton's formula F = m x A
-
-        Args:
-            - force -> force to be applied
-        """
-        force_copy = force.copy()
-        f = force_copy / self.mass  
-        self.acceleration += f 
-
-    def update_position(self):
-        """
-        Updates the position of the Body, used after a force is applied via apply_force().
-        """
-        self.velocity += self.acceleration
-        self.position += self.velocity
-        self.acceleration *= 0 
-        self.rect = pygame.Rect(self.position.x - self.radius, self.position.y - self.radius, self.radius*2, self.radius*2)
-
-    def birth_of_body(self):
+    def birth_of_body(self, now = None):
         """
         Starts the spawning of the body.
 
         This will invoke a constant update which enlarges the body
         until it reaches it's full dimension.
+
+        Args:
+            - now -> current time of the SimulationClock, the wall clock if None.
         """
-        self.start_time_spawn = time.time()
+        self.start_time_spawn = time.time() if now is None else now
     
-    def check_spawn_update(self):
+    def check_spawn_update(self, now = None):
         """
         It's the exact opposite of the check_death_update function, it updates the dimensions
         of the body until it reaches it's full capacity. While the body is growing it's
         still possible to kill it.
 
+        Args:
+            - now -> current time of the SimulationClock, the wall clock if None.
+
         Returns a boolean, True -> the body reached it's max dimension, False -> it's still getting bigger
         """
         if self.start_time_spawn != -1:
-            passed_time = time.time() - self.start_time_spawn
+            passed_time = (time.time() if now is None else now) - self.start_time_spawn
             
             if passed_time > self.spawn_timer:
                 return True
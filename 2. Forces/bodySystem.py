@@ -0,0 +1,169 @@
+import numpy as np
+import time
+import collisions
+
+# per body arrays of a BodySystem
+ARRAYS = ('x', 'y', 'vx', 'vy', 'mass', 'radius', 'total_radius', 'color', 'start_time_spawn')
+
+class BodySystem():
+    """
+    Struct-of-arrays version of Body, for N-body simulations with thousands of bodies.
+
+    Positions, velocities, masses, radii and colors are kept in NumPy arrays so that the
+    gravity solvers work on all the bodies at once and every body is moved in a single step.
+    The spawn animation of Body is kept: a spawning body grows from radius 0 to its full
+    radius in spawn_timer seconds, its mass growing with it.
+
+    Args:
+        - capacity (int) -> initial size of the arrays, doubled when full.
+        - G (float) -> gravitational constant.
+        - mass_scale (float) -> mass of a body per unit of radius*2, 1 like Body.
+    """
+    def __init__(self, capacity = 1024, G = 1, mass_scale = 1):
+        self.G = G
+        self.mass_scale = mass_scale
+        self.count = 0
+        self.capacity = max(1, capacity)
+        self.spawn_timer = 1
+
+        self.x = np.zeros(self.capacity)
+        self.y = np.zeros(self.capacity)
+        self.vx = np.zeros(self.capacity)
+        self.vy = np.zeros(self.capacity)
+        self.mass = np.zeros(self.capacity)
+        self.radius = np.zeros(self.capacity)
+        self.total_radius = np.zeros(self.capacity)
+        self.color = np.zeros((self.capacity, 3), dtype=np.uint8)
+        # -1 for the bodies which are not spawning
+        self.start_time_spawn = np.full(self.capacity, -1.0)
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        """
+        Doubles the capacity of every array of the system.
+        """
+        self.capacity *= 2
+        for name in ARRAYS:
+            old = getattr(self, name)
+            new = np.zeros((self.capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add_bodies(self, x, y, colors, radius, mass, spawning = False, now = None):
+        """
+        Adds many bodies at once, every argument is either an array with one value per body
+        or a value shared by all of them.
+
+        Args:
+            - x, y (np.array) -> positions of the bodies.
+            - colors (np.array) -> (N, 3) colors.
+            - radius (np.array) -> full radius of the bodies.
+            - mass (np.array) -> mass of the bodies.
+            - spawning (bool) -> if True the bodies start growing like Body.birth_of_body.
+            - now (float) -> current time of the SimulationClock, the wall clock if None.
+
+        Returns the indices of the new bodies.
+        """
+        n = len(x)
+        while self.count + n > self.capacity:
+            self.grow()
+
+        idx = np.arange(self.count, self.count + n)
+        self.x[idx] = x
+        self.y[idx] = y
+        self.vx[idx] = 0
+        self.vy[idx] = 0
+        self.mass[idx] = mass
+        self.radius[idx] = radius
+        self.total_radius[idx] = radius
+        self.color[idx] = colors
+        if now is None:
+            now = time.time()
+        self.start_time_spawn[idx] = now if spawning else -1
+        self.count += n
+        return idx
+
+    def add_body(self, x, y, color, radius, mass = 1, spawning = False, now = None):
+        """
+        Adds a single body, see add_bodies.
+        """
+        return self.add_bodies([x], [y], [color], radius, mass, spawning, now)[0]
+
+    def remove(self, mask):
+        """
+        Removes the bodies where mask is True, the other bodies keep their order.
+        """
+        keep = np.flatnonzero(~mask)
+        for name in ARRAYS:
+            array = getattr(self, name)
+            array[:len(keep)] = array[keep]
+        self.count = len(keep)
+
+    def out_of_bounds(self, WIDTH, HEIGHT, margin = 20):
+        """
+        Returns a mask of the bodies out of the canvas, like main.out_of_bounds.
+        """
+        x = self.x[:self.count]
+        y = self.y[:self.count]
+        return (x < -margin) | (x > WIDTH + margin) | (y < -margin) | (y > HEIGHT + margin)
+
+    def check_spawn_update(self, now = None):
+        """
+        Vectorized Body.check_spawn_update, grows the spawning bodies.
+
+        Args:
+            - now (float) -> current time of the SimulationClock, the wall clock if None.
+        """
+        if now is None:
+            now = time.time()
+        start = self.start_time_spawn[:self.count]
+        spawning = np.flatnonzero((start != -1) & (now - start <= self.spawn_timer))
+        if len(spawning) == 0:
+            return
+        passed_time = now - start[spawning]
+        self.radius[spawning] = (1 - ((self.spawn_timer - passed_time) / self.spawn_timer)) * self.total_radius[spawning]
+        self.mass[spawning] = np.maximum(0.1, self.radius[spawning] * 2) * self.mass_scale
+
+    def collide(self, mode = "bounce", restitution = collisions.RESTITUTION):
+        """
+        Bounces or merges the overlapping bodies, see collisions.collide. A body which absorbed
+        others stops spawning and keeps its new radius and mass, the absorbed bodies are removed.
+
+        Args:
+            - mode (str) -> one of collisions.COLLISION_MODES.
+            - restitution (float) -> restitution of the bounces, 1 is elastic.
+
+        Returns the number of colliding pairs.
+        """
+        n = self.count
+        collided, survivors, absorbed = collisions.collide(self.x[:n], self.y[:n], self.vx[:n], self.vy[:n],
+                                                           self.mass[:n], self.radius[:n], mode, restitution)
+        if len(survivors) > 0:
+            self.total_radius[survivors] = self.radius[survivors]
+            self.start_time_spawn[survivors] = -1
+            self.remove(absorbed)
+        return collided
+
+    def integrate(self, acceleration, integrator):
+        """
+        Moves all the bodies by one frame of the integrator.
+
+        Args:
+            - acceleration (function) -> acceleration(x, y) -> ax, ay of the bodies at the given positions,
+              masses are read from the system.
+            - integrator (Integrator) -> integration method, timestep and substeps.
+        """
+        n = self.count
+        integrator.step(self.x[:n], self.y[:n], self.vx[:n], self.vy[:n], acceleration)
+
+    def update_positions(self, ax, ay):
+        """
+        Moves all the bodies given their accelerations, same semi-implicit Euler step as Body.update_position.
+        """
+        n = self.count
+        self.vx[:n] += ax
+        self.vy[:n] += ay
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
@@ -0,0 +1,190 @@
+import numpy as np
+from barnes_hut import ragged_ranges
+
+# "none" lets the circles pass through each other, "bounce" makes them collide elastically
+# and "merge" fuses the touching circles into one, conserving mass and momentum (accretion)
+COLLISION_MODES = ["none", "bounce", "merge"]
+# fraction of the approaching speed kept after a bounce, 1 is elastic
+RESTITUTION = 1
+
+
+def candidate_pairs(x, y, radius, cell_size = None):
+    """
+    Broad phase on a uniform grid: the circles are sorted by the cell of their center, and
+    every circle is paired with the circles of its own cell and of four of its neighbours,
+    so that every pair of neighbouring cells is visited once. With cells as wide as the largest
+    circle two touching circles are always in neighbouring cells.
+
+    The cost is O(N log N) for the sort plus the number of pairs, i.e. close to O(N) unless
+    many circles are piled up in the same cells.
+
+    Args:
+        - x, y (np.array) : centers of the circles.
+        - radius (np.array) : radii of the circles.
+        - cell_size (float) : side of the cells, twice the largest radius if None.
+
+    Returns the arrays i, j of the indices of the candidate pairs, each pair appears once.
+    """
+    n = len(x)
+    if n < 2:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    if cell_size is None:
+        cell_size = max(2 * float(np.max(radius)), 1e-6)
+
+    ix = np.floor(np.asarray(x) / cell_size).astype(np.int64)
+    iy = np.floor(np.asarray(y) / cell_size).astype(np.int64)
+    ix -= ix.min()
+    # one empty row above and below, so that the neighbours of a cell never wrap to the next column
+    iy -= iy.min() - 1
+    stride = int(iy.max()) + 2
+    keys = ix * stride + iy
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    positions = np.arange(n)
+
+    pairs_i = []
+    pairs_j = []
+    # own cell, then the neighbours (0, 1), (1, -1), (1, 0) and (1, 1)
+    for offset in (0, 1, stride - 1, stride, stride + 1):
+        if offset == 0:
+            # only the circles after this one in the sorted order, so a pair is not visited twice
+            starts = positions + 1
+        else:
+            starts = np.searchsorted(sorted_keys, sorted_keys + offset, side="left")
+        ends = np.searchsorted(sorted_keys, sorted_keys + offset, side="right")
+        counts = np.maximum(ends - starts, 0)
+        pairs_i.append(order[np.repeat(positions, counts)])
+        pairs_j.append(order[ragged_ranges(starts, counts)])
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def overlapping_pairs(x, y, radius, cell_size = None):
+    """
+    Returns the arrays i, j of the indices of the pairs of circles which overlap.
+    """
+    i, j = candidate_pairs(x, y, radius, cell_size)
+    dx = x[j] - x[i]
+    dy = y[j] - y[i]
+    touching = dx * dx + dy * dy < (radius[i] + radius[j])**2
+    return i[touching], j[touching]
+
+
+def bounce(x, y, vx, vy, mass, radius, i, j, restitution = RESTITUTION):
+    """
+    Narrow phase of the bounces, the arrays are updated in place.
+
+    The circles of every approaching pair exchange an impulse along the line between their centers,
+    which conserves the momentum and, with restitution 1, the kinetic energy. The overlapping circles
+    are then pushed apart, the lighter one moving more. The pairs are solved all at once, so the impulse
+    of a pair is divided by the number of contacts of its busiest circle, otherwise a circle touching
+    several others would be pushed by all of them and the pile would gain energy.
+    """
+    dx = x[j] - x[i]
+    dy = y[j] - y[i]
+    distance = np.hypot(dx, dy)
+    # circles at the same position are pushed apart along x
+    same = distance == 0
+    distance[same] = 1
+    dx[same] = 1
+    nx = dx / distance
+    ny = dy / distance
+
+    inverse_i = 1 / mass[i]
+    inverse_j = 1 / mass[j]
+    approaching_speed = (vx[j] - vx[i]) * nx + (vy[j] - vy[i]) * ny
+    contacts = np.bincount(i, minlength=len(x)) + np.bincount(j, minlength=len(x))
+    busiest = np.maximum(contacts[i], contacts[j])
+    impulse = np.where(approaching_speed < 0, -(1 + restitution) * approaching_speed / (inverse_i + inverse_j), 0) / busiest
+    np.add.at(vx, i, -impulse * inverse_i * nx)
+    np.add.at(vy, i, -impulse * inverse_i * ny)
+    np.add.at(vx, j, impulse * inverse_j * nx)
+    np.add.at(vy, j, impulse * inverse_j * ny)
+
+    overlap = radius[i] + radius[j] - distance
+    share_i = inverse_i / (inverse_i + inverse_j)
+    np.add.at(x, i, -overlap * share_i * nx)
+    np.add.at(y, i, -overlap * share_i * ny)
+    np.add.at(x, j, overlap * (1 - share_i) * nx)
+    np.add.at(y, j, overlap * (1 - share_i) * ny)
+
+
+def merge(x, y, vx, vy, mass, radius, i, j):
+    """
+    Narrow phase of the accretion, the arrays are updated in place.
+
+    The touching circles form clusters, chains included, and every cluster becomes its heaviest circle
+    placed at the center of mass of the cluster, with its total mass and momentum and with the total area.
+
+    Returns the indices of the circles which absorbed others and a mask of the absorbed circles,
+    which the caller removes.
+    """
+    n = len(x)
+    absorbed = np.zeros(n, dtype=bool)
+    if len(i) == 0:
+        return np.zeros(0, dtype=np.intp), absorbed
+
+    # connected components: every circle takes the lowest label of the circles it touches until nothing changes
+    labels = np.arange(n)
+    while True:
+        lowest = np.minimum(labels[i], labels[j])
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, i, lowest)
+        np.minimum.at(new_labels, j, lowest)
+        new_labels = new_labels[new_labels]
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+    clustered = np.unique(np.concatenate([i, j]))
+    cluster = labels[clustered]
+    # heaviest circle of every cluster, it keeps its color
+    by_mass = clustered[np.lexsort((-mass[clustered], cluster))]
+    first = np.r_[True, labels[by_mass][1:] != labels[by_mass][:-1]]
+    survivors = by_mass[first]
+    survivor_of = np.zeros(n, dtype=np.intp)
+    survivor_of[labels[survivors]] = survivors
+    target = survivor_of[cluster]
+
+    total_mass = np.bincount(target, weights=mass[clustered], minlength=n)[survivors]
+    for position, velocity in ((x, vx), (y, vy)):
+        center = np.bincount(target, weights=mass[clustered] * position[clustered], minlength=n)[survivors]
+        momentum = np.bincount(target, weights=mass[clustered] * velocity[clustered], minlength=n)[survivors]
+        position[survivors] = center / total_mass
+        velocity[survivors] = momentum / total_mass
+    radius[survivors] = np.sqrt(np.bincount(target, weights=radius[clustered]**2, minlength=n)[survivors])
+    mass[survivors] = total_mass
+
+    absorbed[clustered] = True
+    absorbed[survivors] = False
+    return survivors, absorbed
+
+
+def collide(x, y, vx, vy, mass, radius, mode, restitution = RESTITUTION):
+    """
+    Finds the overlapping circles and bounces or merges them, the arrays are updated in place.
+
+    Args:
+        - x, y, vx, vy (np.array) : positions and velocities of the circles.
+        - mass, radius (np.array) : masses and radii of the circles.
+        - mode (str) : one of COLLISION_MODES.
+        - restitution (float) : restitution of the bounces.
+
+    Returns the number of colliding pairs, the indices of the circles which absorbed others and
+    the mask of the absorbed circles (both empty unless mode is "merge").
+    """
+    if mode not in COLLISION_MODES:
+        raise ValueError(f"unknown collision mode {mode}, expected one of {COLLISION_MODES}")
+    survivors = np.zeros(0, dtype=np.intp)
+    absorbed = np.zeros(len(x), dtype=bool)
+    if mode == "none":
+        return 0, survivors, absorbed
+
+    i, j = overlapping_pairs(x, y, radius)
+    if len(i) == 0:
+        return 0, survivors, absorbed
+    if mode == "bounce":
+        bounce(x, y, vx, vy, mass, radius, i, j, restitution)
+    else:
+        survivors, absorbed = merge(x, y, vx, vy, mass, radius, i, j)
+    return len(i), survivors, absorbed
@@ -0,0 +1,91 @@
+import argparse
+import csv
+import time
+import numpy as np
+import barnes_hut
+import gravity_kernel
+import particle_mesh
+import main
+
+COLUMNS = ["bodies", "solver", "parameter", "seconds", "speedup", "median_error", "p99_error", "max_error"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Accuracy and speed of the approximate gravity solvers against the exact all pairs kernel.")
+    parser.add_argument("--bodies", type=int, nargs="+", default=[1000, 5000], help="numbers of bodies to compare on")
+    parser.add_argument("--thetas", type=float, nargs="+", default=[0.3, 0.5, 0.7], help="opening angles of Barnes-Hut")
+    parser.add_argument("--cell-sizes", type=float, nargs="+", default=[1, 2, 4], help="cell sizes of the particle mesh")
+    parser.add_argument("--softening", type=float, default=particle_mesh.SOFTENING, help="softening of the particle mesh")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="optional CSV file of the results")
+    return parser.parse_args()
+
+
+def random_bodies(num_bodies, seed):
+    """
+    Bodies placed and weighted like in main.body_system_main.
+    """
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(100, main.WIDTH - 100, num_bodies)
+    y = rng.uniform(100, main.HEIGHT - 100, num_bodies)
+    mass = rng.integers(2, 11, num_bodies) * 2.0
+    return x, y, mass
+
+
+def relative_errors(ax, ay, exact_ax, exact_ay):
+    """
+    Returns the norm of the error of every acceleration divided by the norm of the exact one.
+    """
+    exact = np.hypot(exact_ax, exact_ay)
+    return np.hypot(ax - exact_ax, ay - exact_ay) / np.maximum(exact, 1e-12)
+
+
+def timed(solver, *args):
+    start_time = time.perf_counter()
+    result = solver(*args)
+    return result, time.perf_counter() - start_time
+
+
+def compare(num_bodies, thetas, cell_sizes, softening = particle_mesh.SOFTENING, seed = 0):
+    """
+    Compares Barnes-Hut and the particle mesh with the exact kernel on random bodies.
+
+    Returns the rows of the comparison, one per solver and parameter.
+    """
+    x, y, mass = random_bodies(num_bodies, seed)
+    (exact_ax, exact_ay), exact_time = timed(gravity_kernel.gravity_accelerations, x, y, mass)
+    rows = [{"bodies": num_bodies, "solver": "all_pairs", "parameter": "", "seconds": exact_time, "speedup": 1.0,
+             "median_error": 0.0, "p99_error": 0.0, "max_error": 0.0}]
+
+    runs = [("barnes_hut", theta, lambda theta=theta: barnes_hut.gravity_accelerations(x, y, mass, theta)) for theta in thetas]
+    for cell_size in cell_sizes:
+        # same rectangle as in main.body_system_main, building the mesh is not timed as it is done once
+        mesh = particle_mesh.ParticleMesh(-20, -20, main.WIDTH + 40, main.HEIGHT + 40, cell_size, softening)
+        runs.append(("particle_mesh", cell_size, lambda mesh=mesh: mesh.accelerations(x, y, mass)))
+
+    for solver, parameter, run in runs:
+        (ax, ay), seconds = timed(run)
+        errors = relative_errors(ax, ay, exact_ax, exact_ay)
+        rows.append({"bodies": num_bodies, "solver": solver, "parameter": parameter, "seconds": seconds,
+                     "speedup": exact_time / seconds, "median_error": np.median(errors),
+                     "p99_error": np.percentile(errors, 99), "max_error": errors.max()})
+    return rows
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    rows = []
+    for num_bodies in args.bodies:
+        rows += compare(num_bodies, args.thetas, args.cell_sizes, args.softening, args.seed)
+
+    print(f"{'bodies':>7} {'solver':>14} {'param':>6} {'seconds':>9} {'speedup':>8} {'median':>8} {'p99':>8} {'max':>8}")
+    for row in rows:
+        print(f"{row['bodies']:>7} {row['solver']:>14} {row['parameter']:>6} {row['seconds']:>9.4f} {row['speedup']:>8.1f} "
+              f"{row['median_error']:>8.2%} {row['p99_error']:>8.2%} {row['max_error']:>8.2%}")
+
+    if args.out is not None:
+        with open(args.out, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Comparison written to {args.out}")
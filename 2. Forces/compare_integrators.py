@@ -0,0 +1,104 @@
+import argparse
+import csv
+import time
+import numpy as np
+import gravity_kernel
+import integrators
+import main
+
+COLUMNS = ["integrator", "dt", "steps", "force_evaluations", "evaluations_per_time", "max_energy_drift",
+           "momentum_drift", "position_error", "seconds"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Energy conservation and accuracy of the integrators on a headless N-body run.")
+    parser.add_argument("--bodies", type=int, default=30, help="number of bodies")
+    parser.add_argument("--time", type=float, default=100, help="simulated time, 1 is a frame of the original simulation")
+    parser.add_argument("--dts", type=float, nargs="+", default=[0.25, 0.5, 1, 2, 4], help="timesteps to compare")
+    parser.add_argument("--integrators", nargs="+", default=list(integrators.INTEGRATORS), choices=list(integrators.INTEGRATORS))
+    parser.add_argument("--reference-dt", type=float, default=0.05, help="timestep of the RK4 reference run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="optional CSV file of the results")
+    return parser.parse_args()
+
+
+def random_bodies(num_bodies, seed):
+    """
+    Bodies placed and weighted like in main.simulation3_main, at rest.
+    """
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(100, main.WIDTH - 100, num_bodies)
+    y = rng.uniform(100, main.HEIGHT - 100, num_bodies)
+    mass = rng.integers(2, 11, num_bodies) * 2.0
+    return x, y, mass
+
+
+def run(method, dt, total_time, x, y, mass):
+    """
+    Integrates the bodies for total_time with the exact kernel, without removing the bodies leaving the canvas.
+
+    Returns the final positions, the integrator, the total and kinetic energy at every step and the final momentum.
+    """
+    x = x.copy()
+    y = y.copy()
+    vx = np.zeros_like(x)
+    vy = np.zeros_like(y)
+    integrator = integrators.Integrator(method, dt)
+    acceleration = lambda x, y: gravity_kernel.gravity_accelerations(x, y, mass)
+
+    diagnostics = [integrators.diagnostics(x, y, vx, vy, mass)]
+    for _ in range(int(round(total_time / dt))):
+        integrator.step(x, y, vx, vy, acceleration)
+        diagnostics.append(integrators.diagnostics(x, y, vx, vy, mass))
+    energies = np.array([d["energy"] for d in diagnostics])
+    kinetic = np.array([d["kinetic"] for d in diagnostics])
+    momentum = np.hypot(np.sum(mass * vx), np.sum(mass * vy))
+    return x, y, integrator, energies, kinetic, momentum
+
+
+def compare(args):
+    """
+    Runs every integrator with every timestep and measures the drift of the energy and of the momentum,
+    and the mean distance of the final positions to an RK4 run with a small timestep.
+
+    Returns the rows of the comparison.
+    """
+    x0, y0, mass = random_bodies(args.bodies, args.seed)
+    ref_x, ref_y, _, _, _, _ = run("rk4", args.reference_dt, args.time, x0, y0, mass)
+
+    rows = []
+    for method in args.integrators:
+        for dt in args.dts:
+            start_time = time.perf_counter()
+            x, y, integrator, energies, kinetic, momentum = run(method, dt, args.time, x0, y0, mass)
+            seconds = time.perf_counter() - start_time
+            rows.append({
+                "integrator": method,
+                "dt": dt,
+                "steps": len(energies) - 1,
+                "force_evaluations": integrator.force_evaluations,
+                "evaluations_per_time": integrator.force_evaluations / args.time,
+                # the potential is only defined up to a constant, so the drift is relative to the kinetic energy
+                "max_energy_drift": np.max(np.abs(energies - energies[0])) / kinetic.max(),
+                "momentum_drift": momentum,
+                "position_error": np.mean(np.hypot(x - ref_x, y - ref_y)),
+                "seconds": seconds
+            })
+    return rows
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    rows = compare(args)
+
+    print(f"{'integrator':>10} {'dt':>5} {'evals/time':>10} {'energy drift':>12} {'momentum':>9} {'pos error':>9} {'seconds':>8}")
+    for row in rows:
+        print(f"{row['integrator']:>10} {row['dt']:>5} {row['evaluations_per_time']:>10.2f} {row['max_energy_drift']:>12.3%} "
+              f"{row['momentum_drift']:>9.2e} {row['position_error']:>9.3f} {row['seconds']:>8.2f}")
+
+    if args.out is not None:
+        with open(args.out, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Comparison written to {args.out}")
@@ -0,0 +1,117 @@
+import numpy as np
+import gravity_kernel
+
+# side of the cells of the field, in pixels
+FIELD_CELL_SIZE = 4
+# the field extends this far out of the canvas, like the margin of main.out_of_bounds
+FIELD_MARGIN = 20
+# movers closer than this to an attractor get the exact pull, i.e. within the distance clamp of Attractor.attract
+EXACT_DISTANCE = gravity_kernel.MIN_DISTANCE
+
+
+class ForceField():
+    """
+    Gravitational field of static attractors sampled on a regular grid.
+
+    The pull of the attractors is computed once on the nodes of the grid with the exact kernel,
+    then the acceleration of any number of movers is the bilinear interpolation of the four nodes
+    around them, O(1) per mover whatever the number of attractors. Within the 20 px clamp of
+    Attractor.attract the pull has a constant magnitude and points at the attractor, so it flips
+    direction across it and the nodes on either side cancel out: the cells closer than EXACT_DISTANCE
+    to an attractor are flagged when the grid is built, and the movers in them get the exact pull instead.
+
+    The grid is rebuilt by update only when the attractors change, i.e. when one spawns, dies
+    or changes radius or mass, which happens every frame only while an attractor is growing or shrinking.
+
+    Args:
+        - x0, y0 (float) : top left corner of the grid, movers outside of it are clamped to its border.
+        - width, height (float) : size of the grid.
+        - cell_size (float) : side of the cells, the smaller the more accurate.
+    """
+    def __init__(self, x0, y0, width, height, cell_size = FIELD_CELL_SIZE):
+        self.x0 = x0
+        self.y0 = y0
+        self.cell_size = cell_size
+        self.nx = int(np.ceil(width / cell_size)) + 1
+        self.ny = int(np.ceil(height / cell_size)) + 1
+        self.field_x = np.zeros((self.nx, self.ny))
+        self.field_y = np.zeros((self.nx, self.ny))
+        # cells near an attractor, sampled with the exact kernel, and the attractors of the last build
+        self.near = np.zeros((self.nx - 1, self.ny - 1), dtype=bool)
+        self.sources = (np.zeros(0), np.zeros(0), np.zeros(0), 1)
+        # state of the attractors the field was built from, None before the first build
+        self.key = None
+        self.rebuilds = 0
+
+    def build(self, x, y, mass, G = 1):
+        """
+        Computes the field of the attractors on the nodes of the grid.
+
+        Args:
+            - x, y (np.array) : positions of the attractors.
+            - mass (np.array) : masses of the attractors.
+            - G (float) : gravitational constant.
+        """
+        node_x = self.x0 + np.arange(self.nx) * self.cell_size
+        node_y = self.y0 + np.arange(self.ny) * self.cell_size
+        grid_x, grid_y = np.meshgrid(node_x, node_y, indexing="ij")
+        ax, ay = gravity_kernel.all_pairs_accelerations(grid_x.ravel(), grid_y.ravel(), x, y, mass, G)
+        self.field_x = ax.reshape(self.nx, self.ny)
+        self.field_y = ay.reshape(self.nx, self.ny)
+
+        # a cell is near when its center is closer than EXACT_DISTANCE plus half its diagonal
+        center_x = grid_x[:-1, :-1] + self.cell_size / 2
+        center_y = grid_y[:-1, :-1] + self.cell_size / 2
+        reach = EXACT_DISTANCE + self.cell_size * np.sqrt(2) / 2
+        self.near = np.zeros((self.nx - 1, self.ny - 1), dtype=bool)
+        for attractor_x, attractor_y in zip(np.atleast_1d(x), np.atleast_1d(y)):
+            self.near |= (center_x - attractor_x)**2 + (center_y - attractor_y)**2 < reach * reach
+        self.sources = (np.asarray(x, dtype=float), np.asarray(y, dtype=float), np.asarray(mass, dtype=float), G)
+        self.rebuilds += 1
+
+    def update(self, attractors):
+        """
+        Rebuilds the field if the attractors changed since the last build.
+
+        Args:
+            - attractors (list) : Attractor objects, their G is folded into their mass.
+
+        Returns a boolean, True -> the field was rebuilt.
+        """
+        key = tuple((attractor.position.x, attractor.position.y, attractor.radius, attractor.G * attractor.mass)
+                    for attractor in attractors)
+        if key == self.key:
+            return False
+        self.key = key
+        state = np.array([(x, y, mass) for x, y, _, mass in key]).reshape(-1, 3)
+        self.build(state[:, 0], state[:, 1], state[:, 2])
+        return True
+
+    def sample(self, x, y):
+        """
+        Bilinear interpolation of the field, exact pull for the movers in the cells near an attractor.
+
+        Args:
+            - x, y (np.array) : positions of the movers.
+
+        Returns the arrays ax, ay of the accelerations of the movers.
+        """
+        gx = np.clip((np.asarray(x, dtype=float) - self.x0) / self.cell_size, 0, self.nx - 1.000001)
+        gy = np.clip((np.asarray(y, dtype=float) - self.y0) / self.cell_size, 0, self.ny - 1.000001)
+        ix = gx.astype(np.intp)
+        iy = gy.astype(np.intp)
+        fx = gx - ix
+        fy = gy - iy
+
+        ax = np.zeros(len(gx))
+        ay = np.zeros(len(gx))
+        for (dx, dy), weight in zip([(0, 0), (1, 0), (0, 1), (1, 1)],
+                                    [(1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy]):
+            ax += weight * self.field_x[ix + dx, iy + dy]
+            ay += weight * self.field_y[ix + dx, iy + dy]
+
+        exact = self.near[ix, iy]
+        if exact.any():
+            ax[exact], ay[exact] = gravity_kernel.all_pairs_accelerations(np.asarray(x, dtype=float)[exact],
+                                                                          np.asarray(y, dtype=float)[exact], *self.sources)
+        return ax, ay
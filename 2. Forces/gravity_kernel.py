@@ -0,0 +1,102 @@
+import numpy as np
+
+# same limits as Body.attract and Attractor.attract, the force is computed as if the distance was between 20 and 500
+MIN_DISTANCE = 20
+MAX_DISTANCE = 500
+# pairs computed at once, bounds the memory of the broadcast arrays
+CHUNK_PAIRS = 1 << 18
+
+
+def clamped_accelerations(dx, dy, mass, G = 1):
+    """
+    Accelerations given by masses at offsets dx, dy, with the distance clamp of Body.attract.
+    Masses at distance 0 don't pull, as the direction of the force is undefined.
+    """
+    distance = np.sqrt(dx * dx + dy * dy)
+    clamped = np.clip(distance, MIN_DISTANCE, MAX_DISTANCE)
+    clamped *= clamped
+    # dx and dy are 0 when the distance is 0, so any non zero divisor gives no force
+    np.maximum(distance, 1e-12, out=distance)
+    clamped *= distance
+    scale = np.divide(mass, clamped, out=clamped)
+    if G != 1:
+        scale *= G
+    return dx * scale, dy * scale
+
+
+def clamped_potential(distance):
+    """
+    Potential of a unit mass whose pull follows the clamp of Body.attract: the force is
+    1 / max(20, min(d, 500))**2, so the potential grows linearly below 20, like -1/d up to 500
+    and linearly again after it. It is 0 at distance 0 and the pull is minus its gradient.
+    """
+    inner = distance / MIN_DISTANCE**2
+    middle = 2 / MIN_DISTANCE - 1 / np.maximum(distance, MIN_DISTANCE)
+    outer = 2 / MIN_DISTANCE - 1 / MAX_DISTANCE + (distance - MAX_DISTANCE) / MAX_DISTANCE**2
+    return np.where(distance < MIN_DISTANCE, inner, np.where(distance <= MAX_DISTANCE, middle, outer))
+
+
+def all_pairs_accelerations(target_x, target_y, source_x, source_y, source_mass, G = 1, chunk_pairs = CHUNK_PAIRS):
+    """
+    Exact pull of every source on every target, computed by broadcasting over blocks of targets
+    so that at most chunk_pairs pairs are in memory at once.
+
+    A source at the same position as a target doesn't pull it, so the targets can be the sources
+    themselves: a body never attracts itself.
+
+    Args:
+        - target_x, target_y (np.array) : positions of the attracted objects.
+        - source_x, source_y (np.array) : positions of the attracting objects.
+        - source_mass (np.array) : masses of the attracting objects.
+        - G (float) : gravitational constant.
+        - chunk_pairs (int) : maximum number of pairs of a block.
+
+    Returns the arrays ax, ay of the accelerations of the targets, i.e. the forces divided by their mass.
+    """
+    target_x = np.asarray(target_x, dtype=float)
+    target_y = np.asarray(target_y, dtype=float)
+    source_x = np.asarray(source_x, dtype=float)
+    source_y = np.asarray(source_y, dtype=float)
+    source_mass = np.asarray(source_mass, dtype=float)
+
+    ax = np.zeros(len(target_x))
+    ay = np.zeros(len(target_x))
+    if len(source_x) == 0:
+        return ax, ay
+
+    rows = max(1, chunk_pairs // len(source_x))
+    for start in range(0, len(target_x), rows):
+        stop = start + rows
+        dx = source_x[None, :] - target_x[start:stop, None]
+        dy = source_y[None, :] - target_y[start:stop, None]
+        fx, fy = clamped_accelerations(dx, dy, source_mass[None, :], G)
+        ax[start:stop] = fx.sum(axis=1)
+        ay[start:stop] = fy.sum(axis=1)
+    return ax, ay
+
+
+def gravity_accelerations(x, y, mass, G = 1):
+    """
+    Exact pull of all the bodies on each other, the reference for the approximate solvers.
+
+    Returns the arrays ax, ay.
+    """
+    return all_pairs_accelerations(x, y, x, y, mass, G)
+
+
+def potential_energy(x, y, mass, G = 1, chunk_pairs = CHUNK_PAIRS):
+    """
+    Exact potential energy of the bodies, the sum over the pairs of G * m1 * m2 * clamped_potential(d),
+    computed by blocks of bodies like all_pairs_accelerations.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mass = np.asarray(mass, dtype=float)
+    energy = 0.0
+    rows = max(1, chunk_pairs // max(1, len(x)))
+    for start in range(0, len(x), rows):
+        stop = start + rows
+        distance = np.sqrt((x[None, :] - x[start:stop, None])**2 + (y[None, :] - y[start:stop, None])**2)
+        energy += np.sum(mass[start:stop, None] * mass[None, :] * clamped_potential(distance))
+    # every pair was counted twice, a body with itself counts 0
+    return G * energy / 2
@@ -0,0 +1,130 @@
+import numpy as np
+import gravity_kernel
+
+# above this number of bodies the potential energy, which costs O(N²), is not computed by diagnostics
+DIAGNOSTICS_MAX_BODIES = 5000
+
+
+def semi_implicit_euler(x, y, vx, vy, acceleration, dt, cached = None):
+    """
+    Velocity first, then position with the new velocity: the update of Mover.update_position
+    and Body.update_position, which is symplectic. One force evaluation per step.
+
+    All the integrators update the arrays in place, take a function acceleration(x, y) -> ax, ay
+    and return the acceleration at the new positions if they computed it, None otherwise.
+    """
+    ax, ay = acceleration(x, y)
+    vx += ax * dt
+    vy += ay * dt
+    x += vx * dt
+    y += vy * dt
+    return None
+
+
+def leapfrog(x, y, vx, vy, acceleration, dt, cached = None):
+    """
+    Kick-drift-kick leapfrog, i.e. velocity Verlet. Second order and symplectic, and the
+    acceleration at the end of a step is the one at the start of the next, so it costs one
+    force evaluation per step when the cached acceleration is given back.
+    """
+    ax, ay = cached if cached is not None else acceleration(x, y)
+    vx += ax * (dt / 2)
+    vy += ay * (dt / 2)
+    x += vx * dt
+    y += vy * dt
+    ax, ay = acceleration(x, y)
+    vx += ax * (dt / 2)
+    vy += ay * (dt / 2)
+    return ax, ay
+
+
+def rk4(x, y, vx, vy, acceleration, dt, cached = None):
+    """
+    Classic fourth order Runge-Kutta, accurate but not symplectic, four force evaluations per step.
+    """
+    k1_ax, k1_ay = acceleration(x, y)
+    k2_ax, k2_ay = acceleration(x + vx * (dt / 2), y + vy * (dt / 2))
+    k2_vx, k2_vy = vx + k1_ax * (dt / 2), vy + k1_ay * (dt / 2)
+    k3_ax, k3_ay = acceleration(x + k2_vx * (dt / 2), y + k2_vy * (dt / 2))
+    k3_vx, k3_vy = vx + k2_ax * (dt / 2), vy + k2_ay * (dt / 2)
+    k4_ax, k4_ay = acceleration(x + k3_vx * dt, y + k3_vy * dt)
+    k4_vx, k4_vy = vx + k3_ax * dt, vy + k3_ay * dt
+
+    x += (vx + 2 * k2_vx + 2 * k3_vx + k4_vx) * (dt / 6)
+    y += (vy + 2 * k2_vy + 2 * k3_vy + k4_vy) * (dt / 6)
+    vx += (k1_ax + 2 * k2_ax + 2 * k3_ax + k4_ax) * (dt / 6)
+    vy += (k1_ay + 2 * k2_ay + 2 * k3_ay + k4_ay) * (dt / 6)
+    return None
+
+
+INTEGRATORS = {
+    "euler": semi_implicit_euler,
+    "leapfrog": leapfrog,
+    "rk4": rk4
+}
+# force evaluations of a step, the first leapfrog step costs one more
+FORCE_EVALUATIONS = {
+    "euler": 1,
+    "leapfrog": 1,
+    "rk4": 4
+}
+
+
+class Integrator():
+    """
+    Fixed timestep integration, a frame advances the simulation by dt split into substeps steps.
+
+    Args:
+        - method (str) : one of INTEGRATORS.
+        - dt (float) : simulated time of a frame, 1 is the step of Body.update_position.
+        - substeps (int) : steps of a frame, each one of dt / substeps.
+    """
+    def __init__(self, method = "euler", dt = 1, substeps = 1):
+        if method not in INTEGRATORS:
+            raise ValueError(f"unknown integrator {method}, expected one of {list(INTEGRATORS)}")
+        self.method = method
+        self.dt = dt
+        self.substeps = max(1, int(substeps))
+        self.cached = None
+        self.force_evaluations = 0
+
+    def reset(self):
+        """
+        Forgets the cached acceleration, to be called when bodies are added or removed.
+        """
+        self.cached = None
+
+    def step(self, x, y, vx, vy, acceleration):
+        """
+        Advances the arrays by one frame, in place.
+
+        Args:
+            - x, y, vx, vy (np.array) : positions and velocities.
+            - acceleration (function) : acceleration(x, y) -> ax, ay.
+        """
+        def counted_acceleration(x, y):
+            self.force_evaluations += 1
+            return acceleration(x, y)
+
+        h = self.dt / self.substeps
+        for _ in range(self.substeps):
+            self.cached = INTEGRATORS[self.method](x, y, vx, vy, counted_acceleration, h, self.cached)
+
+
+def diagnostics(x, y, vx, vy, mass, G = 1):
+    """
+    Returns the kinetic, potential and total energy and the momentum of the bodies.
+    The potential energy, and so the total one, is nan above DIAGNOSTICS_MAX_BODIES bodies.
+    """
+    kinetic = 0.5 * np.sum(mass * (vx * vx + vy * vy))
+    if len(x) <= DIAGNOSTICS_MAX_BODIES:
+        potential = gravity_kernel.potential_energy(x, y, mass, G)
+    else:
+        potential = np.nan
+    return {
+        "kinetic": kinetic,
+        "potential": potential,
+        "energy": kinetic + potential,
+        "momentum_x": np.sum(mass * vx),
+        "momentum_y": np.sum(mass * vy)
+    }
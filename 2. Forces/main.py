@@ -1,9 +1,22 @@
+import argparse
+import time
 import pygame
 import random
+import numpy as np
 import moverObject
 import liquidObject
 import attractorObject
 import bodyObject
+import bodySystem
+import barnes_hut
+import gravity_kernel
+import particle_mesh
+import parallel_gravity
+import force_field
+import collisions
+import simulation_clock
+import trajectory
+import integrators
 import graphical_components as gc
 
 WIDTH = 640
@@ -15,6 +28,25 @@ WATER_COLOR = (0, 128, 255)  # blue
 MAX_MOVERS = 20
 MAX_ATTRACTORS = 15
 MAX_BODIES = 100
+# above this number of bodies they are drawn as single pixels instead of circles
+MAX_DRAWN_CIRCLES = 2000
+
+# "pairwise" is the Body.attract loop, the other solvers work on a BodySystem,
+# "all_pairs" is the exact NumPy kernel and can also be used by the attractors,
+# "parallel" is the same kernel split across worker processes
+GRAVITY_SOLVERS = ["pairwise", "all_pairs", "barnes_hut", "particle_mesh", "parallel"]
+# pull of the attractors on the movers: "pairwise" calls Attractor.attract for every pair,
+# "all_pairs" uses the NumPy kernel and "field" samples a grid cached until the attractors change
+ATTRACTION_SOLVERS = ["pairwise", "all_pairs", "field"]
+# parameters of the approximate solvers, of the integration and of the collisions of the simulations,
+# dt is the simulated time of a frame and substeps the number of steps it is split into
+SOLVER_OPTIONS = {"theta": barnes_hut.THETA, "cell_size": particle_mesh.CELL_SIZE, "softening": particle_mesh.SOFTENING,
+                  "workers": parallel_gravity.WORKERS, "integrator": "euler", "dt": 1, "substeps": 1,
+                  "collisions": "none", "restitution": collisions.RESTITUTION}
+# frames between two prints of the energy and momentum of the bodies
+DIAGNOSTICS_EVERY = 120
+# scenes which can run without a window, as fast as possible
+HEADLESS_SCENES = ["attraction", "n_body"]
 
 def update_screen(screen: pygame.display, movers: list, liquids: liquidObject.Liquid, attractors: attractorObject.Attractor):
     """
@@ -42,6 +74,133 @@ def update_screen(screen: pygame.display, movers: list, liquids: liquidObject.Li
         pygame.draw.circle(screen, color, (position.x, position.y), radius)
 
 
+def draw_body_system(screen: pygame.Surface, bodies: bodySystem.BodySystem):
+    """
+    Draws the bodies of a BodySystem, see draw_bodies.
+
+    Args:
+        - screen -> screen of the application, has to be a 32 bit surface when drawing pixels.
+        - bodies -> bodies to draw.
+    """
+    n = bodies.count
+    draw_bodies(screen, bodies.x[:n], bodies.y[:n], bodies.radius[:n], bodies.color[:n])
+
+
+def draw_bodies(screen: pygame.Surface, x: np.ndarray, y: np.ndarray, radius: np.ndarray, color: np.ndarray):
+    """
+    Draws bodies given as arrays, as circles if there are not too many of them,
+    otherwise as single pixels written directly into the screen.
+
+    Args:
+        - screen -> screen of the application, has to be a 32 bit surface when drawing pixels.
+        - x, y -> positions of the bodies.
+        - radius -> radii of the bodies.
+        - color -> (N, 3) colors of the bodies.
+    """
+    if len(x) <= MAX_DRAWN_CIRCLES:
+        for px, py, r, c in zip(x.tolist(), y.tolist(), radius.tolist(), color.tolist()):
+            pygame.draw.circle(screen, c, (px, py), r)
+        return
+
+    width, height = screen.get_size()
+    ix = x.astype(np.intp)
+    iy = y.astype(np.intp)
+    visible = (ix >= 0) & (ix < width) & (iy >= 0) & (iy < height)
+
+    shifts = screen.get_shifts()
+    colors = color[visible].astype(np.uint32)
+    mapped = (colors[:, 0] << shifts[0]) | (colors[:, 1] << shifts[1]) | (colors[:, 2] << shifts[2])
+    pixels = pygame.surfarray.pixels2d(screen)
+    pixels[ix[visible], iy[visible]] = mapped | np.uint32(screen.get_masks()[3])
+    # release the lock on the screen
+    del pixels
+
+
+def attraction_accelerations(movers: list[moverObject.Mover], attractors: list[attractorObject.Attractor]):
+    """
+    Computes the pull of all the attractors on all the movers at once with the NumPy kernel,
+    same result as summing attractor.attract(mover) / mover.mass over the attractors.
+
+    Returns a dictionary mover -> pygame.Vector2 acceleration.
+    """
+    mover_positions = np.array([(mover.position.x, mover.position.y) for mover in movers]).reshape(-1, 2)
+    attractor_positions = np.array([(attractor.position.x, attractor.position.y) for attractor in attractors]).reshape(-1, 2)
+    # G of every attractor is folded into its mass
+    attractor_masses = np.array([attractor.G * attractor.mass for attractor in attractors])
+    ax, ay = gravity_kernel.all_pairs_accelerations(mover_positions[:, 0], mover_positions[:, 1],
+                                                    attractor_positions[:, 0], attractor_positions[:, 1], attractor_masses)
+    return {mover: pygame.Vector2(x, y) for mover, x, y in zip(movers, ax.tolist(), ay.tolist())}
+
+
+def field_accelerations(movers: list[moverObject.Mover], field: force_field.ForceField):
+    """
+    Samples the pull of the attractors on all the movers from a cached field,
+    same result as attraction_accelerations up to the interpolation error.
+
+    Returns a dictionary mover -> pygame.Vector2 acceleration.
+    """
+    mover_positions = np.array([(mover.position.x, mover.position.y) for mover in movers]).reshape(-1, 2)
+    ax, ay = field.sample(mover_positions[:, 0], mover_positions[:, 1])
+    return {mover: pygame.Vector2(x, y) for mover, x, y in zip(movers, ax.tolist(), ay.tolist())}
+
+
+def collide_objects(objects: list, mode: str, restitution = collisions.RESTITUTION):
+    """
+    Bounces or merges the overlapping movers or bodies with the grid broad phase of collisions.py.
+
+    Args:
+        - objects -> movers or bodies.
+        - mode -> one of collisions.COLLISION_MODES.
+        - restitution -> restitution of the bounces, 1 is elastic.
+
+    Returns the objects left, i.e. without the ones absorbed by a merge.
+    """
+    if mode == "none" or len(objects) < 2:
+        return objects
+    x = np.array([obj.position.x for obj in objects])
+    y = np.array([obj.position.y for obj in objects])
+    vx = np.array([obj.velocity.x for obj in objects])
+    vy = np.array([obj.velocity.y for obj in objects])
+    mass = np.array([obj.mass for obj in objects], dtype=float)
+    radius = np.array([obj.radius for obj in objects], dtype=float)
+    collided, survivors, absorbed = collisions.collide(x, y, vx, vy, mass, radius, mode, restitution)
+    if collided == 0:
+        return objects
+
+    for k in survivors.tolist():
+        obj = objects[k]
+        obj.mass = mass[k]
+        obj.radius = radius[k]
+        if isinstance(obj, bodyObject.Body):
+            # the body stops spawning, otherwise its radius would be reset by check_spawn_update
+            obj.total_radius = radius[k]
+            obj.start_time_spawn = -1
+
+    for obj, px, py, pvx, pvy in zip(objects, x.tolist(), y.tolist(), vx.tolist(), vy.tolist()):
+        obj.position.update(px, py)
+        obj.velocity.update(pvx, pvy)
+    return [obj for obj, gone in zip(objects, absorbed.tolist()) if not gone]
+
+
+def headless_report(scene: str, sim_clock: simulation_clock.SimulationClock, seconds: float, x, y):
+    """
+    Prints how much faster than real time a headless run was, and a checksum of the final positions
+    which is the same for runs with the same seed and options.
+    """
+    real_time = sim_clock.frame / 60
+    print(f"{scene}: {sim_clock.frame} frames ({sim_clock.time:.1f} simulated seconds) in {seconds:.2f} s, "
+          f"{real_time / max(seconds, 1e-9):.1f}x real time at 60 fps")
+    print(f"{len(x)} objects left, position checksum {float(np.sum(x) + 2 * np.sum(y)):.10g}")
+
+
+def record_objects(recorder: trajectory.TrajectoryRecorder, objects: list):
+    """
+    Adds a frame with the movers, attractors or bodies of a list to a recording.
+    """
+    recorder.record([obj.position.x for obj in objects], [obj.position.y for obj in objects],
+                    [obj.radius for obj in objects], np.array([obj.color for obj in objects], dtype=np.uint8).reshape(-1, 3))
+
+
 def out_of_bounds(mover):
     """
     Checks if the mover is out of bounds.
@@ -138,7 +297,16 @@ def check_spawn_collision(new_obj: pygame.Rect, attractors: list[attractorObject
 
     return True
 
-def main_menu():
+def main_menu(num_bodies = None, gravity = "pairwise", solver_options = None, attraction = None, num_movers = None, record = None):
+    """
+    Main menu of the simulations, num_bodies, gravity and solver_options are passed to the N-body simulation,
+    attraction and num_movers to the gravitational attraction one. If attraction is None it follows
+    gravity: pairwise for "pairwise", all_pairs for the other solvers. If record is a path both simulations
+    are recorded there, see trajectory.TrajectoryRecorder.
+    """
+    if attraction is None:
+        attraction = "pairwise" if gravity == "pairwise" else "all_pairs"
+
     pygame.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Forces Simulation")
@@ -168,10 +336,10 @@ def main_menu():
                     simulation1_main()
                 
                 if simulation2_button.is_hovered(event.pos):
-                    simulation2_main()
+                    simulation2_main(attraction, num_movers, solver_options, record=record)
 
                 if simulation3_button.is_hovered(event.pos):
-                    simulation3_main()
+                    simulation3_main(num_bodies, gravity, solver_options, record=record)
                 
                 if exit_button.is_hovered(event.pos):
                     return False  # Exit application
@@ -320,12 +488,31 @@ def simulation1_main():
         pygame.display.update()
         clock.tick(60)
 
-def simulation2_main():
+def simulation2_main(gravity = "pairwise", num_movers = None, solver_options = None, headless = False, frames = None, record = None):
+    """
+    Gravitational attraction of movers by attractors.
+
+    Args:
+        - gravity -> one of ATTRACTION_SOLVERS, "pairwise" calls Attractor.attract for every mover and attractor,
+          "all_pairs" computes all the pulls at once with the NumPy kernel and "field" samples a ForceField.
+        - num_movers -> number of movers at the start, random between 5 and 20 if None. It also raises
+          the maximum number of movers.
+        - solver_options -> only collisions and restitution are used, the movers pass through each other by default.
+        - headless -> if True nothing is drawn and the frames are not limited to 60 per second.
+        - frames -> number of frames to simulate, until the window is closed if None.
+        - record -> path of a recording of every frame, nothing is recorded if None.
+    """
+    options = dict(SOLVER_OPTIONS, **(solver_options or {}))
     pygame.init()
     clock = pygame.Clock()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-
-    num_movers = random.randint(5, 20)
+    screen = None if headless else pygame.display.set_mode((WIDTH, HEIGHT))
+    # the spawn and death of the attractors follow the simulated time, not the wall clock
+    sim_clock = simulation_clock.SimulationClock()
+    recorder = trajectory.TrajectoryRecorder(record) if record is not None else None
+
+    if num_movers is None:
+        num_movers = random.randint(5, 20)
+    max_movers = max(MAX_MOVERS, num_movers)
     print(f"Created {num_movers} movers!")
     movers = []
     
@@ -344,89 +531,146 @@ def simulation2_main():
         curr_mover = moverObject.Mover(x, y, rand_color, radius, mass=mass)
         movers.append(curr_mover)
 
-    screen.fill(BACKGROUND_COLOR)
+    if not headless:
+        screen.fill(BACKGROUND_COLOR)
+        update_screen(screen, movers, None, attractors)
 
-    update_screen(screen, movers, None, attractors)
+    # covers the canvas and the margin after which movers are removed
+    field = force_field.ForceField(-force_field.FIELD_MARGIN, -force_field.FIELD_MARGIN,
+                                   WIDTH + 2 * force_field.FIELD_MARGIN, HEIGHT + 2 * force_field.FIELD_MARGIN)
 
     running = True
+    start_time = time.perf_counter()
+
+    if not headless:
+        pygame.display.set_caption("Gravitational Force Simulation")
+    try:
+        while running:
+            # Handle events
+            if not headless:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False # Quit simulation
+            now = sim_clock.time
+
+            # the attractors grow and shrink once per frame, not once per mover
+            dead_attractors = []
+            for attractor in attractors:
+                attractor.check_spawn_update(now)
+                if attractor.check_death_update(now):
+                    dead_attractors.append(attractor)
+            for attractor in dead_attractors:
+                attractors.remove(attractor)
+
+            if gravity == "all_pairs":
+                accelerations = attraction_accelerations(movers, attractors)
+            elif gravity == "field":
+                field.update(attractors)
+                accelerations = field_accelerations(movers, field)
+
+            # movers are now subject to gravity
+            for mover in list(movers):
+                
+                if out_of_bounds(mover):
+                    print("Mover went in the outer space and was never found again!")
+                    movers.remove(mover)
+                    continue
+
+                if mover.check_floor(HEIGHT) and abs(mover.velocity.y) < 0.1:
+                    mover.velocity.y = 0
+
+                if gravity == "pairwise":
+                    for attractor in attractors:
+                        grav_force = attractor.attract(mover)
+                        # distance = (attractor.position - mover.position).magnitude()
+                        # print(f"ATTRACTOR {i}: Distance = {distance}, Force = {grav_force.magnitude()}")
+                        mover.apply_force(grav_force)
+                else:
+                    mover.apply_force(accelerations[mover] * mover.mass)
 
-    pygame.display.set_caption("Gravitational Force Simulation")
-    while running:
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False # Quit simulation
-
-        # movers are now subject to gravity
-        for i, mover in enumerate(movers):
-            
-            if out_of_bounds(mover):
-                print("Mover went in the outer space and was never found again!")
-                movers.pop(i)
-
-            if mover.check_floor(HEIGHT) and abs(mover.velocity.y) < 0.1:
-                mover.velocity.y = 0
-
-            idx_to_remove = []
-            for i, attractor in enumerate(attractors):
-                grav_force = attractor.attract(mover)
-                # distance = (attractor.position - mover.position).magnitude()
-                # print(f"ATTRACTOR {i}: Distance = {distance}, Force = {grav_force.magnitude()}")
-                mover.apply_force(grav_force)
-
-                attractor.check_spawn_update()
-                is_dead = attractor.check_death_update()
-                if is_dead:
-                    idx_to_remove.append(i)
-
-            for idx in idx_to_remove:
-                attractors.pop(idx)
-
-            mover.update_position()
-
-        create_chance = random.randint(0, 1000)
-        
-        if create_chance > 998:
-            remove_or_add = random.randint(0, 1)
-            # 1 == True, remove a random attractor
-            if remove_or_add and len(attractors) > 1:
-                idx = random.randint(0, len(attractors) - 1)
-                attractors[idx].death_of_attractor()
-                print("Attractor started death timer!")
-            # 0 == False, add an attractor
-            else:
-                if len(attractors) < MAX_ATTRACTORS:
-                    new_attractor = create_new_attractor(attractors)
-                    new_attractor.birth_of_attractor()
-                    new_attractor.check_spawn_update()
-                    if new_attractor is not None:
-                        attractors.append(new_attractor)
-                        print("New attractor!!")
+                mover.update_position()
 
-        if create_chance < 10 and len(movers) < MAX_MOVERS:
-            new_mover = create_new_mover(attractors)
-            if new_mover is not None:
-                print("New mover from outer space!")
-                movers.append(new_mover)
+            movers = collide_objects(movers, options["collisions"], options["restitution"])
 
+            create_chance = random.randint(0, 1000)
+            
+            if create_chance > 998:
+                remove_or_add = random.randint(0, 1)
+                # 1 == True, remove a random attractor
+                if remove_or_add and len(attractors) > 1:
+                    idx = random.randint(0, len(attractors) - 1)
+                    attractors[idx].death_of_attractor(now)
+                    print("Attractor started death timer!")
+                # 0 == False, add an attractor
+                else:
+                    if len(attractors) < MAX_ATTRACTORS:
+                        new_attractor = create_new_attractor(attractors)
+                        # None when no free place was found
+                        if new_attractor is not None:
+                            new_attractor.birth_of_attractor(now)
+                            new_attractor.check_spawn_update(now)
+                            attractors.append(new_attractor)
+                            print("New attractor!!")
+
+            if create_chance < 10 and len(movers) < max_movers:
+                new_mover = create_new_mover(attractors)
+                if new_mover is not None:
+                    print("New mover from outer space!")
+                    movers.append(new_mover)
+
+            if recorder is not None:
+                record_objects(recorder, attractors + movers)
+            sim_clock.tick()
+            if frames is not None and sim_clock.frame >= frames:
+                running = False
+            if headless:
+                continue
+
+            screen.fill(BACKGROUND_COLOR)
+            update_screen(screen, movers, None, attractors)
+            
+            # Update display
+            pygame.display.update()
+            clock.tick(60)
+    finally:
+        # also on errors and Ctrl-C, so the last batch of frames is written
+        if recorder is not None:
+            recorder.close()
+            print(f"{recorder.frames} frames recorded to {record}")
+
+    if headless:
+        headless_report("attraction", sim_clock, time.perf_counter() - start_time,
+                        [mover.position.x for mover in movers], [mover.position.y for mover in movers])
+
+def simulation3_main(num_bodies = None, gravity = "pairwise", solver_options = None, headless = False, frames = None, record = None):
+    """
+    N-body simulation.
 
-        screen.fill(BACKGROUND_COLOR)
-        update_screen(screen, movers, None, attractors)
-        
-        # Update display
-        pygame.display.update()
-        clock.tick(60)
+    Args:
+        - num_bodies -> number of bodies at the start, random between 5 and 20 if None.
+        - gravity -> one of GRAVITY_SOLVERS, "pairwise" calls Body.attract for every pair of bodies.
+        - solver_options -> parameters of the approximate solvers and of the integrator, SOLVER_OPTIONS by default.
+          The pairwise Body loop always integrates with semi-implicit Euler, only dt and substeps are used.
+          The collisions are resolved once per frame.
+        - headless -> if True nothing is drawn and the frames are not limited to 60 per second.
+        - frames -> number of frames to simulate, until the window is closed if None.
+        - record -> path of a recording of every frame, nothing is recorded if None.
+    """
+    if gravity != "pairwise":
+        return body_system_main(num_bodies, gravity, solver_options, headless, frames, record)
+    options = dict(SOLVER_OPTIONS, **(solver_options or {}))
+    dt = options["dt"] / options["substeps"]
 
-def simulation3_main():
     pygame.init()
     clock = pygame.Clock()
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-
-    screen.fill(BACKGROUND_COLOR)
+    screen = None if headless else pygame.display.set_mode((WIDTH, HEIGHT))
+    sim_clock = simulation_clock.SimulationClock(options["dt"])
+    recorder = trajectory.TrajectoryRecorder(record) if record is not None else None
 
     bodies = []
 
-    num_bodies = random.randint(5, 20)
+    if num_bodies is None:
+        num_bodies = random.randint(5, 20)
 
     for _ in range(num_bodies):
         radius = random.randint(2, 10)
@@ -436,48 +680,256 @@ def simulation3_main():
         curr_body = bodyObject.Body(x, y, rand_color, radius, mass=mass)
         bodies.append(curr_body)
 
-    screen.fill(BACKGROUND_COLOR)
-
-    update_screen(screen, bodies, None, None)
+    if not headless:
+        screen.fill(BACKGROUND_COLOR)
+        update_screen(screen, bodies, None, None)
 
     running = True
+    start_time = time.perf_counter()
+
+    if not headless:
+        pygame.display.set_caption("n-body Simulation")
+    try:
+        while running:
+            # Handle events
+            if not headless:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False # Quit simulation
+            now = sim_clock.time
+            
+            for _ in range(options["substeps"]):
+                for i, body in enumerate(bodies):
+                    body.check_spawn_update(now)
+                    for j, other_body in enumerate(bodies):
+                        if i != j:
+                            grav_force = other_body.attract(body)
+                            body.apply_force(grav_force)
+                    body.update_position(dt)
+
+            bodies = collide_objects(bodies, options["collisions"], options["restitution"])
+
+            for i, body in enumerate(bodies):
+                if out_of_bounds(body):
+                    print("Body went out of bounds :c")
+                    bodies.pop(i)
+            
+            spawn_chance = random.randint(0, 100)
+
+            if spawn_chance > 99:
+                new_body = create_new_body()
+                if new_body is not None and len(bodies) < MAX_BODIES:
+                    new_body.birth_of_body(now)
+                    new_body.check_spawn_update(now)
+                    bodies.append(new_body)
+                    print("New body!!")
+
+            if recorder is not None:
+                record_objects(recorder, bodies)
+            sim_clock.tick()
+            if frames is not None and sim_clock.frame >= frames:
+                running = False
+            if headless:
+                continue
+
+            screen.fill(BACKGROUND_COLOR)
+            update_screen(screen, bodies, None, None)
+            # Update display
+            pygame.display.update()
+            clock.tick(60)
+    finally:
+        # also on errors and Ctrl-C, so the last batch of frames is written
+        if recorder is not None:
+            recorder.close()
+            print(f"{recorder.frames} frames recorded to {record}")
+
+    if headless:
+        headless_report("n_body", sim_clock, time.perf_counter() - start_time,
+                        [body.position.x for body in bodies], [body.position.y for body in bodies])
+
+def create_gravity_solver(gravity: str, G = 1, solver_options = None):
+    """
+    Creates the chosen gravity solver.
 
-    pygame.display.set_caption("n-body Simulation")
-    while running:
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False # Quit simulation
+    Args:
+        - gravity -> one of GRAVITY_SOLVERS except "pairwise".
+        - G -> gravitational constant.
+        - solver_options -> parameters of the approximate solvers, SOLVER_OPTIONS by default.
 
+    Returns a function of the positions x, y and the masses of the bodies returning their accelerations ax, ay,
+    a ParallelGravity for "parallel" which has to be closed.
+    """
+    options = dict(SOLVER_OPTIONS, **(solver_options or {}))
+    if gravity == "all_pairs":
+        return lambda x, y, mass: gravity_kernel.gravity_accelerations(x, y, mass, G)
+    if gravity == "barnes_hut":
+        return lambda x, y, mass: barnes_hut.gravity_accelerations(x, y, mass, options["theta"], G)
+    if gravity == "particle_mesh":
+        # the mesh covers the canvas and the margin where the bodies are still alive
+        mesh = particle_mesh.ParticleMesh(-20, -20, WIDTH + 40, HEIGHT + 40, options["cell_size"], options["softening"], G)
+        return mesh.accelerations
+    if gravity == "parallel":
+        # the workers run until the solver is closed at the end of the simulation
+        return parallel_gravity.ParallelGravity(options["workers"], G)
+    raise ValueError(f"unknown gravity solver {gravity}, expected one of {GRAVITY_SOLVERS}")
+
+def body_system_main(num_bodies = None, gravity = "barnes_hut", solver_options = None, headless = False, frames = None, record = None):
+    """
+    N-body simulation on a BodySystem, for thousands of bodies.
+
+    With more than MAX_BODIES bodies the masses are scaled down so that the total mass,
+    and so the strength of the collapse, stays the same as with MAX_BODIES bodies.
+    headless, frames and record work like in simulation3_main.
+    """
+    pygame.init()
+    clock = pygame.Clock()
+    screen = None if headless else pygame.display.set_mode((WIDTH, HEIGHT))
+
+    if num_bodies is None:
+        num_bodies = random.randint(5, 20)
+    max_bodies = max(MAX_BODIES, num_bodies)
+
+    bodies = bodySystem.BodySystem(num_bodies, mass_scale=min(1, MAX_BODIES / num_bodies))
+    radius = np.random.randint(2, 11, num_bodies)
+    bodies.add_bodies(np.random.randint(100, WIDTH - 100 + 1, num_bodies), np.random.randint(100, HEIGHT - 100 + 1, num_bodies),
+                      np.random.randint(0, 256, (num_bodies, 3)), radius, radius * 2 * bodies.mass_scale)
+    options = dict(SOLVER_OPTIONS, **(solver_options or {}))
+    print(f"Created {num_bodies} bodies, gravity solver: {gravity}, integrator: {options['integrator']}, "
+          f"dt: {options['dt']}, substeps: {options['substeps']}")
+    gravity_solver = create_gravity_solver(gravity, bodies.G, options)
+    integrator = integrators.Integrator(options["integrator"], options["dt"], options["substeps"])
+    # the masses can change during a frame, so they are read when the accelerations are computed
+    acceleration = lambda x, y: gravity_solver(x, y, bodies.mass[:bodies.count])
+    initial_energy = None
+    sim_clock = simulation_clock.SimulationClock(options["dt"])
+    recorder = trajectory.TrajectoryRecorder(record) if record is not None else None
+
+    if not headless:
         screen.fill(BACKGROUND_COLOR)
-        
-        for i, body in enumerate(bodies):
-            body.check_spawn_update()
-            for j, other_body in enumerate(bodies):
-                if i != j:
-                    grav_force = other_body.attract(body)
-                    body.apply_force(grav_force)
-            body.update_position()
-
-            if out_of_bounds(body):
-                print("Body went out of bounds :c")
-                bodies.pop(i)
-        
-        spawn_chance = random.randint(0, 100)
-
-        if spawn_chance > 99:
-            new_body = create_new_body()
-            new_body.birth_of_body()
-            new_body.check_spawn_update()
-            if new_body is not None and len(bodies) < MAX_BODIES:
-                bodies.append(new_body)
+        draw_body_system(screen, bodies)
+
+    running = True
+    start_time = time.perf_counter()
+
+    if not headless:
+        pygame.display.set_caption(f"n-body Simulation ({gravity})")
+    try:
+        while running:
+            # Handle events
+            if not headless:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False # Quit simulation
+            now = sim_clock.time
+
+            bodies.check_spawn_update(now)
+            bodies.integrate(acceleration, integrator)
+            if bodies.collide(options["collisions"], options["restitution"]):
+                # positions, velocities and masses changed, the cached acceleration is stale
+                integrator.reset()
+                if options["collisions"] == "merge":
+                    initial_energy = None
+
+            out = bodies.out_of_bounds(WIDTH, HEIGHT)
+            if out.any():
+                print(f"{np.count_nonzero(out)} bodies went out of bounds :c")
+                bodies.remove(out)
+                integrator.reset()
+                initial_energy = None
+
+            if sim_clock.frame % DIAGNOSTICS_EVERY == 0:
+                n = bodies.count
+                diagnostics = integrators.diagnostics(bodies.x[:n], bodies.y[:n], bodies.vx[:n], bodies.vy[:n], bodies.mass[:n], bodies.G)
+                # the energy drift is measured from the last time bodies were added or removed, and relative
+                # to the kinetic energy as the potential energy is only defined up to a constant
+                momentum = (f"momentum ({diagnostics['momentum_x']:.4g}, {diagnostics['momentum_y']:.4g}), "
+                            f"{integrator.force_evaluations} force evaluations")
+                if np.isnan(diagnostics["potential"]):
+                    # above integrators.DIAGNOSTICS_MAX_BODIES the potential energy isn't computed
+                    print(f"Kinetic energy {diagnostics['kinetic']:.4g}, {momentum}")
+                else:
+                    if initial_energy is None:
+                        initial_energy = diagnostics["energy"]
+                    drift = (diagnostics["energy"] - initial_energy) / diagnostics["kinetic"] if diagnostics["kinetic"] > 0 else 0
+                    print(f"Energy {diagnostics['energy']:.4g} (kinetic {diagnostics['kinetic']:.4g}, potential {diagnostics['potential']:.4g}), "
+                          f"drift {drift:+.3%}, {momentum}")
+
+            spawn_chance = random.randint(0, 100)
+
+            if spawn_chance > 99 and bodies.count < max_bodies:
+                radius = random.randint(2, 20)
+                bodies.add_body(random.randint(10, WIDTH - 10), random.randint(10, HEIGHT - 10),
+                                (random.randint(0,255), random.randint(0,255), random.randint(0,255)),
+                                radius, radius * 2 * bodies.mass_scale, spawning=True, now=now)
+                integrator.reset()
+                initial_energy = None
                 print("New body!!")
 
-        update_screen(screen, bodies, None, None)
-        # Update display
-        pygame.display.update()
-        clock.tick(60)
+            if recorder is not None:
+                n = bodies.count
+                recorder.record(bodies.x[:n], bodies.y[:n], bodies.radius[:n], bodies.color[:n])
+            sim_clock.tick()
+            if frames is not None and sim_clock.frame >= frames:
+                running = False
+            if headless:
+                continue
+
+            screen.fill(BACKGROUND_COLOR)
+            draw_body_system(screen, bodies)
+            # Update display
+            pygame.display.update()
+            clock.tick(60)
+    finally:
+        # also on errors and Ctrl-C, so the worker processes and the shared memory don't outlive the run
+        # and the last batch of frames is written
+        if isinstance(gravity_solver, parallel_gravity.ParallelGravity):
+            gravity_solver.close()
+        if recorder is not None:
+            recorder.close()
+            print(f"{recorder.frames} frames recorded to {record}")
+
+    if headless:
+        headless_report("n_body", sim_clock, time.perf_counter() - start_time, bodies.x[:bodies.count], bodies.y[:bodies.count])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Forces simulations.")
+    parser.add_argument("--bodies", type=int, default=None, help="number of bodies of the N-body simulation, random between 5 and 20 by default")
+    parser.add_argument("--gravity", choices=GRAVITY_SOLVERS, default="pairwise",
+                        help="gravity solver of the N-body simulation, any solver other than pairwise makes the attractors use the NumPy kernel")
+    parser.add_argument("--attraction", choices=ATTRACTION_SOLVERS, default=None,
+                        help="pull of the attractors on the movers, follows --gravity by default (pairwise or all_pairs)")
+    parser.add_argument("--movers", type=int, default=None, help="number of movers of the gravitational attraction, random between 5 and 20 by default")
+    parser.add_argument("--theta", type=float, default=barnes_hut.THETA, help="opening angle of the Barnes-Hut solver")
+    parser.add_argument("--cell-size", type=float, default=particle_mesh.CELL_SIZE, help="side of the cells of the particle mesh, in pixels")
+    parser.add_argument("--softening", type=float, default=particle_mesh.SOFTENING, help="softening length of the particle mesh")
+    parser.add_argument("--workers", type=int, default=parallel_gravity.WORKERS, help="worker processes of the parallel solver, one per core by default")
+    parser.add_argument("--integrator", choices=list(integrators.INTEGRATORS), default="euler", help="integration method of the N-body simulation")
+    parser.add_argument("--dt", type=float, default=1, help="simulated time of a frame, 1 is the original step")
+    parser.add_argument("--substeps", type=int, default=1, help="integration steps of a frame")
+    parser.add_argument("--collisions", choices=collisions.COLLISION_MODES, default="none",
+                        help="collisions of the movers and of the bodies: pass through, bounce or merge (accretion)")
+    parser.add_argument("--restitution", type=float, default=collisions.RESTITUTION, help="restitution of the bounces, 1 is elastic")
+    parser.add_argument("--headless", choices=HEADLESS_SCENES, default=None,
+                        help="runs a scene without a window and as fast as possible instead of opening the menu")
+    parser.add_argument("--frames", type=int, default=3600, help="number of frames of a headless run")
+    parser.add_argument("--record", default=None, help="records every frame of the simulation to this path, play it with play_trajectory.py")
+    parser.add_argument("--seed", type=int, default=None, help="random seed, runs with the same seed and options give the same results")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main_menu()
\ No newline at end of file
+    args = parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+        np.random.seed(args.seed)
+    solver_options = {"theta": args.theta, "cell_size": args.cell_size, "softening": args.softening, "workers": args.workers,
+                      "integrator": args.integrator, "dt": args.dt, "substeps": args.substeps,
+                      "collisions": args.collisions, "restitution": args.restitution}
+    if args.headless == "attraction":
+        attraction = args.attraction or ("pairwise" if args.gravity == "pairwise" else "all_pairs")
+        simulation2_main(attraction, args.movers, solver_options, headless=True, frames=args.frames, record=args.record)
+    elif args.headless == "n_body":
+        simulation3_main(args.bodies, args.gravity, solver_options, headless=True, frames=args.frames, record=args.record)
+    else:
+        main_menu(args.bodies, args.gravity, solver_options, args.attraction, args.movers, args.record)
\ No newline at end of file
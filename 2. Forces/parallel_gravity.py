@@ -0,0 +1,158 @@
+import os
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import gravity_kernel
+
+# number of worker processes, one per core by default
+WORKERS = os.cpu_count() or 1
+# initial number of bodies of the shared arrays, doubled when a step has more bodies
+CAPACITY = 1 << 14
+# commands written in the header of the shared memory before a step
+COMPUTE = 0
+STOP = 1
+# shared arrays, inputs first then outputs
+SHARED_ARRAYS = ("x", "y", "mass", "ax", "ay")
+# seconds between two checks that the workers are still alive while waiting for a step
+POLL_SECONDS = 0.5
+# seconds given to the workers to stop before they are terminated
+JOIN_SECONDS = 5
+
+
+def shared_arrays(block, capacity):
+    """
+    Returns the header array [command, count, G] of a shared memory block and a dictionary of its shared arrays.
+    """
+    header = np.ndarray(3, dtype=np.float64, buffer=block.buf)
+    arrays = {}
+    for k, array_name in enumerate(SHARED_ARRAYS):
+        arrays[array_name] = np.ndarray(capacity, dtype=np.float64, buffer=block.buf, offset=(3 + k * capacity) * 8)
+    return header, arrays
+
+
+def worker_loop(name, capacity, index, workers, start_semaphore, done_semaphore, chunk_pairs):
+    """
+    Body of a worker process: waits for a step, computes the pull of all the bodies on its own
+    block of targets with the exact kernel and writes it to the shared outputs, until told to stop.
+    """
+    block = shared_memory.SharedMemory(name=name)
+    header, arrays = shared_arrays(block, capacity)
+    try:
+        while True:
+            start_semaphore.acquire()
+            if header[0] == STOP:
+                break
+            count = int(header[1])
+            # contiguous blocks of targets of the same size, every target costs the same number of pairs
+            start = count * index // workers
+            stop = count * (index + 1) // workers
+            ax, ay = gravity_kernel.all_pairs_accelerations(arrays["x"][start:stop], arrays["y"][start:stop],
+                                                            arrays["x"][:count], arrays["y"][:count],
+                                                            arrays["mass"][:count], header[2], chunk_pairs)
+            arrays["ax"][start:stop] = ax
+            arrays["ay"][start:stop] = ay
+            done_semaphore.release()
+    finally:
+        # numpy views keep the buffer alive, they have to go before the block is closed
+        del header, arrays
+        block.close()
+
+
+class ParallelGravity():
+    """
+    Exact all pairs gravity split across worker processes.
+
+    Positions, masses and accelerations live in one multiprocessing.shared_memory block, so a step
+    only copies the positions and masses in, with no pickling. Every worker owns a contiguous block
+    of target bodies and computes the pull of all the bodies on it with gravity_kernel. A step is
+    synchronized with semaphores: every worker has its own start semaphore, released once the inputs
+    are written, and the accelerations are read once every worker has released the shared done
+    semaphore. The done semaphore is polled, so a dead worker raises a RuntimeError instead of
+    blocking the simulation forever.
+
+    Args:
+        - workers (int) : number of worker processes.
+        - G (float) : gravitational constant.
+        - capacity (int) : initial number of bodies of the shared arrays.
+        - chunk_pairs (int) : maximum number of pairs of a block of the kernel, per worker.
+    """
+    def __init__(self, workers = WORKERS, G = 1, capacity = CAPACITY, chunk_pairs = gravity_kernel.CHUNK_PAIRS):
+        self.workers = max(1, int(workers))
+        self.G = G
+        self.chunk_pairs = chunk_pairs
+        self.processes = []
+        self.block = None
+        self.start(capacity)
+
+    def start(self, capacity):
+        """
+        Creates the shared memory block for capacity bodies and starts the workers.
+        """
+        self.capacity = capacity
+        self.block = shared_memory.SharedMemory(create=True, size=(3 + len(SHARED_ARRAYS) * capacity) * 8)
+        self.header, self.arrays = shared_arrays(self.block, capacity)
+        self.header[:] = (COMPUTE, 0, self.G)
+        # one start semaphore per worker, so a fast worker can't take the start of another one
+        self.start_semaphores = [mp.Semaphore(0) for _ in range(self.workers)]
+        self.done_semaphore = mp.Semaphore(0)
+        self.processes = [mp.Process(target=worker_loop, daemon=True,
+                                     args=(self.block.name, capacity, index, self.workers,
+                                           self.start_semaphores[index], self.done_semaphore, self.chunk_pairs))
+                          for index in range(self.workers)]
+        for process in self.processes:
+            process.start()
+
+    def close(self):
+        """
+        Stops the workers and frees the shared memory, also after a worker died.
+        """
+        if self.block is None:
+            return
+        self.header[0] = STOP
+        for start_semaphore in self.start_semaphores:
+            start_semaphore.release()
+        for process in self.processes:
+            process.join(JOIN_SECONDS)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        del self.header, self.arrays
+        self.block.close()
+        self.block.unlink()
+        self.block = None
+
+    def accelerations(self, x, y, mass):
+        """
+        Computes the pull of all the bodies on each other, same result as gravity_kernel.gravity_accelerations.
+
+        Args:
+            - x, y (np.array) : positions of the bodies.
+            - mass (np.array) : masses of the bodies.
+
+        Returns the arrays ax, ay.
+        """
+        count = len(x)
+        if count > self.capacity:
+            self.close()
+            self.start(max(count, 2 * self.capacity))
+        self.arrays["x"][:count] = x
+        self.arrays["y"][:count] = y
+        self.arrays["mass"][:count] = mass
+        self.header[1] = count
+
+        for start_semaphore in self.start_semaphores:
+            start_semaphore.release()
+        self.wait_workers()
+        return self.arrays["ax"][:count].copy(), self.arrays["ay"][:count].copy()
+
+    __call__ = accelerations
+
+    def wait_workers(self):
+        """
+        Waits until every worker is done with the step, raises a RuntimeError if one of them died.
+        """
+        for _ in range(self.workers):
+            while not self.done_semaphore.acquire(timeout=POLL_SECONDS):
+                exit_codes = [process.exitcode for process in self.processes if not process.is_alive()]
+                if exit_codes:
+                    raise RuntimeError(f"{len(exit_codes)} gravity worker(s) died, exit codes {exit_codes}")
@@ -0,0 +1,96 @@
+import numpy as np
+from gravity_kernel import clamped_potential
+
+# side of the cells of the mesh, in pixels
+CELL_SIZE = 2
+# length added to the distances of the potential, 0 keeps only the clamp of Body.attract
+SOFTENING = 0
+
+
+class ParticleMesh():
+    """
+    Particle-mesh gravity solver over a fixed rectangle.
+
+    Every step the masses are deposited on the nodes of the mesh with cloud-in-cell weights,
+    the potential is the convolution of the masses with clamped_potential, computed with FFTs
+    on a mesh padded to twice its size so that it doesn't wrap around, the pull on the nodes is
+    minus the gradient of the potential and it is interpolated back to the bodies with the same
+    cloud-in-cell weights. The cost is O(N + M log M) for N bodies and M nodes.
+
+    Args:
+        - x0, y0 (float) : top left corner of the rectangle, bodies outside of it are clamped to its border.
+        - width, height (float) : size of the rectangle.
+        - cell_size (float) : side of the cells of the mesh, the smaller the more accurate.
+        - softening (float) : length added to the distances, smooths the pull of close bodies.
+        - G (float) : gravitational constant.
+    """
+    def __init__(self, x0, y0, width, height, cell_size = CELL_SIZE, softening = SOFTENING, G = 1):
+        self.x0 = x0
+        self.y0 = y0
+        self.cell_size = cell_size
+        self.softening = softening
+        self.G = G
+        self.nx = int(np.ceil(width / cell_size)) + 2
+        self.ny = int(np.ceil(height / cell_size)) + 2
+
+        # offsets of the padded mesh, the second half holds the negative offsets
+        offsets_x = np.arange(2 * self.nx)
+        offsets_x = np.where(offsets_x < self.nx, offsets_x, offsets_x - 2 * self.nx) * cell_size
+        offsets_y = np.arange(2 * self.ny)
+        offsets_y = np.where(offsets_y < self.ny, offsets_y, offsets_y - 2 * self.ny) * cell_size
+        distance = np.sqrt(offsets_x[:, None]**2 + offsets_y[None, :]**2 + softening**2)
+        # the Fourier transform of the kernel only depends on the mesh, so it is computed once
+        self.kernel = np.fft.rfft2(G * clamped_potential(distance))
+
+    def cloud_in_cell(self, x, y):
+        """
+        Returns the node at the top left of every body and the weights of the four nodes around it.
+        """
+        gx = np.clip((x - self.x0) / self.cell_size, 0, self.nx - 1.000001)
+        gy = np.clip((y - self.y0) / self.cell_size, 0, self.ny - 1.000001)
+        ix = gx.astype(np.intp)
+        iy = gy.astype(np.intp)
+        fx = gx - ix
+        fy = gy - iy
+        weights = [(1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy]
+        return ix, iy, weights
+
+    def deposit(self, ix, iy, weights, mass):
+        """
+        Returns the masses of the nodes of the mesh.
+        """
+        nodes = np.zeros(self.nx * self.ny)
+        for (dx, dy), weight in zip([(0, 0), (1, 0), (0, 1), (1, 1)], weights):
+            nodes += np.bincount((ix + dx) * self.ny + iy + dy, weights=weight * mass, minlength=self.nx * self.ny)
+        return nodes.reshape(self.nx, self.ny)
+
+    def potential(self, nodes):
+        """
+        Returns the potential on the nodes of the mesh.
+        """
+        padded = np.zeros((2 * self.nx, 2 * self.ny))
+        padded[:self.nx, :self.ny] = nodes
+        return np.fft.irfft2(np.fft.rfft2(padded) * self.kernel, s=padded.shape)[:self.nx, :self.ny]
+
+    def accelerations(self, x, y, mass):
+        """
+        Computes the pull of all the bodies on each other.
+
+        Args:
+            - x, y (np.array) : positions of the bodies.
+            - mass (np.array) : masses of the bodies.
+
+        Returns the arrays ax, ay.
+        """
+        if len(x) == 0:
+            return np.zeros(0), np.zeros(0)
+        ix, iy, weights = self.cloud_in_cell(x, y)
+        potential = self.potential(self.deposit(ix, iy, weights, mass))
+        field_x, field_y = np.gradient(-potential, self.cell_size)
+
+        ax = np.zeros(len(x))
+        ay = np.zeros(len(x))
+        for (dx, dy), weight in zip([(0, 0), (1, 0), (0, 1), (1, 1)], weights):
+            ax += weight * field_x[ix + dx, iy + dy]
+            ay += weight * field_y[ix + dx, iy + dy]
+        return ax, ay
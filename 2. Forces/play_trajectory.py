@@ -0,0 +1,117 @@
+import argparse
+import pygame
+import numpy as np
+import trajectory
+import main
+
+# frames of the recording advanced per displayed frame, chosen with the up and down arrows
+SPEEDS = [0.125, 0.25, 0.5, 1, 2, 4, 8, 16, 32]
+SCRUB_BAR_HEIGHT = 12
+SCRUB_BAR_COLOR = (80, 80, 80)
+PROGRESS_COLOR = (200, 200, 200)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Plays a recording of the Forces simulations without recomputing the physics.")
+    parser.add_argument("path", help="path of the recording, without extension")
+    parser.add_argument("--speed", type=float, default=1, choices=SPEEDS, help="frames of the recording per displayed frame")
+    return parser.parse_args()
+
+
+def frame_at(mouse_x: int, width: int, num_frames: int):
+    """
+    Returns the frame under the mouse on the scrub bar.
+    """
+    return int(np.clip(mouse_x / max(width - 1, 1), 0, 1) * (num_frames - 1))
+
+
+def play(path: str, speed = 1):
+    """
+    Plays a recording made with python main.py --record.
+
+    Controls:
+        - space -> pause or resume.
+        - left, right -> previous or next frame, while paused.
+        - up, down -> faster or slower, R reverses the playback.
+        - home, end -> first or last frame.
+        - click or drag on the bar at the bottom -> seek.
+        - L -> loads the frames recorded since the start, for recordings still being written.
+    """
+    player = trajectory.TrajectoryPlayer(path)
+    if len(player) == 0:
+        print(f"{path} has no frames")
+        return
+
+    pygame.init()
+    clock = pygame.Clock()
+    screen = pygame.display.set_mode((main.WIDTH, main.HEIGHT + SCRUB_BAR_HEIGHT))
+    font = pygame.font.Font(None, 24)
+    pygame.display.set_caption(f"Playback of {path}")
+
+    speed_idx = SPEEDS.index(speed)
+    direction = 1
+    position = 0.0
+    paused = False
+    seeking = False
+
+    running = True
+    while running:
+        last = len(player) - 1
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    position = min(last, int(position) + 1)
+                elif event.key == pygame.K_LEFT:
+                    position = max(0, int(position) - 1)
+                elif event.key == pygame.K_UP:
+                    speed_idx = min(len(SPEEDS) - 1, speed_idx + 1)
+                elif event.key == pygame.K_DOWN:
+                    speed_idx = max(0, speed_idx - 1)
+                elif event.key == pygame.K_r:
+                    direction = -direction
+                elif event.key == pygame.K_HOME:
+                    position = 0
+                elif event.key == pygame.K_END:
+                    position = last
+                elif event.key == pygame.K_l:
+                    player.reload()
+                    print(f"{len(player)} frames")
+
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.pos[1] >= main.HEIGHT:
+                seeking = True
+                position = frame_at(event.pos[0], main.WIDTH, len(player))
+            elif event.type == pygame.MOUSEMOTION and seeking:
+                position = frame_at(event.pos[0], main.WIDTH, len(player))
+            elif event.type == pygame.MOUSEBUTTONUP:
+                seeking = False
+
+        if not paused and not seeking:
+            position += direction * SPEEDS[speed_idx]
+            # the playback stops at both ends of the recording
+            if position > last or position < 0:
+                position = min(max(position, 0), last)
+                paused = True
+
+        frame = player.frame(int(position))
+        screen.fill(main.BACKGROUND_COLOR)
+        main.draw_bodies(screen, frame["x"], frame["y"], frame["radius"], frame["color"])
+
+        pygame.draw.rect(screen, SCRUB_BAR_COLOR, (0, main.HEIGHT, main.WIDTH, SCRUB_BAR_HEIGHT))
+        pygame.draw.rect(screen, PROGRESS_COLOR, (0, main.HEIGHT, int(main.WIDTH * position / max(last, 1)), SCRUB_BAR_HEIGHT))
+        status = f"frame {int(position)}/{last}  {'-' if direction < 0 else ''}{SPEEDS[speed_idx]}x  {len(frame)} bodies"
+        if paused:
+            status += "  paused"
+        screen.blit(font.render(status, True, (255, 255, 255)), (10, 10))
+
+        pygame.display.update()
+        clock.tick(60)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    play(args.path, args.speed)
@@ -0,0 +1,35 @@
+# simulated seconds of a frame with dt = 1, the animations were tuned at 60 frames per second
+SECONDS_PER_FRAME = 1 / 60
+
+
+class SimulationClock():
+    """
+    Simulated time of a scene, advanced once per frame instead of read from the wall clock.
+
+    The spawn and death animations of the attractors and of the bodies measure their progress
+    with it, so they last the same number of frames whatever the frame rate: a headless run
+    goes as fast as the CPU allows and, with the same seed, gives the same results as a windowed one.
+
+    Args:
+        - dt (float) : simulated time of a frame, in frames, like the dt of the integrators.
+    """
+    def __init__(self, dt = 1):
+        self.dt = dt
+        self.frame = 0
+
+    @property
+    def time(self):
+        """
+        Returns the simulated seconds since the start of the scene, computed from the frame
+        count so that it doesn't accumulate rounding errors.
+        """
+        return self.frame * self.dt * SECONDS_PER_FRAME
+
+    def tick(self):
+        """
+        Advances the clock by one frame.
+
+        Returns the new simulated time.
+        """
+        self.frame += 1
+        return self.time
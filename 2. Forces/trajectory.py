@@ -0,0 +1,135 @@
+import os
+import queue
+import threading
+import numpy as np
+
+# one record per body per frame
+RECORD = np.dtype([("x", "<f4"), ("y", "<f4"), ("radius", "<f4"), ("color", "u1", (3,))])
+# one row per frame: first record of the frame and number of records
+INDEX = np.dtype([("start", "<i8"), ("count", "<i8")])
+# frames buffered before they are handed to the writer thread
+BATCH_FRAMES = 30
+# extensions of the records and of the frame index of a recording
+DATA_EXTENSION = ".bodies"
+INDEX_EXTENSION = ".frames"
+
+
+class TrajectoryRecorder():
+    """
+    Records the positions, radii and colors of all the bodies at every frame.
+
+    A recording is two append-only files: path.bodies holds the records of all the frames one after
+    the other, path.frames holds the frame index, i.e. the first record and the number of records
+    of every frame. The frame loop only copies the arrays of a frame into a batch; full batches are
+    written by a background thread, the records first and then the index, so the index never points
+    past the written data and a recording can be played while it is still growing.
+
+    Args:
+        - path (str) : path of the recording, without extension. Existing files are overwritten.
+        - batch_frames (int) : frames of a batch.
+    """
+    def __init__(self, path, batch_frames = BATCH_FRAMES):
+        self.path = path
+        self.batch_frames = batch_frames
+        self.frames = 0
+        self.records = 0
+        self.batch = []
+        self.queue = queue.Queue()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.data_file = open(path + DATA_EXTENSION, "wb")
+        self.index_file = open(path + INDEX_EXTENSION, "wb")
+        self.writer = threading.Thread(target=self.write_batches, daemon=True)
+        self.writer.start()
+
+    def record(self, x, y, radius, color):
+        """
+        Adds a frame to the recording.
+
+        Args:
+            - x, y (np.array) : positions of the bodies.
+            - radius (np.array) : radii of the bodies.
+            - color (np.array) : (N, 3) colors of the bodies.
+        """
+        frame = np.empty(len(x), dtype=RECORD)
+        frame["x"] = x
+        frame["y"] = y
+        frame["radius"] = radius
+        frame["color"] = np.asarray(color).reshape(-1, 3)
+        self.batch.append(frame)
+        self.frames += 1
+        if len(self.batch) >= self.batch_frames:
+            self.flush()
+
+    def flush(self):
+        """
+        Hands the frames of the current batch to the writer thread.
+        """
+        if not self.batch:
+            return
+        counts = np.array([len(frame) for frame in self.batch])
+        index = np.empty(len(self.batch), dtype=INDEX)
+        index["count"] = counts
+        index["start"] = self.records + np.cumsum(counts) - counts
+        self.records += int(counts.sum())
+        self.queue.put((np.concatenate(self.batch), index))
+        self.batch = []
+
+    def write_batches(self):
+        """
+        Body of the writer thread, writes the batches until it gets None.
+        """
+        while True:
+            batch = self.queue.get()
+            if batch is None:
+                break
+            records, index = batch
+            self.data_file.write(records.tobytes())
+            self.data_file.flush()
+            self.index_file.write(index.tobytes())
+            self.index_file.flush()
+
+    def close(self):
+        """
+        Writes the last frames and closes the files.
+        """
+        self.flush()
+        self.queue.put(None)
+        self.writer.join()
+        self.data_file.close()
+        self.index_file.close()
+
+
+class TrajectoryPlayer():
+    """
+    Reads a recording made by TrajectoryRecorder. The records are memory-mapped, so seeking to
+    any frame is immediate and only the frames which are shown are read from the disk.
+
+    Args:
+        - path (str) : path of the recording, without extension.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.reload()
+
+    def reload(self):
+        """
+        Maps the frames written since the last reload, for recordings which are still growing.
+        """
+        # a frame of the index being written at the same time is left for the next reload
+        index_size = os.path.getsize(self.path + INDEX_EXTENSION) // INDEX.itemsize
+        self.index = np.fromfile(self.path + INDEX_EXTENSION, dtype=INDEX, count=index_size)
+        records = int(self.index["start"][-1] + self.index["count"][-1]) if index_size else 0
+        if records:
+            self.records = np.memmap(self.path + DATA_EXTENSION, dtype=RECORD, mode="r", shape=(records,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD)
+
+    def __len__(self):
+        return len(self.index)
+
+    def frame(self, i):
+        """
+        Returns the records of the frame i, a structured array with the fields x, y, radius and color.
+        """
+        start, count = self.index[i]
+        return self.records[start:start + count]
@@ -0,0 +1,66 @@
+import pygame
+
+
+class Kinematics():
+    """
+    Shared physics of the moving objects: position, velocity and acceleration vectors,
+    forces following Newton's F = m x A and a semi-implicit Euler step.
+
+    The attributes are in __slots__, so an object has no __dict__ and is smaller and faster to
+    access, and the subclasses declare their own __slots__ to keep it that way. The vectors are
+    updated in place, and the rect is only computed when it is read, e.g. to draw or to check
+    a collision, instead of being allocated at every update.
+
+    Args:
+        - x, y (float) : starting position.
+        - radius (float) : half the side of the rect of the object.
+        - mass (float) : mass of the object, forces are divided by it.
+        - velocity, acceleration (pygame.Vector2) : starting vectors, zero if None.
+        - max_speed (float) : the velocity is clamped to this length after every step, no limit if None.
+    """
+    __slots__ = ("position", "velocity", "acceleration", "radius", "mass", "max_speed")
+
+    def __init__(self, x, y, radius = 0, mass = 1, velocity = None, acceleration = None, max_speed = None):
+        self.position = pygame.Vector2(x, y)
+        self.velocity = velocity if velocity is not None else pygame.Vector2(0, 0)
+        self.acceleration = acceleration if acceleration is not None else pygame.Vector2(0, 0)
+        self.radius = radius
+        self.mass = mass
+        self.max_speed = max_speed
+
+    def apply_force(self, force: pygame.Vector2):
+        """
+        Applies a force on the object (i.e. gravity), follows Newton's formula F = m x A
+
+        Args:
+            - force -> force to be applied, it is not modified.
+        """
+        self.acceleration += force / self.mass
+
+    def update_position(self, dt = 1):
+        """
+        Updates the position of the object, used after a force is applied via apply_force().
+        Semi-implicit Euler: the velocity is updated first and the position moves with the new velocity,
+        then the acceleration is reset for the forces of the next step.
+
+        Args:
+            - dt -> timestep, 1 is one frame.
+        """
+        if dt == 1:
+            self.velocity += self.acceleration
+        else:
+            self.velocity += self.acceleration * dt
+        if self.max_speed is not None and self.velocity.length_squared() > self.max_speed * self.max_speed:
+            self.velocity.scale_to_length(self.max_speed)
+        if dt == 1:
+            self.position += self.velocity
+        else:
+            self.position += self.velocity * dt
+        self.acceleration *= 0
+
+    @property
+    def rect(self):
+        """
+        Returns the rect of the object, a square of side 2 * radius centered on its position.
+        """
+        return pygame.Rect(self.position.x - self.radius, self.position.y - self.radius, self.radius*2, self.radius*2)
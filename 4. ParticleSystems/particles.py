@@ -1,41 +1,17 @@
 import pygame
 import random
+from kinematics import Kinematics
+
+class Particle(Kinematics):
+    __slots__ = ("color", "lifespan")
 
-class Particle():
     def __init__(self, x: int, y: int, color: tuple, 
                  radius: int, mass = 1, velocity = None, acceleration = None):
+        # position, velocity, acceleration and the physics step come from Kinematics
+        super().__init__(x, y, radius, mass, velocity, acceleration)
         
         self.color = color
-        self.mass = mass
         self.lifespan = 255
-        self.radius = radius
-        self.rect = pygame.Rect(x - radius, y - radius, radius*2, radius*2)
-
-        # this are all pygame Vectors
-        self.position = pygame.Vector2(x, y)
-        self.velocity = velocity if velocity is not None else pygame.Vector2(0, 0)
-        self.acceleration = acceleration if acceleration is not None else pygame.Vector2(0, 0)
-        
-    def apply_force(self, force: pygame.Vector2):
-        """
-        Applies a force on the Mover object (i.e. gravity), follows Newton's formula F = m x A
-
-        Args:
-            - force -> force to be applied
-        """
-        force_copy = force.copy()
-        f = force_copy / self.mass  
-        self.acceleration += f 
-
-    def update_position(self):
-        """
-        Updates the position of the mover, used after a force is applied via apply_force().
-        """
-        self.velocity += self.acceleration
-        self.position += self.velocity
-        self.acceleration *= 0 
-        self.rect = pygame.Rect(self.position.x - self.radius, self.position.y - self.radius, self.radius*2, self.radius*2)
-
 
     def draw(self, screen):
         """
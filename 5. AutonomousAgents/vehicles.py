@@ -1,17 +1,16 @@
 import pygame
 import math
 import random
-from perlin_noise import PerlinNoise
+import numpy as np
+from gradient_noise import GradientNoise
+from kinematics import Kinematics
 
-class Vehicle():
-    def __init__(self, x: int, y: int, dim:int, color: tuple,velocity = None, acceleration = None, max_speed = 8, max_force = 0.4):
+class Vehicle(Kinematics):
+    __slots__ = ("color", "max_force", "pursuit")
 
-        self.rect = pygame.Rect(x, y, dim, dim)
+    def __init__(self, x: int, y: int, dim:int, color: tuple,velocity = None, acceleration = None, max_speed = 8, max_force = 0.4):
+        super().__init__(x, y, dim / 2, velocity=velocity, acceleration=acceleration, max_speed=max_speed)
         self.color = color
-        self.position = pygame.Vector2(x, y)
-        self.velocity = velocity if velocity is not None else pygame.Vector2(0, 0)
-        self.acceleration = acceleration if acceleration is not None else pygame.Vector2(0, 0)
-        self.max_speed = max_speed
         self.max_force = max_force
         self.pursuit = False
     
@@ -22,17 +21,11 @@ class Vehicle():
         """
         self.pursuit = not self.pursuit
 
-    def apply_force(self, force):
-        """
-        Applies force to the acceleration vector
-        """
-        self.acceleration += force
-
     def out_of_x_bounds(self, WIDTH):
         """
         checks if vehicle is out of bounds on the x axis
         """
-        if self.position.x + self.rect.width > WIDTH or self.position.x < 0:
+        if self.position.x + self.radius * 2 > WIDTH or self.position.x < 0:
             return True
 
         return False
@@ -46,13 +39,13 @@ class Vehicle():
             - vehicles: array of the other vehicles
         """
         # bigger vehicle, bigger radius
-        separation_distance = self.rect.width * 2
+        separation_distance = self.radius * 4
         count = 0
         sum_vector = pygame.Vector2(0,0)
 
         for vehicle in vehicles:
             distance = self.position.distance_to(vehicle.position)
-            if vehicle.rect != self.rect and distance < separation_distance:
+            if vehicle is not self and 0 < distance < separation_distance:
                 diff_vector = self.position.copy() - vehicle.position.copy()
                 # the closer the faster the escape velocity
                 diff_vector.scale_to_length(1 / distance)
@@ -69,16 +62,7 @@ class Vehicle():
         """
         Updates position of the vehicle
         """
-        self.velocity += self.acceleration
-        
-        if self.velocity.magnitude() > self.max_speed:
-            self.velocity.normalize_ip()
-            self.velocity *= self.max_speed
-        
-        self.position += self.velocity
-        self.acceleration *= 0
-        #update rect position
-        self.rect.center = self.position
+        self.update_position()
 
     def seek_segment(self, segment):
         """
@@ -159,19 +143,17 @@ class Vehicle():
         """
         pygame.draw.rect(screen, self.color, self.rect)
 
-class OwnBehaviourVehicle():
+class OwnBehaviourVehicle(Kinematics):
     """
     The own behaviour vehicle should simulate the behaviour of moving towards a random point 
     of a rectangle once it's out of its bounds. This is done by first picking the closest side
     of the rectangle, and then picking a random point on it, which will give us the direction.
     """
+    __slots__ = ("color", "max_force", "last_point_seen", "offset")
+
     def __init__(self, x: int, y: int, dim:int, color: tuple, velocity=None, acceleration=None):
-        self.rect = pygame.Rect(x, y, dim, dim)
+        super().__init__(x, y, dim / 2, velocity=velocity, acceleration=acceleration, max_speed=8)
         self.color = color
-        self.position = pygame.Vector2(x, y)
-        self.velocity = velocity if velocity is not None else pygame.Vector2(0, 0)
-        self.acceleration = acceleration if acceleration is not None else pygame.Vector2(0, 0)
-        self.max_speed = 8
         self.max_force = 0.4
         self.last_point_seen = None
         self.offset = 30  # distance from after which the vehicle will try to go again inside the rectangle
@@ -246,16 +228,8 @@ class OwnBehaviourVehicle():
         if self.last_point_seen:
             self.seek(self.last_point_seen)
 
-    def apply_force(self, force):
-        self.acceleration += force
-
     def update(self):
-        self.velocity += self.acceleration
-        if self.velocity.length() > self.max_speed:
-            self.velocity.scale_to_length(self.max_speed)
-        self.position += self.velocity
-        self.acceleration *= 0
-        self.rect.center = self.position
+        self.update_position()
 
     def draw(self, screen):
         if self.last_point_seen:
@@ -318,20 +292,19 @@ class FlowField():
         if self.mode == 0:
             self.array = [[pygame.Vector2(random.uniform(-1, 1), random.uniform(-1, 1)) for _ in range(self.cols)] for _ in range(self.rows)]
         elif self.mode == 1:
-            noise_gen = PerlinNoise(octaves=4)
+            noise_gen = GradientNoise(octaves=4)
             scale = 0.1
-            self.array = []
-
-            for row in range(self.rows):
-                curr_row = []
-                for col in range(self.cols):
-                    # Genera perlin noise in [0,1], then scale it to [0, 2π]
-                    noise_val = noise_gen([col * scale, row * scale])
-                    angle = noise_val * math.tau  # 0 to 2π
-
-                    vec = pygame.Vector2(math.cos(angle), math.sin(angle))
-                    curr_row.append(vec)
-                self.array.append(curr_row)
+
+            # sample the noise of every cell in one call
+            cols, rows = np.meshgrid(np.arange(self.cols), np.arange(self.rows))
+            noise_vals = noise_gen([cols * scale, rows * scale])
+            # Scale the perlin noise to an angle
+            angles = noise_vals * math.tau
+            cos_vals = np.cos(angles).tolist()
+            sin_vals = np.sin(angles).tolist()
+
+            self.array = [[pygame.Vector2(c, s) for c, s in zip(cos_row, sin_row)]
+                          for cos_row, sin_row in zip(cos_vals, sin_vals)]
         elif self.mode == 2:
             for i in range(self.rows):
                 curr_arr = []
@@ -389,17 +362,14 @@ class FlowField():
         return None
     
 
-class Boid():
+class Boid(Kinematics):
+    __slots__ = ("color", "separation_distance", "id_boid", "max_force", "fov_points", "mode", "show_fov")
+
     def __init__(self, x: int, y: int, radius: int, color: tuple, separation_distance: int, id_boid: int, mass:int = 1, velocity = None, acceleration = None, max_speed = 3, max_force = 0.2):
-        self.position = pygame.Vector2(x, y)
-        self.radius = radius
+        super().__init__(x, y, radius, mass, velocity, acceleration, max_speed)
         self.color = color
-        self.mass = mass
         self.separation_distance = separation_distance
         self.id_boid = id_boid
-        self.velocity = velocity if velocity is not None else pygame.Vector2(0,0)
-        self.acceleration = acceleration if acceleration is not None else pygame.Vector2(0,0)
-        self.max_speed = max_speed
         self.max_force = max_force
         self.fov_points = ()
         self.mode = 1
@@ -430,17 +400,6 @@ class Boid():
 
         return (b1 == b2 == b3 == b4)
     
-    def apply_force(self, force: pygame.Vector2):
-        """
-        Applies a force on the object (i.e. gravity), follows Newton's formula F = m x A
-
-        Args:
-            - force -> force to be applied
-        """
-        force_copy = force.copy()
-        f = force_copy / self.mass  
-        self.acceleration += f
-
     def pac_man_effect(self, WIDTH, HEIGHT):
         """
         Let the boid spawn on the other side of the canvas once the borders are reached.
@@ -587,14 +546,7 @@ class Boid():
         """
         Updates position of the object.
         """
-        self.velocity += self.acceleration
-        
-        if self.velocity.magnitude() > self.max_speed:
-            self.velocity.normalize_ip()
-            self.velocity *= self.max_speed
-        
-        self.position += self.velocity
-        self.acceleration *= 0
+        self.update_position()
 
     def draw(self, screen):
         if self.show_fov and self.mode == 1:
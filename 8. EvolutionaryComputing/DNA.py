@@ -1,6 +1,7 @@
 import random
 import pygame
 import math
+from kinematics import Kinematics
 
 class DNA_string():
     def __init__(self, length, mutation_factor):
@@ -114,38 +115,20 @@ class DNA():
                 direction *= random.uniform(0.1, self.max_force)
                 break
     
-class Rocket():
+class Rocket(Kinematics):
+    __slots__ = ("fitness", "dna", "gene_counter")
+
     def __init__(self, x: int, y: int, radius: int, lifespan: int, max_force = 2, mutation_factor = 1, velocity = None, acceleration = None):
-        
-        self.radius = radius
-        self.rect = pygame.Rect(x - radius, y - radius, radius*2, radius*2)
+        super().__init__(x, y, radius, velocity=velocity, acceleration=acceleration)
         self.fitness = 0
         self.dna = DNA(lifespan, max_force, mutation_factor)
         self.gene_counter = 0
 
-        # this are all pygame Vectors
-        self.position = pygame.Vector2(x, y)
-        self.velocity = velocity if velocity is not None else pygame.Vector2(0, 0)
-        self.acceleration = acceleration if acceleration is not None else pygame.Vector2(0, 0)
-
-    def apply_force(self, force: pygame.Vector2):
-        """
-        Applies a force on the Mover object (i.e. gravity), follows Newton's formula F = m x A
-
-        Args:
-            - force -> force to be applied
-        """
-        force_copy = force.copy()
-        self.acceleration += force_copy 
-
     def update(self):
         """
-        Updates the position of the mover, used after a force is applied via apply_force().
+        Updates the position of the rocket, used after a force is applied via apply_force().
         """
-        self.velocity += self.acceleration
-        self.position += self.velocity
-        self.acceleration *= 0 
-        self.rect.center = self.position
+        self.update_position()
 
     def compute_fitness(self, target):
         """
@@ -168,6 +151,8 @@ class Rocket():
         pygame.draw.circle(screen, (255, 255, 255), self.position, self.radius)
 
 class SmarterRocket(Rocket):
+    __slots__ = ("hit_obstacle", "best_distance", "hit_target", "frames_to_reach_target")
+
     def __init__(self, x: int, y: int, radius: int, lifespan: int, max_force = 2, mutation_factor = 1, velocity = None, acceleration = None):
         super().__init__(x, y, radius, lifespan, max_force, mutation_factor, velocity, acceleration)
         self.hit_obstacle = False
@@ -175,25 +160,6 @@ class SmarterRocket(Rocket):
         self.hit_target = False
         self.frames_to_reach_target = 0
 
-    def apply_force(self, force: pygame.Vector2):
-        """
-        Applies a force on the Mover object (i.e. gravity), follows Newton's formula F = m x A
-
-        Args:
-            - force -> force to be applied
-        """
-        force_copy = force.copy()
-        self.acceleration += force_copy 
-
-    def update(self):
-        """
-        Updates the position of the mover, used after a force is applied via apply_force().
-        """
-        self.velocity += self.acceleration
-        self.position += self.velocity
-        self.acceleration *= 0 
-        self.rect.center = self.position
-
     def compute_fitness(self):
         """
         Computes the fitness score for the object. 
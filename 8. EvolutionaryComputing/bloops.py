@@ -1,7 +1,11 @@
 import pygame
 import random
 import math
-from perlin_noise import PerlinNoise
+import numpy as np
+from gradient_noise import GradientNoise
+
+# noise generator shared by all the bloops, each bloop has its own offsets
+NOISE = GradientNoise(octaves=1)
 
 class DNA():
     def __init__(self, mutation_factor = 1):
@@ -29,19 +33,17 @@ class Bloop():
         self.pos = pygame.Vector2(pos)
         self.rect = pygame.Rect(pos[0], pos[1], self.dim, self.dim)
 
-        # Perlin noise generator
-        self.noise_x = PerlinNoise(octaves=1)
-        self.noise_y = PerlinNoise(octaves=1)
-
         # Offset per il tempo
         self.xoff = random.uniform(0, 1000)
         self.yoff = random.uniform(0, 1000)
         self.noise_step = 0.01
 
-    def move(self):
-        # Perlin values between -1 and 1
-        dx = self.noise_x(self.xoff)
-        dy = self.noise_y(self.yoff)  
+    def move(self, dx = None, dy = None):
+        # Perlin values between -1 and 1, dx and dy can be sampled
+        # beforehand for all the bloops at once
+        if dx is None or dy is None:
+            dx = NOISE(self.xoff)
+            dy = NOISE(self.yoff)
         
         # Remap the values
         move_x = dx * self.speed
@@ -61,8 +63,8 @@ class Bloop():
         return bloop
 
 
-    def update(self, foods):
-        self.move()
+    def update(self, foods, dx = None, dy = None):
+        self.move(dx, dy)
         self.eat(foods)
         self.health -= 0.2
 
@@ -79,8 +81,8 @@ class Bloop():
     def is_dead(self):
         return self.health <= 0
     
-    def run(self, foods):
-        self.update(foods)
+    def run(self, foods, dx = None, dy = None):
+        self.update(foods, dx, dy)
         return self.is_dead()
     
     def draw(self, screen):
@@ -119,11 +121,29 @@ class World():
         self.food = Food(num_food, WIDTH, HEIGHT)
 
 
+    def sample_moves(self):
+        """
+        Samples the noise of every bloop in one call.
+        """
+        num_bloops = len(self.bloops)
+        xoffs = np.fromiter((bloop.xoff for bloop in self.bloops), float, num_bloops)
+        yoffs = np.fromiter((bloop.yoff for bloop in self.bloops), float, num_bloops)
+        return NOISE(xoffs), NOISE(yoffs)
+
     def run(self, screen):
         i = 0
+        # bloops born during this frame are appended at the end,
+        # they sample their own noise since they are not in the batch
+        num_sampled = len(self.bloops)
+        dxs, dys = self.sample_moves()
+        k = 0
 
         while i < len(self.bloops):
-            is_dead = self.bloops[i].run(self.food)
+            if k < num_sampled:
+                is_dead = self.bloops[i].run(self.food, dxs[k], dys[k])
+            else:
+                is_dead = self.bloops[i].run(self.food)
+            k += 1
             if is_dead:
                 self.bloops.pop(i)
             else: